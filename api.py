@@ -1,15 +1,66 @@
-from fastapi import FastAPI, HTTPException, Query
+import asyncio
+import base64
+import datetime
+import json
+import threading
+from contextlib import asynccontextmanager
+from itertools import repeat
+from json.encoder import encode_basestring
+
+from fastapi import FastAPI, Header, HTTPException, Query, Request, Response
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
+from pydantic import BaseModel, Field, ValidationError
+from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
 import pandas as pd
 import numpy as np
 
-from book_data import load_data, save_data
-from preprocess.normalize import normalize_rating, compute_recency
-from ranking.score import score_tbr_books, recommend_one
+from book_data import (
+    LibraryConflictError,
+    add_library_change_listener,
+    add_library_listener,
+    append_rows,
+    author_scores,
+    cache_books_response,
+    library_changes,
+    library_version,
+    load_data,
+    normalize_titles,
+    remove_library_listener,
+    save_data,
+    title_index,
+)
+import metrics
+import profiling
+from preprocess.book_ids import book_ids
+from ranking.score import recommend_one, score_tbr_books, score_tbr_books_batch
+from ranking.similarity import LibraryContent
+
+
+# Content similarity behind /recommend, rebuilt whenever the library is loaded and then
+# kept up to date with each change.
+_content = LibraryContent()
+add_library_change_listener(_content)
+
+
+def content_scores():
+    return _content.scores()
+
 
+@asynccontextmanager
+async def lifespan(app):
+    # Loading the library here starts the content index build before the first request.
+    await run_in_threadpool(load_data, readonly=True)
+    yield
 
-app = FastAPI(title="LibroRank API")
+
+app = FastAPI(title="LibroRank API", lifespan=lifespan)
+if profiling.enabled():
+    # Must be in place before the routes below are declared.
+    app.router.route_class = profiling.ProfiledRoute
+    app.add_middleware(profiling.ProfileMiddleware)
 
 app.add_middleware(
     CORSMiddleware,
@@ -21,12 +72,181 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(metrics.RequestMetricsMiddleware)
+
+
+@app.exception_handler(LibraryConflictError)
+def library_conflict(request: Request, exc: LibraryConflictError):
+    # Another worker rewrote the library while this request was editing it.
+    return JSONResponse(status_code=409, content={"detail": "Library changed, please retry"})
 
 
 def clean_for_json(df):
     return df.replace({np.nan: None})
 
 
+def _json_value(value):
+    """One cell as JSON text, exactly as clean_for_json + FastAPI's JSONResponse would write it."""
+    if value is None or value is pd.NaT or value is pd.NA:
+        return "null"
+    if isinstance(value, str):
+        return encode_basestring(value)
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, int):
+        return int.__repr__(value)
+    if isinstance(value, float):
+        return _json_float(value)
+    if isinstance(value, (datetime.date, datetime.time)):
+        return encode_basestring(value.isoformat())
+    return json.dumps(jsonable_encoder(value), ensure_ascii=False, allow_nan=False, separators=(",", ":"))
+
+
+def _json_float(value):
+    if value != value:
+        return "null"
+    if value in (float("inf"), float("-inf")):
+        raise ValueError("Out of range float values are not JSON compliant")
+    return float.__repr__(value)
+
+
+def _json_column(series):
+    """JSON text for every value of ``series``, picking a loop that suits its dtype."""
+    kind = series.dtype.kind
+    if not isinstance(series.dtype, np.dtype) and series.hasnans:
+        # Nullable extension columns (Int64, Float64, ...) hold pd.NA, which only the
+        # per-value path below writes as null.
+        kind = "O"
+    if kind == "f":
+        values = series.to_numpy()
+        if np.isinf(values).any():
+            raise ValueError("Out of range float values are not JSON compliant")
+        return ["null" if v != v else float.__repr__(v) for v in values.tolist()]
+    if kind in "iu":
+        return [int.__repr__(v) for v in series.tolist()]
+    if kind == "M" and getattr(series.dtype, "tz", None) is None:
+        values = series.to_numpy()
+        seconds = values.astype("datetime64[s]")
+        # Whole seconds print the same from numpy as from Timestamp.isoformat(); others go the slow way.
+        if (values == seconds).all():
+            text = np.datetime_as_string(seconds, unit="s").tolist()
+            return ["null" if t == "NaT" else '"' + t + '"' for t in text]
+    return [encode_basestring(v) if v.__class__ is str else _json_value(v) for v in series.tolist()]
+
+
+def encode_records(df):
+    """
+    ``df`` as a JSON array of row objects, encoded column by column.
+
+    Produces the same bytes as returning ``clean_for_json(df).to_dict(orient="records")``
+    from a handler, without building a dict per row.
+    """
+    if len(df.columns) == 0 or len(df) == 0:
+        return b"[]"
+    parts = []
+    for i, column in enumerate(df.columns):
+        parts.append(repeat(("{" if i == 0 else ",") + encode_basestring(str(column)) + ":"))
+        parts.append(_json_column(df.iloc[:, i]))
+    parts.append(repeat("}"))
+    return ("[" + ",".join(map("".join, zip(*parts))) + "]").encode("utf-8")
+
+
+# Short names accepted by GET /books for `fields` and `sort`.
+BOOK_FIELDS = {
+    "title": "Title",
+    "author": "Authors",
+    "isbn": "ISBN/UID",
+    "status": "Read Status",
+    "rating": "Star Rating",
+    "date_read": "Last Date Read",
+    "progress": "Progress (%)",
+    "pages_read": "Pages Read",
+    "total_pages": "Total Pages",
+}
+SHELVES = ("want", "reading", "read", "dnf")
+STREAM_HEARTBEAT_SECONDS = 15.0
+# How often an open stream looks for commits made by other worker processes.
+STREAM_POLL_SECONDS = 2.0
+TEXT_FIELDS = {"Title", "Authors", "ISBN/UID", "Read Status"}
+
+
+def _shelf_mask(df, shelf):
+    """Rows on ``shelf``, using the same rules as the frontend's shelf tabs."""
+    status = df["Read Status"].astype(str).str.strip().str.lower()
+    progress = pd.to_numeric(df["Progress (%)"], errors="coerce").fillna(0)
+    if shelf == "dnf":
+        return status == "dnf"
+    if shelf == "read":
+        return status == "read"
+    reading = (status == "to-read") & (progress > 0)
+    if shelf == "reading":
+        return reading
+    return ~(reading | status.isin(["read", "dnf"]))
+
+
+def _sort_key(df, column):
+    """Values books are ordered by: case-folded text, numbers or dates."""
+    if column in TEXT_FIELDS:
+        return df[column].astype("string").str.casefold()
+    if column == "Last Date Read":
+        return pd.to_datetime(df[column], errors="coerce")
+    return pd.to_numeric(df[column], errors="coerce")
+
+
+def _etag(version):
+    return f'"{version}"'
+
+
+def _etag_matches(if_none_match, etag):
+    """Weak comparison, as RFC 9110 asks for If-None-Match."""
+    if if_none_match is None:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
+
+def _encode_cursor(data):
+    raw = json.dumps(data, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor):
+    try:
+        position = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    # Shaped as _encode_cursor writes it: the row id, and for sorted pages the sort value.
+    if not isinstance(position, dict) or type(position.get("id")) is not int:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if position.get("sort") is not None and not isinstance(position.get("value", ()), (str, int, float, type(None))):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return position
+
+
+def _after_cursor(df, key, cursor, descending):
+    """Rows of the ordered ``df`` that come after the row the cursor points at."""
+    row_id = cursor["id"]
+    if key is None:
+        # Library order is row-id order, so the page start is a binary search away.
+        return df.iloc[df.index.searchsorted(row_id, side="right") :]
+    value = cursor["value"]
+    later_id = df.index > row_id
+    if value is None:
+        # Missing values sort last, ties by row id.
+        return df[key.isna().to_numpy() & later_id]
+    try:
+        if key.dtype.kind == "M":
+            value = pd.Timestamp(value)
+        past = key < value if descending else key > value
+    except (TypeError, ValueError):
+        # A value of the wrong type for the sort field.
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    keep = past.fillna(False) | ((key == value).fillna(False) & later_id) | key.isna()
+    return df[keep.to_numpy()]
+
+
 def parse_date_or_today(date_str):
     try:
         return pd.to_datetime(date_str) if date_str else pd.Timestamp.today().normalize()
@@ -38,6 +258,7 @@ class AddBook(BaseModel):
     title: str
     author: str
     total_pages: int | None = None
+    isbn: str | None = None
 
 
 class UpdateProgress(BaseModel):
@@ -74,6 +295,7 @@ class ImportRow(BaseModel):
     title: str
     author: str | None = None
     total_pages: int | None = None
+    isbn: str | None = None
 
 
 class ImportBooks(BaseModel):
@@ -84,30 +306,229 @@ class RemoveBook(BaseModel):
     title: str
 
 
-def _delete_book_by_title(title: str) -> dict:
-    df = load_data()
-    if title not in df["Title"].values:
+class BatchOperation(BaseModel):
+    op: str  # add | patch | finish | dnf | progress | remove
+    body: dict
+
+
+class BatchBooks(BaseModel):
+    operations: list[BatchOperation]
+
+
+class LibraryBook(BaseModel):
+    title: str
+    author: str | None = None
+    status: str = "to-read"  # to-read | read | anything else is ignored
+    rating: float | None = None
+
+
+class BatchRecommend(BaseModel):
+    libraries: dict[str, list[LibraryBook]]
+    k: int = Field(5, ge=1, le=100)
+
+
+def _find_book(titles, title: str):
+    """Row label of ``title`` (case and spacing ignored), or 404."""
+    row = titles.row(title)
+    if row is None:
         raise HTTPException(status_code=404, detail="Book not found")
-    df = df[df["Title"] != title].copy()
+    return row
+
+
+def _mutate(apply, body):
+    """Run one edit against a fresh copy of the book it names and persist it."""
+    # Only that book's row is loaded and diffed, so the edit does not scale with the library.
+    df = load_data(titles=(body if isinstance(body, str) else body.title,))
+    df, result = apply(df, title_index(df), body)
     save_data(df)
-    return {"message": "Book deleted"}
+    return result
 
 
-@app.get("/books")
-def get_books():
-    df = load_data()
-    df = clean_for_json(df)
-    return df.to_dict(orient="records")
+def _remove_title(df, titles, title: str):
+    row = _find_book(titles, title)
+    titles.set(title, None)
+    return df.drop(index=row), {"message": "Book deleted"}
 
 
-@app.post("/books")
-def add_book(book: AddBook):
-    df = load_data()
+def _delete_book_by_title(title: str) -> dict:
+    return _mutate(_remove_title, title)
+
 
+@app.get("/books")
+def get_books(
+    shelf: str | None = None,
+    fields: str | None = None,
+    sort: str | None = None,
+    limit: int | None = Query(None, ge=1, le=1000),
+    cursor: str | None = None,
+    if_none_match: str | None = Header(None),
+):
+    """
+    Books, optionally filtered to one shelf, projected to some fields and sorted.
+
+    ``sort`` is a field name (see ``BOOK_FIELDS``), prefixed with ``-`` for descending.
+    Without ``limit`` the response is the plain list of books. With it, the response is
+    ``{"books": [...], "next_cursor": ...}``; pass ``next_cursor`` back as ``cursor``
+    (with the same shelf and sort) for the next page.
+
+    Responses carry the library version as ETag; a matching ``If-None-Match`` gets a
+    304 before any rows are loaded.
+    """
+    etag = _etag(library_version())
+    if _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+    df = load_data(readonly=True)
+    # The library may have moved on since the check above; describe what was loaded.
+    etag = _etag(df.attrs.get("library_version", library_version()))
+
+    if shelf is not None:
+        shelf = shelf.strip().lower()
+        if shelf not in SHELVES:
+            raise HTTPException(status_code=400, detail="shelf must be want, reading, read, or dnf")
+        df = df[_shelf_mask(df, shelf).to_numpy()]
+
+    columns = list(df.columns)
+    if fields:
+        names = [name.strip() for name in fields.split(",") if name.strip()]
+        unknown = [name for name in names if name not in BOOK_FIELDS]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+        columns = [BOOK_FIELDS[name] for name in names]
+
+    key = None
+    descending = False
+    if sort:
+        descending = sort.startswith("-")
+        name = sort.lstrip("-")
+        if name not in BOOK_FIELDS:
+            raise HTTPException(status_code=400, detail=f"Unknown sort field: {name}")
+        key = _sort_key(df, BOOK_FIELDS[name])
+        # Stable sort over a frame in row-id order, so ties stay in row-id order.
+        order = key.sort_values(ascending=not descending, kind="stable", na_position="last").index
+        df, key = df.loc[order], key.loc[order]
+
+    if cursor is not None:
+        position = _decode_cursor(cursor)
+        if position.get("sort") != sort:
+            raise HTTPException(status_code=400, detail="cursor belongs to a different sort")
+        df = _after_cursor(df, key, position, descending)
+        if key is not None:
+            key = key.loc[df.index]
+
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if limit is None:
+        with metrics.timed("json_encode"):
+            body = encode_records(df[columns])
+        background = None
+        if not (shelf or fields or sort or cursor) and "library_version" in df.attrs:
+            # Lets a freshly started process answer this before it has imported pandas.
+            background = BackgroundTask(cache_books_response, df.attrs["library_version"], body)
+        return Response(body, media_type="application/json", headers=headers, background=background)
+
+    page = df.iloc[:limit]
+    next_cursor = None
+    if len(df) > limit:
+        last = page.index[-1]
+        value = None
+        if key is not None and pd.notna(key.loc[last]):
+            value = key.loc[last]
+            if isinstance(value, pd.Timestamp):
+                value = value.isoformat()
+            elif isinstance(value, np.generic):
+                value = value.item()
+        next_cursor = _encode_cursor({"sort": sort, "id": int(last), "value": value})
+    with metrics.timed("json_encode"):
+        body = b'{"books":' + encode_records(page[columns]) + b',"next_cursor":' + json.dumps(next_cursor).encode() + b"}"
+    return Response(body, media_type="application/json", headers=headers)
+
+
+@app.get("/books/changes")
+def get_book_changes(since: int = Query(..., ge=0)):
+    """
+    What changed in the library after version ``since`` (the ETag of an earlier ``GET /books``).
+
+    Changes are applied in order to the unsorted, unfiltered list of books: in each one,
+    ``update`` is ``[[index, {column: value}], ...]`` and ``delete`` a list of indexes,
+    both into the list as it was before that change; updates go first, then deletes, then
+    the ``append`` rows are added at the end. When the server no longer has the changes
+    since that version the response has ``"resync": true`` and the client should fetch
+    ``GET /books`` again.
+    """
+    version, changes = library_changes(since)
+    if changes is None:
+        return {"version": version, "resync": True}
+    return {"version": version, "resync": False, "changes": changes}
+
+
+def _sse(event, data, event_id=None):
+    text = json.dumps(jsonable_encoder(data), ensure_ascii=False, separators=(",", ":"))
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event}\ndata: {text}\n\n"
+
+
+async def _book_events(since):
+    """
+    Server-sent events for ``GET /books/stream``: ``ready`` with the starting version,
+    then a ``change`` (shaped like one ``GET /books/changes`` entry) for every commit, or
+    ``resync`` when the changes are not available. Comments keep idle connections open.
+    """
+    loop = asyncio.get_running_loop()
+    wake = asyncio.Event()
+
+    def listener(version):
+        # Called on whichever thread committed; hand over to the event loop, unless the
+        # loop was closed under a stream that was never finalized.
+        if not loop.is_closed():
+            loop.call_soon_threadsafe(wake.set)
+
+    add_library_listener(listener)
+    try:
+        if since is None:
+            since = await run_in_threadpool(library_version)
+        yield _sse("ready", {"version": since}, since)
+        last_sent = loop.time()
+        while True:
+            wake.clear()
+            version, changes = await run_in_threadpool(library_changes, since)
+            if changes is None:
+                yield _sse("resync", {"version": version}, version)
+            else:
+                for change in changes:
+                    yield _sse("change", change, change["v"])
+            if version != since:
+                since, last_sent = version, loop.time()
+            try:
+                await asyncio.wait_for(wake.wait(), STREAM_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            if loop.time() - last_sent >= STREAM_HEARTBEAT_SECONDS:
+                yield ": heartbeat\n\n"
+                last_sent = loop.time()
+    finally:
+        remove_library_listener(listener)
+
+
+@app.get("/books/stream")
+async def stream_books(since: int | None = Query(None, ge=0), last_event_id: str | None = Header(None)):
+    """
+    Push library changes as server-sent events, starting after version ``since`` (or
+    the browser's ``Last-Event-ID`` on reconnect), or from now.
+    """
+    if since is None and last_event_id and last_event_id.isdigit():
+        since = int(last_event_id)
+    return StreamingResponse(
+        _book_events(since),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _add_book(df, titles, book: AddBook):
     new_row = {
         "Title": book.title,
         "Authors": book.author,
-        "ISBN/UID": str(pd.Timestamp.now().timestamp()),
+        "ISBN/UID": book_ids([book.title], [book.author], [book.isbn])[0],
         "Read Status": "to-read",
         "Star Rating": np.nan,
         "Last Date Read": None,
@@ -116,10 +537,16 @@ def add_book(book: AddBook):
         "Total Pages": book.total_pages
     }
 
-    df = pd.concat([df, pd.DataFrame([new_row])], ignore_index=True)
-    save_data(df)
+    df = append_rows(df, [new_row])
+    if titles.get(book.title) is None:
+        titles.set(book.title, df.index[-1])
+
+    return df, {"message": "Book added"}
 
-    return {"message": "Book added"}
+
+@app.post("/books")
+def add_book(book: AddBook):
+    return _mutate(_add_book, book)
 
 
 @app.delete("/books")
@@ -127,135 +554,144 @@ def delete_book(title: str = Query(..., min_length=1)):
     return _delete_book_by_title(title)
 
 
-@app.post("/books/remove")
-def remove_book(body: RemoveBook):
-    """Same as DELETE /books — POST avoids 405 from proxies that block DELETE."""
+def _remove_book(df, titles, body: RemoveBook):
     t = body.title.strip()
     if not t:
         raise HTTPException(status_code=400, detail="title is required")
-    return _delete_book_by_title(t)
+    return _remove_title(df, titles, t)
 
 
-@app.patch("/books")
-def patch_book(p: PatchBook):
-    df = load_data()
+@app.post("/books/remove")
+def remove_book(body: RemoveBook):
+    """Same as DELETE /books — POST avoids 405 from proxies that block DELETE."""
+    return _mutate(_remove_book, body)
 
-    if p.title not in df["Title"].values:
-        raise HTTPException(status_code=404, detail="Book not found")
+
+def _patch_book(df, titles, p: PatchBook):
+    row = _find_book(titles, p.title)
 
     if p.new_title is not None and p.new_title != p.title:
-        if p.new_title in df["Title"].values:
+        if titles.get(p.new_title) not in (None, row):
             raise HTTPException(status_code=400, detail="A book with that title already exists")
-        df.loc[df["Title"] == p.title, "Title"] = p.new_title
-
-    key = p.new_title if p.new_title else p.title
-    row = df["Title"] == key
+        df.at[row, "Title"] = p.new_title
+        titles.set(p.title, None)
+        titles.set(p.new_title, row)
 
     if p.author is not None:
-        df.loc[row, "Authors"] = p.author
+        df.at[row, "Authors"] = p.author
     if p.total_pages is not None:
-        df.loc[row, "Total Pages"] = p.total_pages
+        df.at[row, "Total Pages"] = p.total_pages
 
     if p.move_to is not None:
         m = p.move_to.strip().lower()
         if m == "want":
-            df.loc[row, "Read Status"] = "to-read"
-            df.loc[row, "Progress (%)"] = 0
-            df.loc[row, "Pages Read"] = 0
+            df.at[row, "Read Status"] = "to-read"
+            df.at[row, "Progress (%)"] = 0
+            df.at[row, "Pages Read"] = 0
         elif m == "reading":
-            tp = df.loc[row, "Total Pages"].values[0]
+            tp = df.at[row, "Total Pages"]
             if pd.isna(tp) or not tp or float(tp) <= 0:
                 raise HTTPException(status_code=400, detail="Set total pages before moving to currently reading")
             tp = int(float(tp))
             pr = p.pages_read if p.pages_read is not None else 1
             pr = max(1, min(int(pr), tp))
-            df.loc[row, "Read Status"] = "to-read"
-            df.loc[row, "Pages Read"] = pr
-            df.loc[row, "Progress (%)"] = round((pr / tp) * 100, 2)
+            df.at[row, "Read Status"] = "to-read"
+            df.at[row, "Pages Read"] = pr
+            df.at[row, "Progress (%)"] = round((pr / tp) * 100, 2)
         elif m == "read":
             rating = p.rating
             if rating is None:
-                existing = df.loc[row, "Star Rating"].values[0]
+                existing = df.at[row, "Star Rating"]
                 rating = float(existing) if pd.notna(existing) else None
             if rating is None or not (1 <= rating <= 5):
                 raise HTTPException(status_code=400, detail="Rating 1–5 required when marking as read")
-            df.loc[row, "Read Status"] = "read"
-            df.loc[row, "Star Rating"] = rating
-            df.loc[row, "Progress (%)"] = 100
-            tp = df.loc[row, "Total Pages"].values[0]
+            df.at[row, "Read Status"] = "read"
+            df.at[row, "Star Rating"] = rating
+            df.at[row, "Progress (%)"] = 100
+            tp = df.at[row, "Total Pages"]
             if pd.notna(tp) and float(tp) > 0:
-                df.loc[row, "Pages Read"] = int(float(tp))
-            df.loc[row, "Last Date Read"] = parse_date_or_today(p.date_read)
+                df.at[row, "Pages Read"] = int(float(tp))
+            df.at[row, "Last Date Read"] = parse_date_or_today(p.date_read)
         elif m == "dnf":
-            df.loc[row, "Read Status"] = "dnf"
-            df.loc[row, "Star Rating"] = 1
-            df.loc[row, "Progress (%)"] = 0
-            df.loc[row, "Pages Read"] = 0
-            df.loc[row, "Last Date Read"] = parse_date_or_today(p.date_read)
+            df.at[row, "Read Status"] = "dnf"
+            df.at[row, "Star Rating"] = 1
+            df.at[row, "Progress (%)"] = 0
+            df.at[row, "Pages Read"] = 0
+            df.at[row, "Last Date Read"] = parse_date_or_today(p.date_read)
         else:
             raise HTTPException(status_code=400, detail="move_to must be want, reading, read, or dnf")
     elif p.pages_read is not None:
-        tp = df.loc[row, "Total Pages"].values[0]
+        tp = df.at[row, "Total Pages"]
         if pd.isna(tp) or not tp or float(tp) <= 0:
             raise HTTPException(status_code=400, detail="Total pages not set")
         tp = int(float(tp))
         pr = min(int(p.pages_read), tp)
-        df.loc[row, "Pages Read"] = pr
-        df.loc[row, "Progress (%)"] = round((pr / tp) * 100, 2)
-        df.loc[row, "Read Status"] = "to-read"
+        df.at[row, "Pages Read"] = pr
+        df.at[row, "Progress (%)"] = round((pr / tp) * 100, 2)
+        df.at[row, "Read Status"] = "to-read"
     elif p.rating is not None:
-        rs = str(df.loc[row, "Read Status"].iloc[0]).lower()
+        rs = str(df.at[row, "Read Status"]).lower()
         if rs != "read":
             raise HTTPException(status_code=400, detail="Rating can only be updated on finished books")
         if not (1 <= p.rating <= 5):
             raise HTTPException(status_code=400, detail="Rating must be 1–5")
-        df.loc[row, "Star Rating"] = p.rating
+        df.at[row, "Star Rating"] = p.rating
 
-    save_data(df)
-    return {"message": "Book updated"}
+    return df, {"message": "Book updated"}
+
+
+@app.patch("/books")
+def patch_book(p: PatchBook):
+    return _mutate(_patch_book, p)
 
 
 @app.post("/books/import")
 def import_books(data: ImportBooks):
     df = load_data()
-    imported = 0
-    skipped = 0
-    for book in data.books:
-        if not book.title or not book.title.strip():
-            skipped += 1
-            continue
-        t = book.title.strip()
-        if t in df["Title"].values:
-            skipped += 1
-            continue
-        new_row = {
-            "Title": t,
-            "Authors": (book.author or "").strip() or "Unknown",
-            "ISBN/UID": str(pd.Timestamp.now().timestamp()) + f"_{imported}",
+    batch = pd.DataFrame(
+        {
+            "title": [b.title for b in data.books],
+            "author": [b.author for b in data.books],
+            "total_pages": pd.array([b.total_pages for b in data.books], dtype="Float64"),
+            "isbn": [b.isbn for b in data.books],
+        }
+    )
+    titles = batch["title"].fillna("").astype(str).str.strip()
+    keys = normalize_titles(titles)
+
+    # One pass: drop blanks, titles already in the library and repeats within the batch.
+    accepted = (titles != "") & ~title_index(df).contains(keys) & ~keys.duplicated()
+    accepted = accepted.to_numpy()
+    imported = int(accepted.sum())
+
+    authors = batch["author"].fillna("").astype(str).str.strip()[accepted]
+    authors = authors.where(authors != "", "Unknown")
+    new_rows = pd.DataFrame(
+        {
+            "Title": titles[accepted],
+            "Authors": authors,
+            "ISBN/UID": book_ids(titles[accepted], authors, batch["isbn"][accepted]),
             "Read Status": "to-read",
             "Star Rating": np.nan,
             "Last Date Read": None,
             "Progress (%)": 0,
             "Pages Read": 0,
-            "Total Pages": book.total_pages,
+            "Total Pages": batch["total_pages"][accepted].astype(float),
         }
-        df = pd.concat([df, pd.DataFrame([new_row])], ignore_index=True)
-        imported += 1
+    )
+    if imported:
+        df = append_rows(df, new_rows)
     save_data(df)
-    return {"imported": imported, "skipped": skipped}
-
+    return {"imported": imported, "skipped": len(batch) - imported}
 
-@app.patch("/books/progress")
-def update_progress(update: UpdateProgress):
-    df = load_data()
 
-    if update.title not in df["Title"].values:
-        raise HTTPException(status_code=404, detail="Book not found")
+def _update_progress(df, titles, update: UpdateProgress):
+    row = _find_book(titles, update.title)
 
     if update.total_pages:
-        df.loc[df["Title"] == update.title, "Total Pages"] = update.total_pages
+        df.at[row, "Total Pages"] = update.total_pages
 
-    total_pages = df.loc[df["Title"] == update.title, "Total Pages"].values[0]
+    total_pages = df.at[row, "Total Pages"]
 
     if not total_pages:
         raise HTTPException(status_code=400, detail="Total pages not set")
@@ -263,68 +699,207 @@ def update_progress(update: UpdateProgress):
     pages_read = min(update.pages_read, total_pages)
     progress = round((pages_read / total_pages) * 100, 2)
 
-    df.loc[df["Title"] == update.title, "Pages Read"] = pages_read
-    df.loc[df["Title"] == update.title, "Progress (%)"] = progress
+    df.at[row, "Pages Read"] = pages_read
+    df.at[row, "Progress (%)"] = progress
 
-    save_data(df)
+    return df, {"progress": float(progress)}
 
-    return {"progress": progress}
 
+@app.patch("/books/progress")
+def update_progress(update: UpdateProgress):
+    return _mutate(_update_progress, update)
 
-@app.patch("/books/finish")
-def finish_book(data: FinishBook):
-    df = load_data()
 
-    if data.title not in df["Title"].values:
-        raise HTTPException(status_code=404, detail="Book not found")
+def _finish_book(df, titles, data: FinishBook):
+    row = _find_book(titles, data.title)
 
     if not (1 <= data.rating <= 5):
         raise HTTPException(status_code=400, detail="Rating must be 1-5")
 
     date = parse_date_or_today(data.date)
 
-    df.loc[df["Title"] == data.title, "Read Status"] = "read"
-    df.loc[df["Title"] == data.title, "Star Rating"] = data.rating
-    df.loc[df["Title"] == data.title, "Progress (%)"] = 100
-    df.loc[df["Title"] == data.title, "Last Date Read"] = date
+    df.at[row, "Read Status"] = "read"
+    df.at[row, "Star Rating"] = data.rating
+    df.at[row, "Progress (%)"] = 100
+    df.at[row, "Last Date Read"] = date
 
-    save_data(df)
+    return df, {"message": "Book marked as finished"}
 
-    return {"message": "Book marked as finished"}
 
+@app.patch("/books/finish")
+def finish_book(data: FinishBook):
+    return _mutate(_finish_book, data)
 
-@app.patch("/books/dnf")
-def dnf_book(data: DNFBook):
-    df = load_data()
 
-    if data.title not in df["Title"].values:
-        raise HTTPException(status_code=404, detail="Book not found")
+def _dnf_book(df, titles, data: DNFBook):
+    row = _find_book(titles, data.title)
 
     date = parse_date_or_today(data.date)
 
-    df.loc[df["Title"] == data.title, "Read Status"] = "dnf"
-    df.loc[df["Title"] == data.title, "Star Rating"] = 1
-    df.loc[df["Title"] == data.title, "Progress (%)"] = 0
-    df.loc[df["Title"] == data.title, "Last Date Read"] = date
+    df.at[row, "Read Status"] = "dnf"
+    df.at[row, "Star Rating"] = 1
+    df.at[row, "Progress (%)"] = 0
+    df.at[row, "Last Date Read"] = date
 
-    save_data(df)
+    return df, {"message": "Book marked as DNF"}
 
-    return {"message": "Book marked as DNF"}
 
+@app.patch("/books/dnf")
+def dnf_book(data: DNFBook):
+    return _mutate(_dnf_book, data)
 
-@app.get("/recommend")
-def recommend():
-    df = load_data()
 
-    df = normalize_rating(df)
-    df = compute_recency(df)
+BATCH_OPERATIONS = {
+    "add": (AddBook, _add_book),
+    "patch": (PatchBook, _patch_book),
+    "finish": (FinishBook, _finish_book),
+    "dnf": (DNFBook, _dnf_book),
+    "progress": (UpdateProgress, _update_progress),
+    "remove": (RemoveBook, _remove_book),
+}
 
-    tbr_ranked = score_tbr_books(df)
-    recommendation = recommend_one(tbr_ranked)
 
-    if recommendation is None or len(recommendation) == 0:
-        return []
+@app.post("/books/batch")
+def batch_books(data: BatchBooks):
+    """
+    Apply several edits in order against one copy of the library, then save once.
 
-    recommendation = clean_for_json(recommendation)
+    All or nothing: if an operation fails, nothing is saved and the response carries the
+    failing operation's status code. ``results`` lists the outcome of each operation up
+    to and including the one that failed.
+    """
+    df = load_data()
+    titles = title_index(df)
+    results = []
+    for i, operation in enumerate(data.operations):
+        try:
+            if operation.op not in BATCH_OPERATIONS:
+                raise HTTPException(status_code=400, detail=f"op must be one of {', '.join(BATCH_OPERATIONS)}")
+            model, apply = BATCH_OPERATIONS[operation.op]
+            try:
+                body = model.model_validate(operation.body)
+            except ValidationError as exc:
+                raise HTTPException(status_code=422, detail=jsonable_encoder(exc.errors(include_url=False)))
+            df, result = apply(df, titles, body)
+        except HTTPException as exc:
+            results.append({"op": operation.op, "status": exc.status_code, "detail": exc.detail})
+            return JSONResponse(
+                status_code=exc.status_code,
+                content={"detail": f"Operation {i} ({operation.op}) failed; nothing was saved", "results": results},
+            )
+        results.append({"op": operation.op, "status": 200, "result": result})
+
+    save_data(df)
+    return {"results": results}
+
+
+# Ranked candidates per (library version, k), with the generator that picks from them.
+# Entries for older versions are dropped once a newer version is cached.
+_recommendations: dict[tuple[int, int | None], tuple[pd.DataFrame, np.random.Generator]] = {}
+_recommendations_lock = threading.Lock()
+
+
+def _ranked_candidates(version, k):
+    with _recommendations_lock:
+        entry = _recommendations.get((version, k))
+    if entry is not None:
+        return version, entry
+
+    # Author preferences come from the store's running aggregates, so only the
+    # to-read shelf is loaded.
+    df = load_data(statuses=("to-read",), readonly=True)
+    version = df.attrs.get("library_version")
+    # Seeded per version: every worker ranks a version the same way, and the picks
+    # from it vary from call to call but repeat across restarts.
+    rng = np.random.default_rng(version)
+    with metrics.timed("scoring"):
+        scores, global_score = author_scores()
+        ranked = score_tbr_books(
+            df,
+            author_scores=scores,
+            global_score=global_score,
+            content_scores=content_scores(),
+            k=k or 5,
+            rng=rng,
+        )
+    entry = (ranked, rng)
+    if version is not None:
+        with _recommendations_lock:
+            for key in [key for key in _recommendations if key[0] != version]:
+                del _recommendations[key]
+            _recommendations[(version, k)] = entry
+    return version, entry
 
-    return recommendation.to_dict(orient="records")
\ No newline at end of file
+
+@app.get("/recommend")
+def recommend(k: int | None = Query(None, ge=1, le=100), if_none_match: str | None = Header(None)):
+    """
+    One to-read book picked at random from the five best candidates, or with ``k`` the
+    ``k`` best candidates, best first. Either way at most one book per author.
+
+    Candidates are ranked once per library version. The ``k`` list is the same for
+    every call at one version, so it carries the version as ETag like ``GET /books``;
+    the single pick changes between calls and is not validated.
+    """
+    version = library_version()
+    if k is not None and _etag_matches(if_none_match, _etag(version)):
+        return Response(status_code=304, headers={"ETag": _etag(version), "Cache-Control": "no-cache"})
+
+    version, (ranked, rng) = _ranked_candidates(version, k)
+    headers = {"ETag": _etag(version), "Cache-Control": "no-cache"} if k is not None and version is not None else None
+    if k is not None:
+        recommendation = ranked
+    else:
+        with metrics.timed("scoring"):
+            recommendation = recommend_one(ranked, rng=rng)
+
+    if recommendation is None or len(recommendation) == 0:
+        return JSONResponse([], headers=headers)
+
+    # Encode here rather than in FastAPI so the time lands in the json_encode stage.
+    with metrics.timed("json_encode"):
+        recommendation = clean_for_json(recommendation)
+        return JSONResponse(jsonable_encoder(recommendation.to_dict(orient="records")), headers=headers)
+
+
+@app.post("/recommend/batch")
+def recommend_batch(data: BatchRecommend):
+    """
+    Top ``k`` to-read books for each of several libraries sent in the body, scored in one
+    pass; ``recommendations`` maps each library key to its list, best first. The stored
+    library is not involved.
+    """
+    books = [(key, book) for key, library in data.libraries.items() for book in library]
+    df = pd.DataFrame(
+        {
+            "library": [key for key, _ in books],
+            "Title": [book.title for _, book in books],
+            "Authors": [book.author for _, book in books],
+            "Read Status": [book.status for _, book in books],
+            "Star Rating": pd.array([book.rating for _, book in books], dtype="Float64"),
+        }
+    )
+    with metrics.timed("scoring"):
+        ranked = score_tbr_books_batch(df, k=data.k)
+
+    with metrics.timed("json_encode"):
+        ranked = clean_for_json(ranked)
+        recommendations = {key: [] for key in data.libraries}
+        for record in ranked.to_dict(orient="records"):
+            recommendations[record.pop("library")].append(record)
+        return JSONResponse(jsonable_encoder({"recommendations": recommendations}))
+
+
+@app.get("/profiles/{artifact_id}")
+def get_profile(artifact_id: str, x_librorank_profile: str | None = Header(None)):
+    """Download a request profile (see ``profiling``); needs the same header that asked for it."""
+    path = profiling.artifact_path(artifact_id) if profiling.authorized(x_librorank_profile) else None
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="application/zip", filename=f"profile-{artifact_id}.zip")
+
+
+@app.get("/metrics")
+def get_metrics():
+    """Request and stage latencies, library size and bytes written, in Prometheus text format."""
+    return Response(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
\ No newline at end of file
@@ -0,0 +1,85 @@
+"""
+Batch scoring benchmark: top-k recommendations for many libraries at once.
+
+Compares, on the same generated libraries:
+
+- loop: ``normalize_rating`` and ``score_tbr_books`` once per library, as a server
+  holding many users' libraries would do without a batch path.
+- batch: one ``score_tbr_books_batch`` call over all libraries concatenated.
+
+Usage: ``python benchmarks/batch_scoring.py [--libraries 1000] [--books 200] [--k 5] [--runs 5]``
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from preprocess.normalize import normalize_rating  # noqa: E402
+from ranking.score import score_tbr_books, score_tbr_books_batch  # noqa: E402
+
+
+def _libraries(count: int, books: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    rows = count * books
+    read = rng.random(rows) < 0.5
+    ratings = np.where(read & (rng.random(rows) < 0.8), rng.integers(1, 6, rows), np.nan)
+    return pd.DataFrame(
+        {
+            "library": np.repeat([f"user-{i}" for i in range(count)], books),
+            "Title": [f"Book {i}" for i in range(rows)],
+            "Authors": [f"Author {i}" for i in rng.integers(0, books // 4 + 1, rows)],
+            "Read Status": np.where(read, "read", "to-read"),
+            "Star Rating": ratings,
+        }
+    )
+
+
+def _loop(libraries: list[pd.DataFrame], k: int) -> int:
+    picked = 0
+    for library in libraries:
+        ranked = score_tbr_books(normalize_rating(library.copy()), k=k)
+        picked += len(ranked)
+    return picked
+
+
+def _batch(df: pd.DataFrame, k: int) -> int:
+    return len(score_tbr_books_batch(df, k=k))
+
+
+def _median(func, *args, runs: int) -> float:
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func(*args)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--libraries", type=int, default=1000)
+    parser.add_argument("--books", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    df = _libraries(args.libraries, args.books)
+    libraries = [library for _, library in df.groupby("library", sort=False)]
+    loop = _median(_loop, libraries, args.k, runs=args.runs)
+    batch = _median(_batch, df, args.k, runs=args.runs)
+    print(f"{args.libraries} libraries x {args.books} books, top {args.k}, median of {args.runs} runs")
+    print(f"  {'loop over libraries':32} {loop * 1000:8.1f} ms")
+    print(f"  {'score_tbr_books_batch':32} {batch * 1000:8.1f} ms  ({loop / batch:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Feature builder benchmark: rating, recency and score columns for a large library.
+
+Compares, on the same generated ratings and read dates (as ``clean_books`` leaves them):
+
+- chain: ``normalize_rating``, ``compute_recency`` and ``compute_score`` in turn.
+- add_features: the fused builder, writing the same four columns.
+- build_features: the fused builder on the raw arrays, into a reused ``out`` buffer.
+
+Usage: ``python benchmarks/feature_builder.py [--rows 1000000] [--runs 5]``
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from preprocess.normalize import (  # noqa: E402
+    FEATURE_COLUMNS,
+    add_features,
+    build_features,
+    compute_recency,
+    compute_score,
+    normalize_rating,
+)
+
+TODAY = pd.Timestamp("2026-01-01")
+
+
+def _library(rows: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(
+        {
+            "rating": rng.integers(1, 6, rows).astype(np.float64),
+            "last_date_read": TODAY - pd.to_timedelta(rng.integers(0, 3650, rows), unit="D"),
+        }
+    )
+
+
+def _chain(df: pd.DataFrame) -> pd.DataFrame:
+    df = normalize_rating(df.copy())
+    df = compute_recency(df, today=TODAY)
+    return compute_score(df)
+
+
+def _fused(df: pd.DataFrame) -> pd.DataFrame:
+    return add_features(df.copy(), today=TODAY)
+
+
+def _arrays(ratings: np.ndarray, dates: np.ndarray, out: np.ndarray) -> np.ndarray:
+    return build_features(ratings, dates, today=TODAY, out=out)
+
+
+def _median(func, *args, runs: int) -> float:
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func(*args)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    df = _library(args.rows)
+    ratings, dates = df["rating"].to_numpy(), df["last_date_read"].to_numpy()
+    out = np.empty((len(FEATURE_COLUMNS), args.rows))
+
+    expected, fused = _chain(df), _fused(df)
+    for name in FEATURE_COLUMNS:
+        if not np.allclose(expected[name], fused[name]):
+            raise SystemExit(f"{name} differs between the chain and add_features")
+
+    chain = _median(_chain, df, runs=args.runs)
+    frame = _median(_fused, df, runs=args.runs)
+    arrays = _median(_arrays, ratings, dates, out, runs=args.runs)
+    print(f"{args.rows} rows, median of {args.runs} runs")
+    print(f"  {'normalize/recency/score chain':32} {chain * 1000:8.1f} ms")
+    print(f"  {'add_features':32} {frame * 1000:8.1f} ms  ({chain / frame:.1f}x)")
+    print(f"  {'build_features into out':32} {arrays * 1000:8.1f} ms  ({chain / arrays:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
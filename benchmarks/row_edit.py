@@ -0,0 +1,78 @@
+"""
+Single-book edit benchmark: ``PATCH /books/progress`` against libraries of growing size.
+
+Each size gets a generated CSV library and a fresh store, warmed up with one load and
+title lookup. The handler is then called directly (no HTTP), so a run times loading the
+book by title, the row diff, the commit and the journal write. The per-edit cost should
+stay flat as the library grows.
+
+Usage: ``python benchmarks/row_edit.py [--rows 20000 200000] [--edits 50]``
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import api  # noqa: E402
+import book_data  # noqa: E402
+from book_data import BOOKS_COLUMNS, CsvBackend, LibraryStore  # noqa: E402
+
+
+def _library(path: Path, rows: int, seed: int = 0) -> None:
+    rng = np.random.default_rng(seed)
+    read = rng.random(rows) < 0.5
+    pd.DataFrame(
+        {
+            "Title": [f"Book {i}" for i in range(rows)],
+            "Authors": [f"Author {i}" for i in rng.integers(0, rows // 40 + 1, rows)],
+            "ISBN/UID": [str(i) for i in range(rows)],
+            "Read Status": np.where(read, "read", "to-read"),
+            "Star Rating": np.where(read, rng.integers(1, 6, rows), np.nan),
+            "Last Date Read": np.where(read, "2024-01-01", ""),
+            "Progress (%)": 0.0,
+            "Pages Read": 0,
+            "Total Pages": 300,
+        },
+        columns=BOOKS_COLUMNS,
+    ).to_csv(path, index=False)
+
+
+def _edits(rows: int, edits: int) -> float:
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = Path(temp_dir) / "books.csv"
+        _library(path, rows)
+        # The API reads the module-level store on every call.
+        book_data._store = LibraryStore(CsvBackend(path, compact_threshold=edits + 1))
+        api.title_index(api.load_data(readonly=True)).get("Book 0")
+        times = []
+        for i in range(edits):
+            update = api.UpdateProgress(title=f"Book {i * 7919 % rows}", pages_read=i % 300 + 1)
+            start = time.perf_counter()
+            api.update_progress(update)
+            times.append(time.perf_counter() - start)
+        return statistics.median(times)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, nargs="+", default=[20_000, 200_000])
+    parser.add_argument("--edits", type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"PATCH /books/progress, median of {args.edits} edits")
+    for rows in args.rows:
+        print(f"  {rows:>9} books {_edits(rows, args.edits) * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Cold-start benchmark: how long a fresh process takes to answer its first ``GET /books``.
+
+Each measurement runs in a new interpreter against a generated CSV library:
+
+- ``import server`` / ``import api``: module import time only.
+- ``api`` first /books: import the full app, load the library, encode the response.
+- ``server`` first /books: the stdlib-only entry point answering from the response
+  cache a warm process left on disk.
+
+Usage: ``python benchmarks/startup.py [--rows 50000] [--runs 5]``
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Drives one ASGI request without a server or an HTTP client library.
+FIRST_BOOKS = """
+import time
+start = time.perf_counter()
+import asyncio
+from {module} import app
+
+async def get_books():
+    # Start the app the way uvicorn does, then send one request.
+    lifespan = asyncio.Queue()
+    started = asyncio.Event()
+    await lifespan.put({{"type": "lifespan.startup"}})
+    async def lifespan_send(message):
+        started.set()
+    task = asyncio.create_task(app({{"type": "lifespan", "asgi": {{"version": "3.0"}}}}, lifespan.get, lifespan_send))
+    await started.wait()
+
+    messages = []
+    async def receive():
+        return {{"type": "http.request", "body": b"", "more_body": False}}
+    async def send(message):
+        messages.append(message)
+    scope = {{"type": "http", "asgi": {{"version": "3.0"}}, "http_version": "1.1", "method": "GET",
+             "scheme": "http", "path": "/books", "raw_path": b"/books", "query_string": b"",
+             "root_path": "", "headers": [], "client": ("bench", 1), "server": ("bench", 80)}}
+    await app(scope, receive, send)
+    assert messages[0]["status"] == 200, messages[0]
+    print(time.perf_counter() - start)
+    task.cancel()
+
+asyncio.run(get_books())
+"""
+
+IMPORT_ONLY = """
+import time
+start = time.perf_counter()
+import {module}
+print(time.perf_counter() - start)
+"""
+
+
+def _write_library(path: Path, rows: int) -> None:
+    statuses = ("to-read", "read", "dnf")
+    with path.open("w", encoding="utf-8") as handle:
+        handle.write("Title,Authors,ISBN/UID,Read Status,Star Rating,Last Date Read,Progress (%),Pages Read,Total Pages\n")
+        for i in range(rows):
+            status = statuses[i % 3]
+            rated = status == "read"
+            handle.write(
+                f"Book {i},Author {i % 700},{9780000000000 + i},{status},"
+                f"{(i % 5) + 1 if rated else ''},{'2024-03-0' + str(i % 9 + 1) if rated else ''},"
+                f"{100.0 if rated else 0.0},{i % 300},{300 + i % 200}\n"
+            )
+
+
+def _time(code: str, env: dict[str, str]) -> float:
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    )
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        library = Path(temp_dir) / "books.csv"
+        _write_library(library, args.rows)
+        env = {**os.environ, "LIBRORANK_STORAGE": "csv", "LIBRORANK_CSV_PATH": str(library)}
+        cases = {
+            "import server": IMPORT_ONLY.format(module="server"),
+            "import api": IMPORT_ONLY.format(module="api"),
+            # Also leaves the response cache behind for the server case.
+            "api: first /books": FIRST_BOOKS.format(module="api"),
+            "server: first /books (cached)": FIRST_BOOKS.format(module="server"),
+        }
+        print(f"{args.rows} rows, median of {args.runs} fresh processes")
+        for name, code in cases.items():
+            times = [_time(code, env) for _ in range(args.runs)]
+            print(f"  {name:32} {statistics.median(times) * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,69 @@
-"""Shared CSV persistence for the API and CLI. No bundled library data — file is created empty on first use."""
+"""Shared persistence for the API and CLI. No bundled library data — file is created empty on first use.
+
+The library is kept resident in memory by a ``LibraryStore``. ``save_data`` diffs the
+frame it is given against the resident copy and hands only the changed rows to the
+storage backend selected by ``LIBRORANK_STORAGE``:
+
+- ``csv`` (default): appends them to a journal next to ``books.csv``; the journal is
+  folded back into the CSV snapshot once it grows past ``JOURNAL_COMPACT_THRESHOLD`` entries.
+- ``arrow``: same journal, but the snapshot is a typed, memory-mapped Arrow IPC file
+  ``books.arrow`` (or ``LIBRORANK_ARROW_PATH``); ``export_csv`` writes a CSV copy.
+  ``migrate_csv_to_arrow`` moves an existing CSV library over once. Requires ``pyarrow``.
+- ``sqlite``: runs them as indexed UPDATE/DELETE/INSERT statements against
+  ``books.sqlite3`` (or ``LIBRORANK_SQLITE_PATH``). Use ``migrate_csv_to_sqlite`` once
+  to move an existing CSV library over.
+
+Frames returned by ``load_data`` are indexed by stable row ids. Keep that index when
+editing them (use ``append_rows`` to add books) so ``save_data`` can tell which rows
+were edited, removed or added.
+
+Several processes (e.g. uvicorn workers) can share one library. Each keeps its own
+resident copy and, before answering a load, checks the backend for commits made by the
+others (a ``stat`` of the snapshot and journal, or SQLite's ``data_version``), replaying
+only the journal tail it has not seen. Writers serialize on a cross-process lock.
+"""
 
 from __future__ import annotations
 
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
 from pathlib import Path
+from typing import Any, Callable
 
 import numpy as np
 import pandas as pd
 
-BASE_DIR = Path(__file__).resolve().parent
-PROCESSED_PATH = BASE_DIR / "data" / "processed" / "books.csv"
+import metrics
+from library_files import (
+    ARROW_PATH,
+    PROCESSED_PATH,
+    SQLITE_PATH,
+    file_identity,
+    storage_location,
+    write_books_cache,
+)
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, so only one process may write the library.
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+# Journal entries replayed on top of the snapshot before it is rewritten.
+JOURNAL_COMPACT_THRESHOLD = 500
+# Row-level changes kept for delta sync; older clients are told to resync.
+CHANGE_LOG_VERSIONS = 1000
+CHANGE_LOG_ROWS = 50_000
+# Seconds between rewrites of the cached GET /books body; each is as large as the library.
+BOOKS_CACHE_INTERVAL = 60.0
 
 BOOKS_COLUMNS = [
     "Title",
@@ -22,26 +77,1429 @@ BOOKS_COLUMNS = [
     "Total Pages",
 ]
 
+SQLITE_COLUMN_TYPES = {
+    "Title": "TEXT",
+    "Authors": "TEXT",
+    "ISBN/UID": "TEXT",
+    "Read Status": "TEXT",
+    "Star Rating": "REAL",
+    "Last Date Read": "TEXT",
+    "Progress (%)": "REAL",
+    "Pages Read": "INTEGER",
+    "Total Pages": "INTEGER",
+}
+
 
-def ensure_books_file() -> None:
-    if PROCESSED_PATH.exists():
+def ensure_books_file(path: Path = PROCESSED_PATH) -> None:
+    if path.exists():
         return
-    PROCESSED_PATH.parent.mkdir(parents=True, exist_ok=True)
-    pd.DataFrame(columns=BOOKS_COLUMNS).to_csv(PROCESSED_PATH, index=False)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    pd.DataFrame(columns=BOOKS_COLUMNS).to_csv(path, index=False)
+
+
+def _canonical_status(values: pd.Index) -> pd.Index:
+    return values.astype(str).str.strip().str.lower()
+
+
+def _canonical_author(values: pd.Index) -> pd.Index:
+    return values.map(lambda v: v.strip() if isinstance(v, str) else v)
+
 
+# Columns held as categoricals: each distinct value is stored once, rows hold integer
+# codes, and cleanup runs over the distinct values rather than every row.
+INTERNED_COLUMNS = {"Read Status": _canonical_status, "Authors": _canonical_author}
 
-def load_data() -> pd.DataFrame:
-    ensure_books_file()
-    df = pd.read_csv(PROCESSED_PATH)
+
+def _interned(series: pd.Series, canonical: Callable[[pd.Index], pd.Index]) -> pd.Series:
+    categorical = isinstance(series.dtype, pd.CategoricalDtype)
+    if categorical:
+        codes, values = series.cat.codes.to_numpy(), series.cat.categories
+    else:
+        codes, values = pd.factorize(series)
+    missing = codes < 0
+    filled = canonical is _canonical_status and missing.any()
+    if filled:
+        # A missing status reads as "nan", as astype(str) has always made it.
+        values = values.append(pd.Index(["nan"]))
+        codes = np.where(missing, len(values) - 1, codes)
+        missing = codes < 0
+    cleaned = canonical(values)
+    if categorical and not filled and cleaned.equals(values):
+        return series
+    # Cleanup can merge values ("Read " and "read"), so number the cleaned ones afresh.
+    merged, categories = pd.factorize(cleaned)
+    codes = np.where(missing, -1, merged[np.where(missing, 0, codes)]) if len(merged) else codes
+    return pd.Series(pd.Categorical.from_codes(codes, categories), index=series.index, name=series.name)
+
+
+def _decoded(series: pd.Series) -> pd.Series:
+    """An interned column back as plain values, for frames callers edit in place."""
+    return series.astype(series.cat.categories.dtype) if isinstance(series.dtype, pd.CategoricalDtype) else series
+
+
+def _normalize_frame(df: pd.DataFrame) -> pd.DataFrame:
     for col in BOOKS_COLUMNS:
         if col not in df.columns:
             df[col] = np.nan
     df = df[BOOKS_COLUMNS]
-    df["Read Status"] = df["Read Status"].astype(str).str.strip().str.lower()
+    for col, canonical in INTERNED_COLUMNS.items():
+        df[col] = _interned(df[col], canonical)
     df["Last Date Read"] = pd.to_datetime(df["Last Date Read"], errors="coerce")
+    # Progress is fractional; an all-integer column would reject the handlers' rounded percentages.
+    df["Progress (%)"] = pd.to_numeric(df["Progress (%)"], errors="coerce").astype(float)
+    return df
+
+
+def _normalized_cell(col: str, value: Any) -> Any:
+    """One value as ``_normalize_frame`` would leave it in column ``col``."""
+    if col in INTERNED_COLUMNS:
+        if _is_missing(value):
+            return "nan" if col == "Read Status" else value
+        return INTERNED_COLUMNS[col](pd.Index([value]))[0]
+    if col == "Last Date Read":
+        return pd.to_datetime(value, errors="coerce")
+    if col == "Progress (%)":
+        value = _rating(value)
+        return np.nan if value is None else value
+    return value
+
+
+def _cell(value: Any) -> Any:
+    if value is None or (not isinstance(value, (list, dict, str)) and pd.isna(value)):
+        return None
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def _json_default(value: Any) -> Any:
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _journal_dates(entry: dict[str, Any]) -> dict[str, Any]:
+    """Turn the ISO strings ``_json_default`` wrote for dates back into Timestamps, in place."""
+    rows = [values for _, values in entry.get("update", [])] + entry.get("append", [])
+    for values in rows:
+        value = values.get("Last Date Read")
+        if isinstance(value, str):
+            values["Last Date Read"] = pd.to_datetime(value, errors="coerce")
+    return entry
+
+
+def _row_values(df: pd.DataFrame, position: int, columns: list[str]) -> dict[str, Any]:
+    return {col: _cell(df[col].iat[position]) for col in columns}
+
+
+def _records(df: pd.DataFrame, columns: list[str]) -> list[dict[str, Any]]:
+    """Rows of ``df`` as dicts of plain Python values, missing values as None."""
+    df = df.reindex(columns=columns)
+    values = [df[col].astype(object).where(df[col].notna(), None).tolist() for col in columns]
+    return [dict(zip(columns, row)) for row in zip(*values)]
+
+
+def _changed_mask(old: pd.Series, new: pd.Series) -> np.ndarray:
+    try:
+        same = (old == new) | (old.isna() & new.isna())
+        return ~same.to_numpy(dtype=bool)
+    except (TypeError, ValueError):
+        return np.ones(len(old), dtype=bool)
+
+
+def diff_frames(old: pd.DataFrame, new: pd.DataFrame, next_id: int) -> dict[str, Any] | None:
+    """
+    Describe how ``new`` differs from ``old``, keyed by row id.
+
+    Both frames are indexed by row id. Rows of ``old`` with an id at or above ``next_id``
+    were added after ``new`` was loaded and are left alone; rows of ``new`` whose id is not
+    in ``old`` are new books. Returns None when ``new`` has no usable row ids.
+    """
+    labels = new.index
+    if not labels.is_unique or not pd.api.types.is_integer_dtype(labels.dtype):
+        return None
+
+    new = new.reindex(columns=BOOKS_COLUMNS)
+    kept_mask = labels.isin(old.index) & (labels < next_id)
+    kept = labels[kept_mask]
+    old_kept = old.loc[kept].reset_index(drop=True)
+    new_kept = new[kept_mask].reset_index(drop=True)
+
+    changed: dict[int, list[str]] = {}
+    for col in BOOKS_COLUMNS:
+        for i in np.flatnonzero(_changed_mask(old_kept[col], new_kept[col])):
+            changed.setdefault(int(i), []).append(col)
+
+    deleted = old.index[(old.index < next_id) & ~old.index.isin(labels)]
+    appended = new[~kept_mask]
+    return {
+        "update": [(int(kept[i]), _row_values(new_kept, i, cols)) for i, cols in sorted(changed.items())],
+        "delete": deleted.tolist(),
+        "append": _records(appended, BOOKS_COLUMNS) if len(appended) else [],
+    }
+
+
+def append_rows(df: pd.DataFrame, rows: list[dict[str, Any]] | pd.DataFrame) -> pd.DataFrame:
+    """
+    Append ``rows`` (dicts, or a frame for bulk appends) to ``df``, keeping the library
+    version it was loaded at.
+
+    New rows get negative labels so they can never be mistaken for a stored row.
+    """
+    start = min(int(df.index.min()) if len(df) else 0, 0) - 1
+    labels = pd.RangeIndex(start, start - len(rows), -1)
+    if isinstance(rows, pd.DataFrame):
+        rows = rows.set_axis(labels)
+    else:
+        rows = pd.DataFrame(rows, index=labels)
+    out = pd.concat([df, rows])
+    out.attrs.update(df.attrs)
+    return out
+
+
+def normalize_title(title: Any) -> str:
+    """Key titles are matched on: runs of whitespace collapsed, case folded."""
+    if not isinstance(title, str):
+        title = "" if pd.isna(title) else str(title)
+    return " ".join(title.split()).casefold()
+
+
+def normalize_titles(titles: pd.Series) -> pd.Series:
+    """``normalize_title`` over a whole column."""
+    # A comprehension over plain str objects beats chained .str methods here.
+    keys = [" ".join(title.split()).casefold() for title in titles.fillna("").astype(str).tolist()]
+    return pd.Series(keys, index=titles.index, dtype=object)
+
+
+class _TitleIds:
+    """Normalized title -> row id of the first row with that title, kept up to date per change."""
+
+    def __init__(self, df: pd.DataFrame):
+        keys = normalize_titles(df["Title"]).to_numpy()
+        # Built back to front so that the first row wins when titles repeat.
+        self.ids: dict[str, Any] = dict(zip(keys[::-1], df.index[::-1]))
+        self.counts: dict[str, int] = pd.Series(keys, dtype=object).value_counts().to_dict()
+
+    def add(self, key: str, row_id: int) -> None:
+        self.counts[key] = self.counts.get(key, 0) + 1
+        if key not in self.ids or row_id < self.ids[key]:
+            self.ids[key] = row_id
+
+    def remove(self, key: str, row_id: int, df: pd.DataFrame) -> None:
+        """Forget ``row_id`` under ``key``; ``df`` is the library after the change."""
+        self.counts[key] -= 1
+        if not self.counts[key]:
+            del self.counts[key]
+        if self.ids.get(key) != row_id:
+            return
+        del self.ids[key]
+        if key in self.counts:
+            # Another row shares the title; only this rare case needs a scan.
+            matches = df.index[(normalize_titles(df["Title"]) == key).to_numpy()]
+            if len(matches):
+                self.ids[key] = matches[0]
+
+
+def _rating(value: Any) -> float | None:
+    try:
+        rating = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if rating != rating else rating
+
+
+class _AuthorRatings:
+    """
+    Rating aggregates behind recommendations, kept up to date per changed row.
+
+    Mirrors what ``normalize_rating`` and ``score_tbr_books`` compute from the whole
+    library: the spread and mean of every rating, whatever the book's shelf (rated DNF
+    books included), and per author (and over the whole read shelf) the sum and count of
+    ratings and the number of read books, whose unrated ones count at the mean.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        statuses = df["Read Status"]
+        ratings = pd.to_numeric(df["Star Rating"], errors="coerce")
+        rated = ratings.dropna()
+        # Distinct rating -> rows with it; star ratings take few values, so min/max are cheap.
+        self.values: dict[float, int] = {float(k): int(v) for k, v in rated.value_counts().items()}
+        self.total = float(rated.sum())
+        on_read = (statuses == "read").to_numpy()
+        read = pd.DataFrame({"author": df["Authors"][on_read], "rating": ratings[on_read]})
+        # [rating sum, rated books, read books]
+        self.read = [float(read["rating"].sum()), int(read["rating"].count()), len(read)]
+        grouped = read.groupby("author")["rating"].agg(["sum", "count", "size"])
+        self._version: int | None = None
+        self._scores: tuple[dict[Any, float], float] = ({}, 0.5)
+        self.authors: dict[Any, list[float]] = {
+            author: [float(total), int(rated), int(books)]
+            for author, total, rated, books in zip(grouped.index, grouped["sum"], grouped["count"], grouped["size"])
+        }
+
+    def add(self, status: Any, author: Any, rating: Any, sign: int = 1) -> None:
+        """Count one row in (``sign=1``) or out (``sign=-1``)."""
+        rating = _rating(rating)
+        if rating is not None:
+            count = self.values.get(rating, 0) + sign
+            if count:
+                self.values[rating] = count
+            else:
+                del self.values[rating]
+            self.total += sign * rating
+        if status != "read":
+            return
+        rated = 0 if rating is None else 1
+        parts = [self.read]
+        if not _is_missing(author):
+            parts.append(self.authors.setdefault(author, [0.0, 0, 0]))
+        for part in parts:
+            part[0] += sign * (rating or 0.0)
+            part[1] += sign * rated
+            part[2] += sign
+        if len(parts) > 1 and not parts[1][2]:
+            del self.authors[author]
+
+    def scores(self, version: int) -> tuple[dict[Any, float], float]:
+        """Normalized author score per read author, and the read-shelf average for the rest."""
+        if version == self._version:
+            return self._scores
+        rated = sum(self.values.values())
+        if not rated:
+            scale = None
+        else:
+            low, high, mean = min(self.values), max(self.values), self.total / rated
+            scale = (low, high, mean)
+
+        def normalized(total: float, count: int, books: int) -> float:
+            if scale is None:
+                return 0.5
+            low, high, mean = scale
+            if high == low:
+                return 1.0
+            return ((total + (books - count) * mean) / books - low) / (high - low)
+
+        authors = {author: normalized(*part) for author, part in self.authors.items()}
+        self._scores = (authors, normalized(*self.read) if self.read[2] else 0.5)
+        self._version = version
+        return self._scores
+
+
+def _is_missing(value: Any) -> bool:
+    return value is None or (isinstance(value, float) and value != value)
+
+
+class TitleIndex:
+    """
+    Rows of one frame looked up by title, ignoring case and runs of whitespace.
+
+    For frames from ``load_data`` each lookup is a probe of the index the store maintains
+    next to the library. A hit is checked against the frame itself, and once the library
+    has moved past the frame's version lookups fall back to an index built from the
+    frame's own ``Title`` column. Code that edits titles in the frame and keeps looking
+    them up records each change with ``set``. For a ``partial`` frame (loaded by title)
+    ``get`` may return a row the frame does not hold, the library's row of that title,
+    so that duplicate checks see it; ``row`` refuses to hand such a row out for editing.
+    """
+
+    def __init__(self, df: pd.DataFrame, ids: dict[str, Any] | None = None, current: Any = None, partial: bool = False):
+        self._df = df
+        self._ids = ids
+        self._current = current
+        self._partial = partial
+        self._local: dict[str, Any] | None = None
+        self._edits: dict[str, Any] = {}
+
+    def set(self, title: Any, row: Any) -> None:
+        """Record that ``title`` now names ``row`` (None once no row has it)."""
+        self._edits[normalize_title(title)] = row
+
+    def get(self, title: Any) -> Any:
+        """Label of the first row titled ``title``, or None."""
+        return self._lookup(title)[0]
+
+    def row(self, title: Any) -> Any:
+        """
+        Label of the frame's row titled ``title``, for editing it, or None. Raises
+        ``LibraryConflictError`` when the library's row of that title is one a partial
+        frame does not hold, i.e. it was added or renamed after the frame was loaded.
+        """
+        row, outside = self._lookup(title)
+        if outside:
+            raise LibraryConflictError("A book with that title was added since this frame was loaded")
+        return row
+
+    def _lookup(self, title: Any) -> tuple[Any, bool]:
+        # The label, and whether it is a library row outside a partial frame.
+        key = normalize_title(title)
+        if key in self._edits:
+            return self._edits[key], False
+        if self._ids is not None:
+            row = self._ids.get(key)
+            if row is None and self._current():
+                return None, False
+            if row is not None and row in self._df.index and normalize_title(self._df.at[row, "Title"]) == key:
+                return row, False
+            if row is not None and self._partial and row not in self._df.index:
+                return row, True
+            self._ids = None
+        if self._local is None:
+            self._local = _TitleIds(self._df).ids
+        return self._local.get(key), False
+
+    def __contains__(self, title: Any) -> bool:
+        return self.get(title) is not None
+
+    def contains(self, keys: pd.Series) -> np.ndarray:
+        """Membership of many titles already passed through ``normalize_titles``."""
+        ids = self._ids if self._ids is not None and self._current() else None
+        if ids is None:
+            if self._local is None:
+                self._local = _TitleIds(self._df).ids
+            ids = self._local
+        edits = self._edits
+        if edits:
+            return np.fromiter(
+                (edits[key] is not None if key in edits else key in ids for key in keys), dtype=bool, count=len(keys)
+            )
+        return np.fromiter((key in ids for key in keys), dtype=bool, count=len(keys))
+
+
+def _set_cell(df: pd.DataFrame, label: int, col: str, value: Any) -> None:
+    column = df[col]
+    if isinstance(column.dtype, pd.CategoricalDtype) and not _is_missing(value) and value not in column.cat.categories:
+        df[col] = column.cat.add_categories([value])
+    try:
+        df.at[label, col] = value
+    except (TypeError, ValueError):
+        # Typed columns refuse values they cannot hold (e.g. 12.5 into int64); widen and retry.
+        df[col] = df[col].astype(object)
+        df.at[label, col] = value
+
+
+def apply_entry(df: pd.DataFrame, entry: dict[str, Any], append_index: Any = None) -> pd.DataFrame:
+    """
+    Apply one change to ``df``; ``update`` and ``delete`` refer to its index labels.
+
+    Appended rows are labelled with ``append_index``. Without it the result is renumbered
+    from zero, which is how positional journal entries are replayed.
+    """
+    for label, values in entry.get("update", []):
+        for col, value in values.items():
+            _set_cell(df, label, col, value)
+    if entry.get("delete"):
+        df = df.drop(index=entry["delete"])
+    if entry.get("append"):
+        appended = pd.DataFrame(entry["append"], columns=BOOKS_COLUMNS, index=append_index, dtype=object)
+        for col in INTERNED_COLUMNS:
+            if isinstance(df[col].dtype, pd.CategoricalDtype):
+                # Same categories on both sides, so concat keeps the column interned.
+                new = pd.Index(appended[col].dropna().unique()).difference(df[col].cat.categories)
+                if len(new):
+                    df[col] = df[col].cat.add_categories(new)
+                appended[col] = pd.Categorical(appended[col], categories=df[col].cat.categories)
+        df = pd.concat([df, appended], ignore_index=append_index is None)
+    return df if append_index is not None else df.reset_index(drop=True)
+
+
+def _with_change(df: pd.DataFrame, change: dict[str, Any], append_index: Any) -> pd.DataFrame:
+    """
+    A new resident frame: ``df`` with ``change`` (by row id) applied. ``df`` is left as it is.
+
+    A change that only updates cells copies just the columns it touches and shares the
+    rest with ``df``, so it costs a few array copies rather than a rebuild. The copies are
+    made here instead of left to copy-on-write, which older pandas does not do. Deletes
+    and appends rebuild the frame.
+    """
+    if change["delete"] or change["append"]:
+        return _normalize_frame(apply_entry(df.copy(), change, append_index).infer_objects())
+    df = df.copy(deep=False)
+    copied = set()
+    for label, values in change["update"]:
+        for col, value in values.items():
+            if col not in copied:
+                # Readers of the previous version, and frames diffed against it, share its arrays.
+                df[col] = df[col].copy()
+                copied.add(col)
+            dtype = df[col].dtype
+            _set_cell(df, label, col, _normalized_cell(col, value))
+            if df[col].dtype == object and dtype != object:
+                # _set_cell widened the column (e.g. 12.5 into int64); narrow it as a rebuild would.
+                df[col] = df[col].infer_objects()
     return df
 
 
+class _JournaledBackend:
+    """
+    Snapshot file plus an append-only journal.
+
+    The file at ``path`` is the last compacted snapshot; ``<path>.journal`` holds one JSON
+    line per committed change since then, addressing rows by position. The journal's first
+    line records the identity of the snapshot it applies to, so a journal left behind by
+    an interrupted compaction is recognised as stale and ignored. Writers in different
+    processes serialize on an advisory lock on ``<path>.lock``.
+    """
+
+    # Row ids are assigned when the files are read, so they are not shared between processes.
+    stable_ids = False
+
+    def __init__(self, path: Path, compact_threshold: int = JOURNAL_COMPACT_THRESHOLD):
+        self.path = Path(path)
+        self.journal_path = self.path.with_name(self.path.name + ".journal")
+        self.lock_path = self.path.with_name(self.path.name + ".lock")
+        self.compact_threshold = compact_threshold
+        self._journal_entries = 0
+        # What this process last saw on disk: the snapshot it read, and how far into which
+        # journal file it has applied entries.
+        self._snapshot_identity: list[int] | None = None
+        self._journal_ino: int | None = None
+        self._offset = 0
+        self._lock_depth = 0
+
+    @contextmanager
+    def locked(self):
+        """Hold the cross-process write lock. Re-entrant within the owning store."""
+        if fcntl is None or self._lock_depth:
+            self._lock_depth += 1
+            try:
+                yield
+            finally:
+                self._lock_depth -= 1
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.lock_path.open("a") as handle:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+            self._lock_depth += 1
+            try:
+                yield
+            finally:
+                self._lock_depth -= 1
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def read(self) -> tuple[pd.DataFrame, int]:
+        with self.locked():
+            df = self._read_snapshot()
+            self._snapshot_identity = file_identity(self.path)
+            records = self._read_journal()
+            version = 0
+            self._journal_entries = 0
+            if not records:
+                # Record which snapshot version 0 is, so that editing it by hand is noticed.
+                self._reset_journal(version)
+            else:
+                header, entries = records[0], records[1:]
+                version = max([header["version"], *(e["v"] for e in entries)])
+                if header["snapshot"] == self._snapshot_identity:
+                    if entries:
+                        df = df.reindex(columns=BOOKS_COLUMNS).astype(object)
+                        for entry in entries:
+                            df = apply_entry(df, entry)
+                        df = df.infer_objects()
+                    self._journal_entries = len(entries)
+                else:
+                    # The snapshot was replaced after this journal was last reset: edited by
+                    # hand, or compacted by a writer that died before resetting the journal.
+                    # Either way it is a new version, so ETags and caches keyed by version
+                    # do not serve the old library for it.
+                    version += 1
+                    self._reset_journal(version)
+        return df.reset_index(drop=True), version
+
+    def poll(self, version: int) -> list[dict[str, Any]] | None:
+        """
+        Journal entries other processes committed since this one last read or wrote.
+
+        Costs two ``stat`` calls when nothing changed. Returns None when the library has to
+        be read again, e.g. because another process compacted entries this one never saw.
+        """
+        snapshot = file_identity(self.path)
+        journal = file_identity(self.journal_path)
+        if snapshot == self._snapshot_identity:
+            if journal is None or journal[0] != self._journal_ino:
+                return None if self._journal_ino is not None else self._adopt_journal(snapshot, version)
+            if journal[1] == self._offset:
+                return []
+            entries = self._read_journal(self._offset)
+            self._journal_entries += len(entries)
+            return entries
+        return self._adopt_journal(snapshot, version)
+
+    def _adopt_journal(self, snapshot: list[int] | None, version: int) -> list[dict[str, Any]] | None:
+        # A journal this process has not read yet is only usable if it starts exactly where
+        # the resident library is: same snapshot, same version.
+        records = self._read_journal()
+        if not records:
+            return [] if snapshot == self._snapshot_identity else None
+        header, entries = records[0], records[1:]
+        if header["snapshot"] != snapshot or header["version"] != version:
+            return None
+        self._snapshot_identity = snapshot
+        self._journal_entries = len(entries)
+        return entries
+
+    def write(self, df: pd.DataFrame, version: int, commits: list[dict[str, Any]], rewrite: bool) -> None:
+        with self.locked():
+            if rewrite or self._journal_entries + len(commits) >= self.compact_threshold:
+                self.compact(df, version)
+                return
+            if self._journal_ino is None:
+                self._reset_journal(commits[0]["entry"]["v"] - 1)
+            entries = [commit["entry"] for commit in commits]
+            data = "".join(json.dumps(e, separators=(",", ":"), default=_json_default) + "\n" for e in entries)
+            data = data.encode("utf-8")
+            with self.journal_path.open("r+b") as handle:
+                # Write after the last complete entry, dropping any torn tail a crash left behind.
+                handle.seek(self._offset)
+                handle.write(data)
+                handle.truncate()
+                handle.flush()
+                os.fsync(handle.fileno())
+            metrics.count_write("journal", len(data))
+            self._offset += len(data)
+            self._journal_entries += len(entries)
+
+    def compact(self, df: pd.DataFrame, version: int) -> None:
+        with self.locked():
+            tmp_path = self.path.with_name(self.path.name + ".tmp")
+            self._write_snapshot(df, tmp_path)
+            os.replace(tmp_path, self.path)
+            self._snapshot_identity = file_identity(self.path)
+            metrics.count_write("snapshot", self._snapshot_identity[1])
+            self._reset_journal(version)
+
+    def needs_compaction(self) -> bool:
+        return self._journal_entries > 0
+
+    def _read_journal(self, offset: int = 0) -> list[dict[str, Any]]:
+        """Complete journal lines from byte ``offset`` on; records where they end."""
+        try:
+            handle = self.journal_path.open("rb")
+        except FileNotFoundError:
+            self._journal_ino, self._offset = None, 0
+            return []
+        records = []
+        with handle:
+            self._journal_ino = os.fstat(handle.fileno()).st_ino
+            handle.seek(offset)
+            for line in handle:
+                if not line.endswith(b"\n"):
+                    break  # torn write from a crash, or an append still in progress
+                records.append(_journal_dates(json.loads(line)))
+                offset += len(line)
+        self._offset = offset
+        return records
+
+    def _reset_journal(self, version: int) -> None:
+        header = {"snapshot": file_identity(self.path), "version": version}
+        data = (json.dumps(header, separators=(",", ":")) + "\n").encode("utf-8")
+        tmp_path = self.journal_path.with_name(self.journal_path.name + ".tmp")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, self.journal_path)
+        self._journal_ino, self._offset = file_identity(self.journal_path)[0], len(data)
+        self._journal_entries = 0
+
+
+class CsvBackend(_JournaledBackend):
+    """Journaled library whose snapshot is ``books.csv``."""
+
+    def __init__(self, path: Path = PROCESSED_PATH, compact_threshold: int = JOURNAL_COMPACT_THRESHOLD):
+        super().__init__(path, compact_threshold)
+
+    def _read_snapshot(self) -> pd.DataFrame:
+        ensure_books_file(self.path)
+        with metrics.timed("csv_parse"):
+            # Read as text, so IDs such as ISBNs keep their leading zeros and type even when
+            # every one of them looks like a number.
+            return pd.read_csv(self.path, dtype={"ISBN/UID": str, "Title": str, "Authors": str})
+
+    def _write_snapshot(self, df: pd.DataFrame, path: Path) -> None:
+        df.to_csv(path, index=False)
+
+
+def _arrow_schema():
+    import pyarrow as pa
+
+    return pa.schema(
+        [
+            ("Title", pa.string()),
+            ("Authors", pa.string()),
+            ("ISBN/UID", pa.string()),
+            ("Read Status", pa.dictionary(pa.int32(), pa.string())),
+            ("Star Rating", pa.float64()),
+            ("Last Date Read", pa.timestamp("us")),
+            ("Progress (%)", pa.float64()),
+            ("Pages Read", pa.float64()),
+            ("Total Pages", pa.float64()),
+        ]
+    )
+
+
+def _text_column(series: pd.Series) -> pd.Series:
+    return series.astype(object).where(series.notna(), None).map(lambda v: v if v is None else str(v))
+
+
+class ArrowBackend(_JournaledBackend):
+    """
+    Journaled library whose snapshot is an uncompressed Arrow IPC file (``books.arrow``).
+
+    Columns are stored typed: timestamps for ``Last Date Read``, a dictionary-encoded
+    ``Read Status`` and floats for the numeric columns, so loading needs no text parsing.
+    The snapshot is memory-mapped, so numeric and date columns are read without copying
+    the file into memory first. Requires ``pyarrow``.
+    """
+
+    def __init__(self, path: Path = ARROW_PATH, compact_threshold: int = JOURNAL_COMPACT_THRESHOLD):
+        super().__init__(path, compact_threshold)
+
+    def _read_snapshot(self) -> pd.DataFrame:
+        import pyarrow as pa
+
+        if not self.path.exists():
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._write_snapshot(pd.DataFrame(columns=BOOKS_COLUMNS), self.path)
+        with metrics.timed("arrow_read"):
+            with pa.memory_map(str(self.path)) as source:
+                table = pa.ipc.open_file(source).read_all()
+            return table.to_pandas()
+
+    def _write_snapshot(self, df: pd.DataFrame, path: Path) -> None:
+        import pyarrow as pa
+
+        df = df.reindex(columns=BOOKS_COLUMNS)
+        typed = pd.DataFrame(
+            {
+                "Title": _text_column(df["Title"]),
+                "Authors": _text_column(df["Authors"]),
+                "ISBN/UID": _text_column(df["ISBN/UID"]),
+                "Read Status": _text_column(df["Read Status"]).astype("category"),
+                "Star Rating": pd.to_numeric(df["Star Rating"], errors="coerce").astype(float),
+                "Last Date Read": pd.to_datetime(df["Last Date Read"], errors="coerce"),
+                "Progress (%)": pd.to_numeric(df["Progress (%)"], errors="coerce").astype(float),
+                "Pages Read": pd.to_numeric(df["Pages Read"], errors="coerce").astype(float),
+                "Total Pages": pd.to_numeric(df["Total Pages"], errors="coerce").astype(float),
+            }
+        )
+        table = pa.Table.from_pandas(typed, schema=_arrow_schema(), preserve_index=False)
+        with pa.OSFile(str(path), "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+
+def _sql_value(value: Any) -> Any:
+    value = _cell(value)
+    return value.isoformat() if hasattr(value, "isoformat") else value
+
+
+class SqliteBackend:
+    """
+    Embedded SQLite database with one ``books`` table shaped like ``BOOKS_COLUMNS``.
+
+    Rows are keyed by the store's row ids, so each committed change becomes indexed
+    UPDATE/DELETE/INSERT statements instead of a file rewrite. The database runs in WAL
+    mode so readers in other processes are not blocked by a writer.
+
+    Like the CSV journal's tail, a ``changes`` table keeps the last ``changes_kept``
+    commits as JSON, addressed by row id, so other processes replay just the rows that
+    changed instead of reading the whole table again.
+    """
+
+    # Row ids are the table's primary key, so every process agrees on them.
+    stable_ids = True
+    changes_kept = JOURNAL_COMPACT_THRESHOLD
+
+    def __init__(self, path: Path = SQLITE_PATH):
+        self.path = Path(path)
+        self._conn: sqlite3.Connection | None = None
+        self._data_version: int | None = None
+        self._lock_depth = 0
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            # Access is serialized by the owning LibraryStore; transactions are opened by locked().
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            columns = ", ".join(f'"{col}" {SQLITE_COLUMN_TYPES[col]}' for col in BOOKS_COLUMNS)
+            conn.execute(f"CREATE TABLE IF NOT EXISTS books (row_id INTEGER PRIMARY KEY, {columns})")
+            conn.execute('CREATE INDEX IF NOT EXISTS books_title ON books ("Title")')
+            conn.execute('CREATE INDEX IF NOT EXISTS books_read_status ON books ("Read Status")')
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER)")
+            conn.execute("INSERT OR IGNORE INTO meta VALUES ('version', 0)")
+            conn.execute("CREATE TABLE IF NOT EXISTS changes (version INTEGER PRIMARY KEY, entry TEXT)")
+            self._conn = conn
+        return self._conn
+
+    @contextmanager
+    def locked(self):
+        """Hold SQLite's write lock (``BEGIN IMMEDIATE``); commits when the block exits."""
+        if self._lock_depth:
+            self._lock_depth += 1
+            try:
+                yield
+            finally:
+                self._lock_depth -= 1
+            return
+        self.conn.execute("BEGIN IMMEDIATE")
+        self._lock_depth += 1
+        try:
+            yield
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        else:
+            self.conn.execute("COMMIT")
+        finally:
+            self._lock_depth -= 1
+
+    def read(self) -> tuple[pd.DataFrame, int]:
+        with self.locked(), metrics.timed("sqlite_read"):
+            df = pd.read_sql_query("SELECT * FROM books ORDER BY row_id", self.conn, index_col="row_id")
+            (version,) = self.conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+            (self._data_version,) = self.conn.execute("PRAGMA data_version").fetchone()
+        df.index.name = None
+        return df, version
+
+    def poll(self, version: int) -> list[dict[str, Any]] | None:
+        """
+        Changes other connections committed since ``version``, oldest first, addressed by
+        row id. None when they are no longer all in the ``changes`` table (read again).
+        """
+        (data_version,) = self.conn.execute("PRAGMA data_version").fetchone()
+        if data_version == self._data_version:
+            return []
+        (current,) = self.conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        # Each commit writes its version and its change together, so every change up to
+        # ``current`` is there unless it was trimmed or the table was rewritten.
+        rows = self.conn.execute(
+            "SELECT entry FROM changes WHERE version > ? AND version <= ? ORDER BY version", (version, current)
+        ).fetchall()
+        if len(rows) != current - version:
+            return None
+        self._data_version = data_version
+        return [_journal_dates(json.loads(entry)) for (entry,) in rows]
+
+    def write(self, df: pd.DataFrame, version: int, commits: list[dict[str, Any]], rewrite: bool) -> None:
+        quoted = [f'"{col}"' for col in BOOKS_COLUMNS]
+        insert = f"INSERT INTO books (row_id, {', '.join(quoted)}) VALUES (?{', ?' * len(BOOKS_COLUMNS)})"
+        with self.locked():
+            if rewrite:
+                self.conn.execute("DELETE FROM books")
+                self.conn.execute("DELETE FROM changes")
+                self.conn.executemany(
+                    insert,
+                    ([int(i), *map(_sql_value, row)] for i, row in zip(df.index, df.itertuples(index=False))),
+                )
+            else:
+                for commit in commits:
+                    for row_id, values in commit["update"]:
+                        assignments = ", ".join(f'"{col}" = ?' for col in values)
+                        self.conn.execute(
+                            f"UPDATE books SET {assignments} WHERE row_id = ?",
+                            [*map(_sql_value, values.values()), row_id],
+                        )
+                    self.conn.executemany("DELETE FROM books WHERE row_id = ?", ([i] for i in commit["delete"]))
+                    self.conn.executemany(
+                        insert,
+                        ([i, *(_sql_value(row[col]) for col in BOOKS_COLUMNS)] for i, row in commit["append"]),
+                    )
+                    entry = {
+                        "v": commit["entry"]["v"],
+                        "update": [[int(i), values] for i, values in commit["update"]],
+                        "delete": [int(i) for i in commit["delete"]],
+                        "append": [row for _, row in commit["append"]],
+                        "ids": [int(i) for i, _ in commit["append"]],
+                    }
+                    self.conn.execute(
+                        "INSERT INTO changes VALUES (?, ?)",
+                        (entry["v"], json.dumps(entry, separators=(",", ":"), default=_json_default)),
+                    )
+                self.conn.execute("DELETE FROM changes WHERE version <= ?", (version - self.changes_kept,))
+            self.conn.execute("UPDATE meta SET value = ? WHERE key = 'version'", (version,))
+
+    def compact(self, df: pd.DataFrame, version: int) -> None:
+        pass
+
+    def needs_compaction(self) -> bool:
+        return False
+
+
+class LibraryConflictError(RuntimeError):
+    """A save was based on a library that has since been re-read with different row ids."""
+
+
+class _Base:
+    """
+    The resident library a frame was loaded from, carried in the frame's ``attrs``.
+
+    pandas deep-copies ``attrs`` into every frame derived from another; this copies as
+    itself, so the base follows the frame through filtering and appends for free and is
+    kept alive exactly as long as some frame built on it.
+    """
+
+    __slots__ = ("frame",)
+
+    def __init__(self, frame: pd.DataFrame):
+        self.frame = frame
+
+    def __deepcopy__(self, memo: dict) -> "_Base":
+        return self
+
+
+class _PendingSave:
+    __slots__ = ("change", "frame", "generation", "done", "error")
+
+    def __init__(self, change: dict[str, Any] | None, frame: pd.DataFrame, generation: int):
+        self.change = change
+        self.frame = frame
+        self.generation = generation
+        self.done = False
+        self.error: BaseException | None = None
+
+
+class LibraryStore:
+    """
+    Resident copy of the library on top of a persistence backend.
+
+    Saves go through a single-writer group commit. Each save is diffed by row id against
+    the version its frame was loaded from and applied to the current library, so
+    concurrent handlers editing different rows or fields do not overwrite each other. The
+    first waiting saver hands everything queued behind it to the backend in one write;
+    every saver returns only after its change is on disk.
+
+    Every load first asks the backend what other processes committed. Usually the answer
+    is "nothing" or a short journal tail that is applied in place; only when that is not
+    enough is the library read again. For backends whose row ids are assigned on read,
+    that starts a new generation, and saves of frames loaded before it raise
+    ``LibraryConflictError``.
+    """
+
+    def __init__(self, backend: CsvBackend | ArrowBackend | SqliteBackend):
+        self.backend = backend
+        self._lock = threading.RLock()
+        self._flushed = threading.Condition(self._lock)
+        self._queue: list[_PendingSave] = []
+        self._flushing = False
+        # Resident library, indexed by row id. Ids only grow, so the index stays sorted.
+        self._df: pd.DataFrame | None = None
+        self._next_id = 0
+        self._version = 0
+        self._generation = 0
+        # Built on first title lookup / recommendation, then updated with each change.
+        self._titles: _TitleIds | None = None
+        self._ratings: _AuthorRatings | None = None
+        # (version, positional change) for every version after _changes_floor.
+        self._changes: deque[tuple[int, dict[str, Any]]] = deque()
+        self._changes_rows = 0
+        self._changes_floor = 0
+        self._listeners: list[Callable[[int], None]] = []
+        self._change_listeners: list[Callable[[int, pd.DataFrame, dict[str, Any] | None], None]] = []
+
+    @property
+    def version(self) -> int:
+        with self._lock:
+            self._refresh()
+            return self._version
+
+    def load(
+        self, statuses: tuple[str, ...] | None = None, readonly: bool = False, titles: tuple[str, ...] | None = None
+    ) -> pd.DataFrame:
+        """
+        Current library, optionally limited to the given read statuses.
+
+        With ``readonly`` the frame shares its columns with the resident copy instead of
+        copying them; the caller must not modify it in place.
+
+        With ``titles`` the frame holds only the first row titled each of them (matched
+        as ``title_index`` does), found through the store's title index. Saving it diffs
+        and commits just those rows, so a single-book edit costs the same however large
+        the library is.
+        """
+        with self._lock, metrics.timed("load"):
+            self._refresh()
+            df = self._df
+            rows = None
+            if titles is not None:
+                if self._titles is None:
+                    self._titles = _TitleIds(self._df)
+                ids = self._titles.ids
+                rows = list(dict.fromkeys(ids[key] for key in map(normalize_title, titles) if key in ids))
+                df = df.loc[rows]
+            if statuses:
+                df = df[df["Read Status"].isin(statuses)]
+            df = df.copy(deep=not readonly)
+            if not readonly:
+                # Handlers write arbitrary authors and statuses into the frame.
+                for col in INTERNED_COLUMNS:
+                    df[col] = _decoded(df[col])
+            df.attrs["library_version"] = self._version
+            df.attrs["library_next_id"] = self._next_id
+            df.attrs["library_generation"] = self._generation
+            # Resident frames are never modified in place, so this is the library as loaded.
+            df.attrs["library_base"] = _Base(self._df)
+            if rows is not None:
+                df.attrs["library_rows"] = rows
+            return df
+
+    def title_index(self, df: pd.DataFrame) -> TitleIndex:
+        """Title lookups for ``df``, backed by the store's index when ``df`` came from ``load``."""
+        with self._lock:
+            if self._df is None or df.attrs.get("library_generation") != self._generation:
+                return TitleIndex(df)
+            if self._titles is None:
+                self._titles = _TitleIds(self._df)
+            version = df.attrs.get("library_version")
+            return TitleIndex(df, self._titles.ids, lambda: self._version == version, "library_rows" in df.attrs)
+
+    def changes(self, since: int) -> tuple[int, list[dict[str, Any]] | None]:
+        """
+        Current version and the changes committed after version ``since``, oldest first.
+
+        Each change addresses rows by their position in the library at the version before
+        it, like the CSV journal: ``update`` is ``[[position, {column: value}], ...]``,
+        ``delete`` a list of positions, ``append`` whole rows; values are as the library
+        holds them after the change. The list is None when ``since`` is no longer (or not
+        yet) covered by the log and the caller has to fetch the whole library again.
+        """
+        with self._lock:
+            self._refresh()
+            if since == self._version:
+                return self._version, []
+            if not self._changes_floor <= since < self._version:
+                return self._version, None
+            return self._version, [entry for version, entry in self._changes if version > since]
+
+    def add_listener(self, listener: Callable[[int], None]) -> None:
+        """
+        Call ``listener(version)`` whenever the library moves to a new version, from
+        whichever thread made the change. It is called with the store locked, so it must
+        return quickly and must not use the store. Exceptions it raises are logged and
+        otherwise ignored: the change is committed by then.
+        """
+        with self._lock:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[int], None]) -> None:
+        with self._lock:
+            self._listeners.remove(listener)
+
+    def add_change_listener(self, listener: Callable[[int, pd.DataFrame, dict[str, Any] | None], None]) -> None:
+        """
+        Call ``listener(version, library, change)`` for every committed change, so derived
+        indexes can follow the library row by row. ``library`` is the resident frame
+        after the change, indexed by row id; it is never modified in place, but must not
+        be modified either. ``change`` lists row ids: ``update`` as ``(row_id, {column:
+        value})`` pairs, ``delete`` and ``append`` as ids. It is None when the library
+        was loaded or replaced as a whole, which includes the call made here right away
+        if it already is loaded. Same threading rules as ``add_listener``.
+        """
+        with self._lock:
+            self._change_listeners.append(listener)
+            if self._df is not None:
+                _call_listener(listener, self._version, self._df, None)
+
+    def remove_change_listener(self, listener: Callable[[int, pd.DataFrame, dict[str, Any] | None], None]) -> None:
+        with self._lock:
+            self._change_listeners.remove(listener)
+
+    def author_scores(self) -> tuple[dict[Any, float], float]:
+        """
+        ``score_tbr_books``'s author preference for the current library: the normalized
+        mean rating of each author on the read shelf, and the read-shelf mean for authors
+        without one. Maintained per change instead of re-aggregated per call.
+        """
+        with self._lock:
+            self._refresh()
+            if self._ratings is None:
+                self._ratings = _AuthorRatings(self._df)
+            return self._ratings.scores(self._version)
+
+    def save(self, df: pd.DataFrame) -> None:
+        change = None
+        generation = df.attrs.get("library_generation", 0)
+        if "library_version" in df.attrs:
+            with self._lock:
+                self._refresh()
+                if generation != self._generation:
+                    raise LibraryConflictError("The library was reloaded since this frame was loaded")
+                base = df.attrs.get("library_base")
+                if base is None:
+                    # Diffing against anything but the library the frame was loaded from
+                    # would revert every change committed since.
+                    raise LibraryConflictError("The library this frame was loaded from is unknown")
+                base = base.frame
+            rows = df.attrs.get("library_rows")
+            if rows is not None:
+                # A frame loaded by title: rows it does not hold are not being deleted.
+                base = base.loc[rows]
+            change = diff_frames(base, df, df.attrs["library_next_id"])
+            if change is None and rows is not None:
+                raise ValueError("A frame loaded by title must keep its row ids to be saved")
+            if change is not None and not (change["update"] or change["delete"] or change["append"]):
+                return
+        # Without a row-id diff (e.g. a frame not obtained from load()) the frame replaces the library.
+        self._submit(_PendingSave(change, df, generation))
+
+    def compact(self) -> None:
+        """Fold any pending journal into the backend's snapshot."""
+        with self._lock:
+            while self._flushing:
+                self._flushed.wait()
+            with self.backend.locked():
+                self._catch_up()
+                if self.backend.needs_compaction():
+                    self.backend.compact(self._df, self._version)
+
+    def _submit(self, pending: _PendingSave) -> None:
+        with self._lock:
+            self._queue.append(pending)
+            while not pending.done:
+                if self._flushing:
+                    self._flushed.wait()
+                    continue
+                self._flushing = True
+                batch, self._queue = self._queue, []
+                try:
+                    self._flush(batch)
+                except BaseException as exc:
+                    for item in batch:
+                        item.error = exc
+                finally:
+                    for item in batch:
+                        item.done = True
+                    self._flushing = False
+                    self._flushed.notify_all()
+        if pending.error is not None:
+            raise pending.error
+
+    def _flush(self, batch: list[_PendingSave]) -> None:
+        """Apply ``batch`` in order and persist it. Called with the lock held; releases it for I/O."""
+        with self.backend.locked():
+            # Other processes may have committed since our last look; build on top of that.
+            self._catch_up()
+            df, next_id, version = self._df, self._next_id, self._version
+            # Each commit carries the change twice: by row id, and by position for the CSV journal.
+            commits = []
+            rewrite = False
+            committed = []
+            indexed = []
+            for pending in batch:
+                if pending.change is None:
+                    df = _normalize_frame(pending.frame.reset_index(drop=True))
+                    df.index = pd.RangeIndex(next_id, next_id + len(df))
+                    next_id += len(df)
+                    rewrite = True
+                else:
+                    if pending.generation != self._generation:
+                        pending.error = LibraryConflictError("The library was reloaded since this frame was loaded")
+                        continue
+                    change = pending.change
+                    update = [(i, values) for i, values in change["update"] if i in df.index]
+                    delete = [i for i in change["delete"] if i in df.index]
+                    if not (update or delete or change["append"]):
+                        continue
+                    append_index = pd.RangeIndex(next_id, next_id + len(change["append"]))
+                    commits.append(
+                        {
+                            "update": update,
+                            "delete": delete,
+                            "append": list(zip(append_index, change["append"])),
+                            "entry": {
+                                "v": version + 1,
+                                "update": [[int(df.index.get_loc(i)), values] for i, values in update],
+                                "delete": [int(df.index.get_loc(i)) for i in delete],
+                                "append": change["append"],
+                            },
+                        }
+                    )
+                    change = {"update": update, "delete": delete, "append": change["append"]}
+                    before = df
+                    df = _with_change(df, change, append_index)
+                    indexed.append((version + 1, before, df, change, append_index))
+                    next_id += len(append_index)
+                version += 1
+                committed.append(version)
+            if not committed:
+                return
+
+            self._lock.release()
+            try:
+                with metrics.timed("save"):
+                    self.backend.write(df, version, commits, rewrite)
+            finally:
+                self._lock.acquire()
+
+        self._df, self._next_id, self._version = df, next_id, version
+        if rewrite:
+            self._titles = None
+            self._ratings = None
+            self._reset_changes()
+            self._report_change(self._version, self._df, None, None)
+        else:
+            for item in indexed:
+                self._applied(*item)
+        self._notify()
+
+    def _refresh(self) -> None:
+        # While a flush is running it owns the backend and will leave the library current.
+        if self._df is None or not self._flushing:
+            self._catch_up()
+
+    def _catch_up(self) -> None:
+        """Apply what other processes committed since the backend was last read or written."""
+        if self._df is None:
+            self._reload()
+            return
+        entries = self.backend.poll(self._version)
+        if entries is None:
+            self._reload()
+            return
+        for entry in entries:
+            if self.backend.stable_ids:
+                # Row ids are shared between processes, so entries name them directly.
+                append_index = pd.Index(entry["ids"], dtype=np.int64)
+                change = {
+                    "update": [(row_id, values) for row_id, values in entry["update"]],
+                    "delete": entry["delete"],
+                    "append": entry["append"],
+                }
+            else:
+                # Journal entries address rows by position; map them onto our row ids.
+                labels = self._df.index
+                append_index = pd.RangeIndex(self._next_id, self._next_id + len(entry.get("append", [])))
+                change = {
+                    "update": [(labels[pos], values) for pos, values in entry.get("update", [])],
+                    "delete": [labels[pos] for pos in entry.get("delete", [])],
+                    "append": entry.get("append", []),
+                }
+            before = self._df
+            self._df = _with_change(self._df, change, append_index)
+            if len(append_index):
+                self._next_id = max(self._next_id, int(append_index[-1]) + 1)
+            self._version = entry["v"]
+            self._applied(self._version, before, self._df, change, append_index)
+        if entries:
+            self._notify()
+
+    def _reload(self) -> None:
+        df, version = self.backend.read()
+        replaced = self._df is not None
+        if replaced and not self.backend.stable_ids:
+            # Row ids were just reassigned; frames handed out earlier can no longer be diffed.
+            self._generation += 1
+        self._df = _normalize_frame(df)
+        self._version = version
+        self._next_id = int(df.index.max()) + 1 if len(df) else 0
+        self._titles = None
+        self._ratings = None
+        self._reset_changes()
+        self._report_change(self._version, self._df, None, None)
+        if replaced:
+            self._notify()
+        else:
+            metrics.set_library_rows(len(self._df))
+
+    def _notify(self) -> None:
+        metrics.set_library_rows(len(self._df))
+        for listener in self._listeners:
+            _call_listener(listener, self._version)
+
+    def _applied(
+        self, version: int, before: pd.DataFrame, after: pd.DataFrame, change: dict[str, Any], append_index: Any
+    ) -> None:
+        """Bring the indexes, change log and change listeners up to date with one committed change."""
+        self._index_titles(before, after, change, append_index)
+        self._index_ratings(before, after, change, append_index)
+        self._log_change(version, before, after, change, append_index)
+        self._report_change(version, after, change, append_index)
+
+    def _report_change(
+        self, version: int, library: pd.DataFrame, change: dict[str, Any] | None, append_index: Any
+    ) -> None:
+        if not self._change_listeners:
+            return
+        if change is not None:
+            change = {"update": change["update"], "delete": change["delete"], "append": list(append_index)}
+        for listener in self._change_listeners:
+            _call_listener(listener, version, library, change)
+
+    def _reset_changes(self) -> None:
+        self._changes.clear()
+        self._changes_rows = 0
+        self._changes_floor = self._version
+
+    def _log_change(
+        self, version: int, before: pd.DataFrame, after: pd.DataFrame, change: dict[str, Any], append_index: Any
+    ) -> None:
+        rows = len(change["update"]) + len(change["delete"]) + len(append_index)
+        if rows > CHANGE_LOG_ROWS:
+            self._reset_changes()
+            return
+        after_positions = after.index.get_indexer([row_id for row_id, _ in change["update"]])
+        entry = {
+            "v": version,
+            "update": [
+                [int(before.index.get_loc(row_id)), _row_values(after, int(position), list(values))]
+                for (row_id, values), position in zip(change["update"], after_positions)
+            ],
+            "delete": [int(before.index.get_loc(row_id)) for row_id in change["delete"]],
+            "append": _records(after.loc[append_index], BOOKS_COLUMNS) if len(append_index) else [],
+        }
+        self._changes.append((version, entry))
+        self._changes_rows += rows
+        while len(self._changes) > CHANGE_LOG_VERSIONS or self._changes_rows > CHANGE_LOG_ROWS:
+            dropped, entry = self._changes.popleft()
+            self._changes_rows -= len(entry["update"]) + len(entry["delete"]) + len(entry["append"])
+            self._changes_floor = dropped
+
+    def _index_titles(self, before: pd.DataFrame, after: pd.DataFrame, change: dict[str, Any], append_index: Any) -> None:
+        titles = self._titles
+        if titles is None:
+            return
+        for row_id, values in change["update"]:
+            if "Title" in values:
+                titles.remove(normalize_title(before.at[row_id, "Title"]), row_id, after)
+                titles.add(normalize_title(values["Title"]), row_id)
+        for row_id in change["delete"]:
+            titles.remove(normalize_title(before.at[row_id, "Title"]), row_id, after)
+        if change["append"]:
+            keys = normalize_titles(pd.Series([row.get("Title") for row in change["append"]], dtype=object))
+            for row_id, key in zip(append_index, keys):
+                titles.add(key, row_id)
+
+    def _index_ratings(self, before: pd.DataFrame, after: pd.DataFrame, change: dict[str, Any], append_index: Any) -> None:
+        ratings = self._ratings
+        if ratings is None:
+            return
+        columns = ["Read Status", "Authors", "Star Rating"]
+        for row_id, values in change["update"]:
+            if not values.keys().isdisjoint(columns):
+                ratings.add(*(before.at[row_id, col] for col in columns), sign=-1)
+                ratings.add(*(after.at[row_id, col] for col in columns))
+        for row_id in change["delete"]:
+            ratings.add(*(before.at[row_id, col] for col in columns), sign=-1)
+        if len(append_index):
+            for row in zip(*(after.loc[append_index, col].tolist() for col in columns)):
+                ratings.add(*row)
+
+
+def _call_listener(listener: Callable[..., None], *args: Any) -> None:
+    # A failing listener must not fail the save that triggered it, nor stop the others.
+    try:
+        listener(*args)
+    except Exception:
+        logger.exception("Library listener %r failed", listener)
+
+
+def _migrate_csv(csv_path: Path, target: CsvBackend | ArrowBackend | SqliteBackend) -> int:
+    df, version = CsvBackend(csv_path).read()
+    df = _normalize_frame(df)
+    with target.locked():
+        target.write(df, version, [], rewrite=True)
+    return len(df)
+
+
+def migrate_csv_to_sqlite(csv_path: Path = PROCESSED_PATH, sqlite_path: Path = SQLITE_PATH) -> int:
+    """
+    One-shot copy of the CSV library (snapshot plus journal) into a SQLite database.
+
+    Returns the number of rows written. Refuses to overwrite a database that already has books.
+    """
+    target = SqliteBackend(sqlite_path)
+    (existing,) = target.conn.execute("SELECT COUNT(*) FROM books").fetchone()
+    if existing:
+        raise ValueError(f"{sqlite_path} already contains {existing} books")
+    return _migrate_csv(csv_path, target)
+
+
+def migrate_csv_to_arrow(csv_path: Path = PROCESSED_PATH, arrow_path: Path = ARROW_PATH) -> int:
+    """
+    One-shot copy of the CSV library (snapshot plus journal) into an Arrow snapshot.
+
+    Returns the number of rows written. Refuses to overwrite an existing snapshot.
+    """
+    if Path(arrow_path).exists():
+        raise ValueError(f"{arrow_path} already exists")
+    return _migrate_csv(csv_path, ArrowBackend(arrow_path))
+
+
+def export_csv(path: Path) -> None:
+    """Write the current library to ``path`` as CSV, whatever the storage backend."""
+    _store.load(readonly=True).to_csv(path, index=False)
+
+
+def open_store() -> LibraryStore:
+    """Build the store selected by ``LIBRORANK_STORAGE`` (``csv``, ``arrow`` or ``sqlite``)."""
+    kind, path = storage_location()
+    backend = {"csv": CsvBackend, "arrow": ArrowBackend, "sqlite": SqliteBackend}[kind]
+    return LibraryStore(backend(path))
+
+
+_store = open_store()
+_cached_books_version: int | None = None
+_cached_books_at: float | None = None
+
+
+def load_data(
+    statuses: tuple[str, ...] | None = None, readonly: bool = False, titles: tuple[str, ...] | None = None
+) -> pd.DataFrame:
+    return _store.load(statuses, readonly=readonly, titles=titles)
+
+
+def title_index(df: pd.DataFrame) -> TitleIndex:
+    return _store.title_index(df)
+
+
+def author_scores() -> tuple[dict[Any, float], float]:
+    return _store.author_scores()
+
+
+def library_changes(since: int) -> tuple[int, list[dict[str, Any]] | None]:
+    return _store.changes(since)
+
+
+def add_library_listener(listener: Callable[[int], None]) -> None:
+    _store.add_listener(listener)
+
+
+def remove_library_listener(listener: Callable[[int], None]) -> None:
+    _store.remove_listener(listener)
+
+
+def add_library_change_listener(listener: Callable[[int, pd.DataFrame, dict[str, Any] | None], None]) -> None:
+    _store.add_change_listener(listener)
+
+
+def remove_library_change_listener(listener: Callable[[int, pd.DataFrame, dict[str, Any] | None], None]) -> None:
+    _store.remove_change_listener(listener)
+
+
+def library_version() -> int:
+    """Version of the current library; bumped by every committed change. Does not load rows."""
+    return _store.version
+
+
+def cache_books_response(version: int, body: bytes) -> None:
+    """
+    Keep the unfiltered ``GET /books`` body on disk for cold processes (see ``server``).
+
+    Written by the first such response of a process, then at most once per
+    ``BOOKS_CACHE_INTERVAL`` seconds, so a run of edits does not rewrite a file the size
+    of the library after each one.
+    """
+    global _cached_books_version, _cached_books_at
+    now = time.monotonic()
+    if version == _cached_books_version or (
+        _cached_books_at is not None and now - _cached_books_at < BOOKS_CACHE_INTERVAL
+    ):
+        return
+    backend = _store.backend
+    write_books_cache("sqlite" if isinstance(backend, SqliteBackend) else "journal", backend.path, version, body)
+    _cached_books_version, _cached_books_at = version, now
+
+
 def save_data(df: pd.DataFrame) -> None:
-    ensure_books_file()
-    df.to_csv(PROCESSED_PATH, index=False)
+    _store.save(df)
+
+
+def compact_data() -> None:
+    _store.compact()
@@ -1,6 +1,7 @@
 import pandas as pd
 
-from book_data import load_data, save_data
+from book_data import append_rows, load_data, save_data
+from preprocess.book_ids import book_ids
 
 
 def mark_finished(title):
@@ -36,13 +37,13 @@ def add_to_tbr():
     new_row = {
         "Title": new_title,
         "Authors": new_author,
-        "ISBN/UID": str(pd.Timestamp.now().timestamp()),
+        "ISBN/UID": book_ids([new_title], [new_author])[0],
         "Read Status": "to-read",
         "Star Rating": None,
         "Last Date Read": None
     }
 
-    df = pd.concat([df, pd.DataFrame([new_row])], ignore_index=True)
+    df = append_rows(df, [new_row])
 
     save_data(df)
 
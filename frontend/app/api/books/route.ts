@@ -3,18 +3,33 @@ import { NextRequest, NextResponse } from "next/server";
 import { backendBaseUrl } from "../../../lib/backendUrl";
 import { upstreamUnreachableResponse } from "../../../lib/upstreamError";
 
-export async function GET() {
+export async function GET(req: NextRequest) {
   try {
-    const upstream = await fetch(`${backendBaseUrl()}/books`, {
+    // Forward shelf / fields / sort / limit / cursor unchanged, plus the browser's validator.
+    const headers: Record<string, string> = {};
+    const ifNoneMatch = req.headers.get("if-none-match");
+    if (ifNoneMatch) headers["If-None-Match"] = ifNoneMatch;
+
+    const upstream = await fetch(`${backendBaseUrl()}/books${req.nextUrl.search}`, {
       method: "GET",
+      headers,
       cache: "no-store"
     });
 
+    const validators: Record<string, string> = {};
+    for (const name of ["etag", "cache-control"]) {
+      const value = upstream.headers.get(name);
+      if (value) validators[name] = value;
+    }
+    if (upstream.status === 304) {
+      return new NextResponse(null, { status: 304, headers: validators });
+    }
+
     const text = await upstream.text();
     const contentType = upstream.headers.get("content-type") ?? "application/json";
     return new NextResponse(text, {
       status: upstream.status,
-      headers: { "content-type": contentType }
+      headers: { "content-type": contentType, ...validators }
     });
   } catch {
     return upstreamUnreachableResponse();
@@ -0,0 +1,35 @@
+import { NextRequest } from "next/server";
+
+import { backendBaseUrl } from "../../../../lib/backendUrl";
+import { upstreamUnreachableResponse } from "../../../../lib/upstreamError";
+
+// Never prerender or cache; every request is a long-lived event stream.
+export const dynamic = "force-dynamic";
+
+export async function GET(req: NextRequest) {
+  try {
+    const headers: Record<string, string> = { Accept: "text/event-stream" };
+    const lastEventId = req.headers.get("last-event-id");
+    if (lastEventId) headers["Last-Event-ID"] = lastEventId;
+
+    const upstream = await fetch(`${backendBaseUrl()}/books/stream${req.nextUrl.search}`, {
+      method: "GET",
+      headers,
+      cache: "no-store",
+      // Close the backend stream when the browser goes away.
+      signal: req.signal
+    });
+
+    // Hand the body through as it arrives instead of reading it to the end.
+    return new Response(upstream.body, {
+      status: upstream.status,
+      headers: {
+        "content-type": upstream.headers.get("content-type") ?? "text/event-stream",
+        "cache-control": "no-cache, no-transform",
+        "x-accel-buffering": "no"
+      }
+    });
+  } catch {
+    return upstreamUnreachableResponse();
+  }
+}
@@ -1,11 +1,12 @@
-import { NextResponse } from "next/server";
+import { NextRequest, NextResponse } from "next/server";
 
 import { backendBaseUrl } from "../../../lib/backendUrl";
 import { upstreamUnreachableResponse } from "../../../lib/upstreamError";
 
-export async function GET() {
+export async function GET(req: NextRequest) {
   try {
-    const upstream = await fetch(`${backendBaseUrl()}/recommend`, {
+    // Forward k unchanged.
+    const upstream = await fetch(`${backendBaseUrl()}/recommend${req.nextUrl.search}`, {
       method: "GET",
       cache: "no-store"
     });
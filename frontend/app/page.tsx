@@ -1,7 +1,7 @@
 "use client";
 
 import Papa from "papaparse";
-import { ChangeEvent, DragEvent, useCallback, useEffect, useMemo, useState } from "react";
+import { ChangeEvent, DragEvent, useCallback, useEffect, useMemo, useRef, useState } from "react";
 
 type ApiBook = {
   Title?: string | null;
@@ -19,6 +19,19 @@ type BackendBook = {
   "Pages Read"?: number | null;
 };
 
+type LibraryChange = {
+  v: number;
+  update: [number, BackendBook][];
+  delete: number[];
+  append: BackendBook[];
+};
+
+type LibraryChanges = {
+  version: number;
+  resync: boolean;
+  changes?: LibraryChange[];
+};
+
 type TabId = "library" | "import" | "discover";
 type ShelfKind = "want" | "reading" | "read" | "dnf";
 
@@ -48,6 +61,28 @@ function shelfLabel(book: BackendBook): ShelfKind {
   return "want";
 }
 
+/** Replay `GET /books/changes` onto the unsorted list from `GET /books`. */
+function applyChanges(books: BackendBook[], changes: LibraryChange[]): BackendBook[] {
+  let list = books;
+  for (const change of changes) {
+    list = list.slice();
+    for (const [index, values] of change.update) {
+      list[index] = { ...list[index], ...values };
+    }
+    if (change.delete.length > 0) {
+      const gone = new Set(change.delete);
+      list = list.filter((_, index) => !gone.has(index));
+    }
+    list.push(...change.append);
+  }
+  return list;
+}
+
+function etagVersion(etag: string | null): number | null {
+  const match = /^(?:W\/)?"(\d+)"$/.exec(etag ?? "");
+  return match ? Number(match[1]) : null;
+}
+
 async function patchBook(body: Record<string, unknown>): Promise<Response> {
   return fetch("/api/books", {
     method: "PATCH",
@@ -92,12 +127,15 @@ export default function HomePage() {
   const [importMsg, setImportMsg] = useState<string>("");
   const [importing, setImporting] = useState<boolean>(false);
   const [csvDrag, setCsvDrag] = useState<boolean>(false);
+  // Library version the shelves show, for fetching only what changed after an edit.
+  const libraryVersion = useRef<number | null>(null);
 
   const loadLibrary = useCallback(async () => {
     setLibraryError("");
     setLibraryLoading(true);
     try {
-      const response = await fetch("/api/books", { cache: "no-store" });
+      // Revalidate with the ETag instead of refetching an unchanged library.
+      const response = await fetch("/api/books", { cache: "no-cache" });
       if (!response.ok) {
         let message =
           response.status === 502
@@ -119,6 +157,7 @@ export default function HomePage() {
       }
       const data = (await response.json()) as BackendBook[];
       const list = Array.isArray(data) ? data : [];
+      libraryVersion.current = etagVersion(response.headers.get("etag"));
       setLibrary(list);
       if (list.length === 0) {
         setRecommendation(null);
@@ -131,10 +170,62 @@ export default function HomePage() {
     }
   }, []);
 
+  // Edits made here arrive both from the stream and from refreshLibrary; apply each version once.
+  // Returns false when changes are missing in between and the caller has to catch up first.
+  const applyLibraryChanges = useCallback((changes: LibraryChange[]): boolean => {
+    const since = libraryVersion.current;
+    if (since === null) return false;
+    const fresh = changes.filter((change) => change.v > since);
+    if (fresh.length === 0) return true;
+    if (fresh[0].v !== since + 1) return false;
+    libraryVersion.current = fresh[fresh.length - 1].v;
+    setLibrary((books) => applyChanges(books, fresh));
+    return true;
+  }, []);
+
+  const refreshLibrary = useCallback(async () => {
+    const since = libraryVersion.current;
+    if (since === null) {
+      await loadLibrary();
+      return;
+    }
+    try {
+      const response = await fetch(`/api/books/changes?since=${since}`, { cache: "no-store" });
+      const data = response.ok ? ((await response.json()) as LibraryChanges) : null;
+      if (!data || data.resync || !data.changes) {
+        await loadLibrary();
+        return;
+      }
+      if (!applyLibraryChanges(data.changes)) {
+        await loadLibrary();
+      }
+    } catch {
+      await loadLibrary();
+    }
+  }, [applyLibraryChanges, loadLibrary]);
+
   useEffect(() => {
     void loadLibrary();
   }, [loadLibrary]);
 
+  // Other tabs and devices editing the same library push their changes here.
+  useEffect(() => {
+    const source = new EventSource("/api/books/stream");
+    source.addEventListener("ready", (event) => {
+      const { version } = JSON.parse((event as MessageEvent<string>).data) as { version: number };
+      if (libraryVersion.current !== null && libraryVersion.current !== version) {
+        void refreshLibrary();
+      }
+    });
+    source.addEventListener("change", (event) => {
+      if (!applyLibraryChanges([JSON.parse((event as MessageEvent<string>).data) as LibraryChange])) {
+        void refreshLibrary();
+      }
+    });
+    source.addEventListener("resync", () => void loadLibrary());
+    return () => source.close();
+  }, [applyLibraryChanges, loadLibrary, refreshLibrary]);
+
   const shelves = useMemo(() => {
     const want: BackendBook[] = [];
     const reading: BackendBook[] = [];
@@ -229,7 +320,7 @@ export default function HomePage() {
         return;
       }
       setEditBook(null);
-      await loadLibrary();
+      await refreshLibrary();
     } catch {
       setEditError("Save failed.");
     } finally {
@@ -265,7 +356,7 @@ export default function HomePage() {
         setLibraryError((await res.text()).slice(0, 120));
         return;
       }
-      await loadLibrary();
+      await refreshLibrary();
     } finally {
       setActionBusy(null);
     }
@@ -308,7 +399,7 @@ export default function HomePage() {
       setBookAuthor("");
       setBookPages("");
       setAddMessage("Added to Want to Read.");
-      await loadLibrary();
+      await refreshLibrary();
     } catch {
       setAddMessage("Couldn't add book.");
     } finally {
@@ -335,7 +426,7 @@ export default function HomePage() {
         return;
       }
       setRecommendation((prev) => (prev?.Title === title ? null : prev));
-      await loadLibrary();
+      await refreshLibrary();
     } catch {
       setLibraryError("Couldn't remove book.");
     } finally {
@@ -443,7 +534,7 @@ export default function HomePage() {
       setImportMsg(`Imported ${j.imported ?? 0}, skipped ${j.skipped ?? 0} (duplicates or empty).`);
       setCsvRows([]);
       setCsvName("");
-      await loadLibrary();
+      await refreshLibrary();
     } catch {
       setImportMsg("Import failed.");
     } finally {
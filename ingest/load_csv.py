@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterator
 
 import pandas as pd
 
@@ -113,15 +113,39 @@ def _validate_dataframe(df: pd.DataFrame, config: dict[str, Any]) -> dict[str, l
     return report
 
 
-def load_csv(csv: str | Path, mapping_config: dict[str, Any] | None = None) -> tuple[pd.DataFrame, dict[str, list[str]]]:
+def load_csv(
+    csv: str | Path,
+    mapping_config: dict[str, Any] | None = None,
+    nrows: int | None = None,
+) -> tuple[pd.DataFrame, dict[str, list[str]]]:
     """
     Load arbitrary CSV data and map it into LibroRank canonical fields.
 
     Returns (standardized_dataframe, validation_report).
     """
     config = _merge_mapping_config(mapping_config)
-    raw_df = pd.read_csv(csv)
+    mapped_df = _map_frame(pd.read_csv(csv, nrows=nrows), config)
+    validation_report = _validate_dataframe(mapped_df, config)
+
+    return mapped_df, validation_report
+
+
+def iter_csv_chunks(
+    csv: str | Path,
+    mapping_config: dict[str, Any] | None = None,
+    chunksize: int = 100_000,
+) -> Iterator[pd.DataFrame]:
+    """
+    Like ``load_csv`` without the report, ``chunksize`` rows at a time, so only one chunk
+    of the file is in memory at once.
+    """
+    config = _merge_mapping_config(mapping_config)
+    with pd.read_csv(csv, chunksize=chunksize) as reader:
+        for raw_df in reader:
+            yield _map_frame(raw_df, config)
+
 
+def _map_frame(raw_df: pd.DataFrame, config: dict[str, Any]) -> pd.DataFrame:
     mapped_df = pd.DataFrame()
     reverse_mappings = config["column_mappings"]
 
@@ -173,6 +197,4 @@ def load_csv(csv: str | Path, mapping_config: dict[str, Any] | None = None) -> t
             .fillna("to-read")
         )
 
-    validation_report = _validate_dataframe(mapped_df, config)
-
-    return mapped_df, validation_report
\ No newline at end of file
+    return mapped_df
\ No newline at end of file
@@ -5,15 +5,25 @@ from typing import Any
 
 import pandas as pd
 
-from ingest.load_csv import load_csv
+from ingest.load_csv import iter_csv_chunks, load_csv
 from preprocess.clean_books import clean_books
-from preprocess.normalize import compute_recency, normalize_rating
-from ranking.score import score_read_books, score_tbr_books
+from preprocess.normalize import add_features
+from ranking.score import TopK, score_read_books, score_tbr_books
+from ranking.similarity import LIKED_RATING, ContentIndex
 
+PREVIEW_ROWS = 100
 
-def validate_uploaded_csv(csv_path: str | Path, mapping_config: dict[str, Any] | None = None) -> dict[str, Any]:
+
+def validate_uploaded_csv(
+    csv_path: str | Path,
+    mapping_config: dict[str, Any] | None = None,
+    preview_only: bool = False,
+) -> dict[str, Any]:
     """
     Lightweight validation gate before expensive processing.
+
+    With ``preview_only`` the schema checks look at the first 100 rows only, instead of
+    loading the whole file.
     """
     path = Path(csv_path)
     report: dict[str, Any] = {
@@ -32,7 +42,7 @@ def validate_uploaded_csv(csv_path: str | Path, mapping_config: dict[str, Any] |
         report["warnings"].append("File extension is not .csv; attempting CSV parse anyway.")
 
     try:
-        preview_df = pd.read_csv(path, nrows=100)
+        preview_df = pd.read_csv(path, nrows=PREVIEW_ROWS)
     except Exception as exc:
         report["status"] = "reject"
         report["errors"].append(f"Failed to parse CSV: {exc}")
@@ -45,7 +55,7 @@ def validate_uploaded_csv(csv_path: str | Path, mapping_config: dict[str, Any] |
         report["errors"].append("CSV contains no data rows.")
         return report
 
-    _, schema_report = load_csv(path, mapping_config=mapping_config)
+    _, schema_report = load_csv(path, mapping_config=mapping_config, nrows=PREVIEW_ROWS if preview_only else None)
     report["errors"].extend(schema_report["errors"])
     report["warnings"].extend(schema_report["warnings"])
 
@@ -72,15 +82,16 @@ def run_flexible_pipeline(
 
     standardized_df, mapping_report = load_csv(csv_path, mapping_config=mapping_config)
     standardized_df = clean_books(standardized_df)
-    standardized_df = normalize_rating(standardized_df)
-    standardized_df = compute_recency(standardized_df)
+    standardized_df = add_features(standardized_df, rating_weight=rating_weight, recency_weight=recency_weight)
 
     read_ranked = score_read_books(
         standardized_df,
         rating_weight=rating_weight,
         recency_weight=recency_weight,
     )
-    tbr_ranked = score_tbr_books(standardized_df)
+    liked = (standardized_df["read_status"] == "read") & (standardized_df["rating"] >= LIKED_RATING)
+    content = ContentIndex.from_frame(standardized_df, "title", "author", "genre", liked=liked)
+    tbr_ranked = score_tbr_books(standardized_df, content_scores=content.scores())
 
     merged_warnings = [*validation_report["warnings"], *mapping_report["warnings"]]
     merged_errors = [*validation_report["errors"], *mapping_report["errors"]]
@@ -94,3 +105,118 @@ def run_flexible_pipeline(
         "read_ranked": read_ranked,
         "tbr_ranked": tbr_ranked,
     }
+
+
+def run_streaming_pipeline(
+    csv_path: str | Path,
+    mapping_config: dict[str, Any] | None = None,
+    k: int = 10,
+    chunksize: int = 100_000,
+    rating_weight: float = 0.7,
+    recency_weight: float = 0.3,
+    diverse_authors: bool = True,
+) -> dict[str, Any]:
+    """
+    ``run_flexible_pipeline`` for catalogs too large to load at once: the top ``k`` read
+    and to-read books, reading the CSV twice in chunks of ``chunksize`` rows.
+
+    The first pass collects what the in-memory pipeline derives from the whole frame:
+    the mean and range of ratings, the range of days since read, and per-author rating
+    sums on the read shelf. The second cleans, normalizes and scores each chunk against
+    those and keeps the best rows in a bounded heap. Memory holds one chunk, the top
+    ``k`` and one small record per author, however long the file is.
+
+    Rankings match ``run_flexible_pipeline`` except that content similarity is left out
+    (it needs an index over the whole catalog) and repeated to-read books are told
+    apart within the top ``k`` rather than across the file.
+    """
+    validation_report = validate_uploaded_csv(csv_path, mapping_config=mapping_config, preview_only=True)
+    if validation_report["status"] == "reject":
+        return {"validation": validation_report, "read_ranked": pd.DataFrame(), "tbr_ranked": pd.DataFrame()}
+
+    today = pd.Timestamp.today().normalize()
+    stats = _catalog_stats(iter_csv_chunks(csv_path, mapping_config, chunksize), today)
+    author_scores, global_score = _author_scores(stats)
+
+    read_top, tbr_top = TopK(k), TopK(k)
+    for chunk in iter_csv_chunks(csv_path, mapping_config, chunksize):
+        chunk = clean_books(chunk, rating_fill=stats["rating_fill"], today=today)
+        chunk = add_features(
+            chunk,
+            rating_weight=rating_weight,
+            recency_weight=recency_weight,
+            rating_range=stats["rating_range"],
+            days_range=stats["days_range"],
+            today=today,
+        )
+
+        read_ranked = score_read_books(chunk, rating_weight=rating_weight, recency_weight=recency_weight)
+        read_top.offer(read_ranked.head(k))
+        tbr_ranked = score_tbr_books(
+            chunk, diverse_authors=diverse_authors, author_scores=author_scores, global_score=global_score, k=k
+        )
+        keys = tbr_ranked["author"] if diverse_authors else zip(tbr_ranked["title"], tbr_ranked["author"])
+        tbr_top.offer(tbr_ranked, keys=list(keys))
+
+    return {
+        "validation": validation_report,
+        "read_ranked": read_top.result(),
+        "tbr_ranked": tbr_top.result(),
+    }
+
+
+def _catalog_stats(chunks, today: pd.Timestamp) -> dict[str, Any]:
+    rating_sum, rated, low, high = 0.0, 0, None, None
+    days_low, days_high = None, None
+    # author -> [rating sum, rated books, read books], and the same over the read shelf.
+    authors: dict[Any, list[float]] = {}
+    read = [0.0, 0, 0]
+    for chunk in chunks:
+        ratings = pd.to_numeric(chunk["rating"], errors="coerce")
+        if ratings.notna().any():
+            rating_sum += float(ratings.sum())
+            rated += int(ratings.count())
+            low = min(low, ratings.min()) if low is not None else ratings.min()
+            high = max(high, ratings.max()) if high is not None else ratings.max()
+
+        days = (today - pd.to_datetime(chunk["last_date_read"], errors="coerce").fillna(today)).dt.days
+        if len(days):
+            days_low = min(days_low, days.min()) if days_low is not None else days.min()
+            days_high = max(days_high, days.max()) if days_high is not None else days.max()
+
+        on_read = (chunk["read_status"].astype(str).str.strip().str.lower() == "read").to_numpy()
+        read_ratings = ratings[on_read]
+        read[0] += float(read_ratings.sum())
+        read[1] += int(read_ratings.count())
+        read[2] += int(on_read.sum())
+        grouped = read_ratings.groupby(chunk["author"][on_read]).agg(["sum", "count", "size"])
+        for author, total, count, books in zip(grouped.index, grouped["sum"], grouped["count"], grouped["size"]):
+            part = authors.setdefault(author, [0.0, 0, 0])
+            part[0] += float(total)
+            part[1] += int(count)
+            part[2] += int(books)
+
+    # clean_books fills missing ratings with the mean, or 3.0 when there are none.
+    rating_fill = rating_sum / rated if rated else 3.0
+    return {
+        "rating_fill": rating_fill,
+        "rating_range": (low, high) if rated else (rating_fill, rating_fill),
+        "days_range": (days_low, days_high) if days_low is not None else None,
+        "authors": authors,
+        "read": read,
+    }
+
+
+def _author_scores(stats: dict[str, Any]) -> tuple[dict[Any, float], float]:
+    # Mean normalized rating of each author's read books (unrated ones count at the
+    # fill value), as score_tbr_books would group it from the whole frame.
+    fill = stats["rating_fill"]
+    low, high = stats["rating_range"]
+
+    def normalized(total: float, count: int, books: int) -> float:
+        if high == low:
+            return 1.0
+        return ((total + (books - count) * fill) / books - low) / (high - low)
+
+    authors = {author: normalized(*part) for author, part in stats["authors"].items()}
+    return authors, normalized(*stats["read"]) if stats["read"][2] else 0.5
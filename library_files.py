@@ -0,0 +1,114 @@
+"""
+Where the library lives on disk, and what can be learned about it without pandas.
+
+``book_data`` owns reading and writing the library. This module only knows the file
+locations, how to tell the current library version from the journal (or SQLite's meta
+table), and the cached ``GET /books`` response that lets ``server`` answer the first
+requests of a cold process before pandas has been imported. It uses the standard
+library only; keep it that way.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent
+PROCESSED_PATH = BASE_DIR / "data" / "processed" / "books.csv"
+SQLITE_PATH = BASE_DIR / "data" / "processed" / "books.sqlite3"
+ARROW_PATH = BASE_DIR / "data" / "processed" / "books.arrow"
+
+
+def storage_location() -> tuple[str, Path]:
+    """Backend kind selected by ``LIBRORANK_STORAGE`` and the path of its main file."""
+    kind = os.environ.get("LIBRORANK_STORAGE", "csv").strip().lower()
+    if kind == "csv":
+        return kind, Path(os.environ.get("LIBRORANK_CSV_PATH", PROCESSED_PATH))
+    if kind == "arrow":
+        return kind, Path(os.environ.get("LIBRORANK_ARROW_PATH", ARROW_PATH))
+    if kind == "sqlite":
+        return kind, Path(os.environ.get("LIBRORANK_SQLITE_PATH", SQLITE_PATH))
+    raise ValueError(f"Unknown LIBRORANK_STORAGE backend: {kind!r}")
+
+
+def file_identity(path: Path) -> list[int] | None:
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return None
+    return [st.st_ino, st.st_size, st.st_mtime_ns]
+
+
+def _journal_version(path: Path) -> int | None:
+    journal_path = path.with_name(path.name + ".journal")
+    version = None
+    try:
+        with journal_path.open("rb") as handle:
+            header = None
+            for line in handle:
+                if not line.endswith(b"\n"):
+                    break
+                record = json.loads(line)
+                header = header or record
+                version = max(version or 0, record.get("version", record.get("v", 0)))
+    except FileNotFoundError:
+        return 0
+    if header is not None and header.get("snapshot") != file_identity(path):
+        # The store reads a snapshot its journal does not describe as the next version.
+        return (version or 0) + 1
+    return version or 0
+
+
+def disk_version(kind: str, path: Path) -> int | None:
+    """
+    Library version as ``LibraryStore`` would report it after reading the files now, or
+    None when there is no library yet.
+    """
+    if not path.exists():
+        return None
+    if kind == "sqlite":
+        try:
+            conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+            try:
+                row = conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            return None
+        return row[0] if row else None
+    return _journal_version(path)
+
+
+def books_cache_path(path: Path) -> Path:
+    return path.with_name(path.name + ".books.json")
+
+
+def read_books_cache(kind: str, path: Path) -> tuple[int, bytes] | None:
+    """
+    The cached unfiltered ``GET /books`` body and its version, if it still describes the
+    library on disk.
+    """
+    try:
+        with books_cache_path(path).open("rb") as handle:
+            header = json.loads(handle.readline())
+            body = handle.read()
+    except (FileNotFoundError, ValueError):
+        return None
+    if kind != "sqlite" and header.get("snapshot") != file_identity(path):
+        return None
+    if header.get("version") != disk_version(kind, path):
+        return None
+    return header["version"], body
+
+
+def write_books_cache(kind: str, path: Path, version: int, body: bytes) -> None:
+    """Keep ``body`` as the unfiltered ``GET /books`` response for ``version``."""
+    header = {"version": version, "snapshot": None if kind == "sqlite" else file_identity(path)}
+    target = books_cache_path(path)
+    tmp_path = target.with_name(f"{target.name}.{os.getpid()}.tmp")
+    with tmp_path.open("wb") as handle:
+        handle.write(json.dumps(header, separators=(",", ":")).encode() + b"\n")
+        handle.write(body)
+    os.replace(tmp_path, target)
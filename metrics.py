@@ -0,0 +1,169 @@
+"""
+In-process latency histograms, counters and gauges, rendered in Prometheus text format.
+
+Every worker process keeps its own numbers, so with several workers each scrape of
+``GET /metrics`` describes the worker that answered it. Recording is a dict lookup, a
+bisect and a few additions under a lock, cheap enough to leave on.
+"""
+
+from __future__ import annotations
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any
+
+# Upper bounds in seconds, from sub-millisecond index lookups to multi-second imports.
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+REQUEST_SECONDS = "librorank_request_duration_seconds"
+STAGE_SECONDS = "librorank_stage_duration_seconds"
+LIBRARY_ROWS = "librorank_library_rows"
+WRITE_BYTES = "librorank_write_bytes_total"
+
+_METRICS = {
+    REQUEST_SECONDS: ("histogram", "Time to answer an API request, by route."),
+    STAGE_SECONDS: ("histogram", "Time spent in one stage of request handling."),
+    LIBRARY_ROWS: ("gauge", "Books in the resident library."),
+    WRITE_BYTES: ("counter", "Bytes written to library files."),
+}
+
+
+class _Histogram:
+    __slots__ = ("counts", "sum")
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.sum = 0.0
+
+
+class Registry:
+    """Named metrics, each split into series by label values."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._histograms: dict[tuple[str, tuple[tuple[str, str], ...]], _Histogram] = {}
+        self._values: dict[tuple[str, tuple[tuple[str, str], ...]], float] = {}
+
+    def observe(self, name: str, seconds: float, **labels: str) -> None:
+        key = (name, tuple(labels.items()))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = _Histogram()
+            histogram.counts[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+            histogram.sum += seconds
+
+    def inc(self, name: str, amount: float = 1, **labels: str) -> None:
+        key = (name, tuple(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def set(self, name: str, value: float, **labels: str) -> None:
+        with self._lock:
+            self._values[(name, tuple(labels.items()))] = value
+
+    def render(self) -> str:
+        with self._lock:
+            histograms = {key: (list(h.counts), h.sum) for key, h in self._histograms.items()}
+            values = dict(self._values)
+        lines = []
+        for name, (kind, help_text) in _METRICS.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            if kind == "histogram":
+                for (series, labels), (counts, total) in sorted(histograms.items()):
+                    if series != name:
+                        continue
+                    cumulative = 0
+                    for bound, count in zip((*map(_number, LATENCY_BUCKETS), "+Inf"), counts):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{_labels(labels, le=bound)} {cumulative}")
+                    lines.append(f"{name}_sum{_labels(labels)} {_number(total)}")
+                    lines.append(f"{name}_count{_labels(labels)} {cumulative}")
+            else:
+                for (series, labels), value in sorted(values.items()):
+                    if series == name:
+                        lines.append(f"{name}{_labels(labels)} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _labels(labels: tuple[tuple[str, str], ...], **extra: Any) -> str:
+    pairs = [*labels, *extra.items()]
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + "}"
+
+
+REGISTRY = Registry()
+
+
+@contextmanager
+def timed(stage: str):
+    """Record how long the block takes as ``stage`` in the stage histogram."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        REGISTRY.observe(STAGE_SECONDS, time.perf_counter() - start, stage=stage)
+
+
+def count_write(file: str, size: int) -> None:
+    REGISTRY.inc(WRITE_BYTES, size, file=file)
+
+
+def set_library_rows(rows: int) -> None:
+    REGISTRY.set(LIBRARY_ROWS, rows)
+
+
+def render() -> str:
+    return REGISTRY.render()
+
+
+class RequestMetricsMiddleware:
+    """
+    ASGI middleware timing each HTTP request under its route template (``/books``, not
+    the raw path), method and status. Event streams are left out; their duration is how
+    long the client stayed connected.
+    """
+
+    def __init__(self, app, registry: Registry = REGISTRY) -> None:
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        status = 500
+        streaming = False
+
+        async def send_and_watch(message) -> None:
+            nonlocal status, streaming
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                streaming = any(
+                    key == b"content-type" and value.startswith(b"text/event-stream")
+                    for key, value in message.get("headers", ())
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_and_watch)
+        finally:
+            if not streaming:
+                route = scope.get("route")
+                self.registry.observe(
+                    REQUEST_SECONDS,
+                    time.perf_counter() - start,
+                    method=scope["method"],
+                    route=getattr(route, "path", "unmatched"),
+                    status=str(status),
+                )
@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+
+_ISBN = r"(?:\d{9}[\dX]|\d{13})"
+_MIX = np.uint64(0x100000001B3)
+
+
+def book_ids(titles, authors, isbns=None):
+    """
+    Stable IDs for whole columns of books: the ISBN when one is given, else a hash of
+    the normalized title and author.
+
+    ISBNs lose their hyphens and spaces; other non-blank values in ``isbns`` (IDs a
+    library already has) are kept as they are. Hashed IDs are 16 hex digits, the same
+    for a book however often or wherever it is ingested, so re-importing a file gives
+    the same IDs and titles differing only in case or spacing share one.
+    """
+    index = titles.index if isinstance(titles, pd.Series) else None
+    # Titles are hashed per row; authors repeat, so they are folded and hashed once each.
+    title_hashes = _hashed(_folded(list(titles)))
+    codes, uniques = pd.factorize(pd.Series(list(authors), dtype=object), use_na_sentinel=False)
+    author_hashes = _hashed(_folded(uniques.tolist()))[codes]
+    hashes = ((title_hashes * _MIX) ^ author_hashes).astype(">u8")
+    ids = np.frombuffer(hashes.tobytes().hex().encode("ascii"), dtype="S16").astype(str).astype(object)
+
+    if isbns is not None:
+        # Labelled by position; only the rows that have one are cleaned. ISBNs read as
+        # numbers come back with a trailing ".0".
+        given = pd.Series(list(isbns), dtype=object)
+        given = given[given.notna()].astype(str).str.strip()
+        given = given[given != ""]
+        compact = given.str.replace(r"[\s-]|\.0$", "", regex=True).str.upper()
+        ids[given.index.to_numpy()] = compact.where(compact.str.fullmatch(_ISBN), given).to_numpy()
+    return pd.Series(ids, index=index, dtype=object)
+
+
+def _folded(values):
+    # Same folding as book_data.normalize_title; a comprehension over plain str objects
+    # beats chained .str methods here too.
+    return [" ".join(value.split()).casefold() if isinstance(value, str) else "" for value in values]
+
+
+def _hashed(keys):
+    # hash_array uses a fixed key, so IDs do not change between processes or runs.
+    return pd.util.hash_array(np.array(keys, dtype=object), categorize=False)
@@ -1,10 +1,15 @@
 import pandas as pd
-import random
 
+from preprocess.book_ids import book_ids
 
-def clean_books(df):
+
+def clean_books(df, rating_fill=None, today=None):
     """
     Clean canonical LibroRank columns while gracefully handling missing fields.
+
+    Missing ratings get the mean rating and missing dates ``today``; pass ``rating_fill``
+    and ``today`` to use values computed over a larger dataset than ``df``. Books without
+    a ``book_id`` get a stable one from ``book_ids``.
     """
     df = df.copy()
 
@@ -23,21 +28,18 @@ def clean_books(df):
     df["read_status"] = df["read_status"].astype(str).str.strip().str.lower()
     df["rating"] = pd.to_numeric(df["rating"], errors="coerce")
 
-    mean_rating = df["rating"].dropna().mean()
+    mean_rating = df["rating"].dropna().mean() if rating_fill is None else rating_fill
     if pd.notna(mean_rating):
         df["rating"] = df["rating"].fillna(mean_rating)
     else:
         # If no ratings exist yet, keep a neutral default.
         df["rating"] = df["rating"].fillna(3.0)
 
-    missing_mask = df["book_id"].isna() | (df["book_id"].astype(str).str.strip() == "")
-    df.loc[missing_mask, "book_id"] = [
-        str(random.randint(10**12, 10**13 - 1))
-        for _ in range(missing_mask.sum())
-    ]
+    # Missing IDs are derived from the book itself, so re-ingesting gives the same ones.
+    df["book_id"] = book_ids(df["title"], df["author"], df["book_id"])
 
     df["last_date_read"] = pd.to_datetime(df["last_date_read"], errors="coerce")
-    today = pd.Timestamp.today().normalize()
+    today = pd.Timestamp.today().normalize() if today is None else today
     df["last_date_read"] = df["last_date_read"].fillna(today)
 
     return df
\ No newline at end of file
@@ -1,5 +1,7 @@
+import numpy as np
 import pandas as pd
 
+
 def _resolve_column(df, candidates):
     for col in candidates:
         if col in df.columns:
@@ -7,9 +9,8 @@ def _resolve_column(df, candidates):
     return None
 
 
-def _min_max(series, reverse=False, neutral_value=1.0):
-    min_value = series.min()
-    max_value = series.max()
+def _min_max(series, reverse=False, neutral_value=1.0, bounds=None):
+    min_value, max_value = bounds if bounds is not None else (series.min(), series.max())
     if pd.isna(min_value) or pd.isna(max_value) or max_value == min_value:
         return pd.Series([neutral_value] * len(series), index=series.index)
 
@@ -19,7 +20,9 @@ def _min_max(series, reverse=False, neutral_value=1.0):
     return normalized
 
 
-def normalize_rating(df):
+def normalize_rating(df, rating_range=None):
+    # rating_range: (min, max) to scale by instead of the frame's own, e.g. over a whole
+    # catalog read in chunks.
     rating_col = _resolve_column(df, ["rating", "Star Rating"])
     if rating_col is None:
         df["rating_norm"] = 0.5
@@ -30,13 +33,14 @@ def normalize_rating(df):
         df["rating_norm"] = 0.5
     else:
         ratings = ratings.fillna(3.0)
-        df["rating_norm"] = _min_max(ratings)
+        df["rating_norm"] = _min_max(ratings, bounds=rating_range)
 
     return df
 
 
-def compute_recency(df):
-    today = pd.Timestamp.today().normalize()
+def compute_recency(df, days_range=None, today=None):
+    # days_range: (min, max) days since read to scale by instead of the frame's own.
+    today = pd.Timestamp.today().normalize() if today is None else today
     date_col = _resolve_column(df, ["last_date_read", "Last Date Read"])
     if date_col is None:
         df["days_since_read"] = 0
@@ -47,7 +51,7 @@ def compute_recency(df):
         today - pd.to_datetime(df[date_col], errors="coerce").fillna(today)
     ).dt.days
 
-    df["recency_norm"] = _min_max(df["days_since_read"], reverse=True)
+    df["recency_norm"] = _min_max(df["days_since_read"], reverse=True, bounds=days_range)
 
     return df
 
@@ -63,4 +67,107 @@ def compute_score(df, rating_weight=0.7, recency_weight=0.3):
         recency_weight * df["recency_norm"]
     )
 
-    return df
\ No newline at end of file
+    return df
+
+
+FEATURE_COLUMNS = ("rating_norm", "days_since_read", "recency_norm", "score")
+_DAY = np.timedelta64(1, "D").astype("timedelta64[ns]").astype(np.int64)
+
+
+def build_features(ratings, dates, rating_weight=0.7, recency_weight=0.3, rating_range=None, days_range=None, today=None, out=None):
+    """
+    ``normalize_rating``, ``compute_recency`` and ``compute_score`` in one pass over
+    arrays: raw ratings and read dates (either may be None for a missing column) in,
+    a float64 array of shape ``(4, n)`` out, one row per name in ``FEATURE_COLUMNS``.
+
+    Each row is written in place, so passing ``out`` (say a buffer reused across
+    chunks) allocates nothing per call beyond parsing non-numeric inputs.
+    """
+    if ratings is None and dates is None:
+        raise ValueError("build_features needs ratings or dates")
+    size = len(ratings) if ratings is not None else len(dates)
+    if out is None:
+        out = np.empty((len(FEATURE_COLUMNS), size), dtype=np.float64)
+    elif out.shape != (len(FEATURE_COLUMNS), size) or out.dtype != np.float64 or not out.flags.c_contiguous:
+        raise ValueError(f"out must be a C-contiguous float64 array of shape ({len(FEATURE_COLUMNS)}, {size})")
+    rating_norm, days, recency_norm, score = out
+
+    values = _float_array(ratings) if ratings is not None else None
+    missing = np.isnan(values) if values is not None else None
+    if values is None or missing.all():
+        rating_norm.fill(0.5)
+    else:
+        low, high = rating_range if rating_range is not None else (np.nanmin(values), np.nanmax(values))
+        np.copyto(rating_norm, values)
+        if missing.any():
+            # The mean lies within the range, so filling does not move the bounds.
+            rating_norm[missing] = np.nanmean(values)
+        if pd.isna(low) or pd.isna(high) or high == low:
+            rating_norm.fill(1.0)
+        else:
+            np.subtract(rating_norm, low, out=rating_norm)
+            np.divide(rating_norm, high - low, out=rating_norm)
+
+    if dates is None:
+        days.fill(0)
+        recency_norm.fill(0.5)
+    else:
+        today = pd.Timestamp.today().normalize() if today is None else pd.Timestamp(today)
+        stamps = _datetime_array(dates)
+        # Whole days, rounded down like Timedelta.days; unknown dates count as today.
+        elapsed = np.subtract(np.datetime64(today.as_unit("ns").value, "ns"), stamps).view(np.int64)
+        np.floor_divide(elapsed, _DAY, out=elapsed)
+        np.copyto(days, elapsed, casting="unsafe")
+        days[np.isnat(stamps)] = 0
+
+        low, high = days_range if days_range is not None else (days.min(), days.max()) if size else (None, None)
+        if pd.isna(low) or pd.isna(high) or high == low:
+            recency_norm.fill(1.0)
+        else:
+            # 1 - (days - low) / (high - low)
+            np.subtract(high, days, out=recency_norm)
+            np.divide(recency_norm, high - low, out=recency_norm)
+
+    np.dot(np.array([rating_weight, recency_weight]), out[0:3:2], out=score)
+    return out
+
+
+def add_features(df, rating_weight=0.7, recency_weight=0.3, rating_range=None, days_range=None, today=None, out=None):
+    # The columns normalize_rating, compute_recency and compute_score add, from one
+    # build_features call.
+    rating_col = _resolve_column(df, ["rating", "Star Rating"])
+    date_col = _resolve_column(df, ["last_date_read", "Last Date Read"])
+    if rating_col is None and date_col is None:
+        df["rating_norm"] = 0.5
+        df["days_since_read"] = 0
+        df["recency_norm"] = 0.5
+        df["score"] = 0.5 * (rating_weight + recency_weight)
+        return df
+
+    features = build_features(
+        df[rating_col] if rating_col is not None else None,
+        df[date_col] if date_col is not None else None,
+        rating_weight=rating_weight,
+        recency_weight=recency_weight,
+        rating_range=rating_range,
+        days_range=days_range,
+        today=today,
+        out=out,
+    )
+    for name, values in zip(FEATURE_COLUMNS, features):
+        df[name] = values.astype(np.int64) if name == "days_since_read" else values
+    return df
+
+
+def _float_array(values):
+    values = values.to_numpy() if isinstance(values, pd.Series) else np.asarray(values)
+    if values.dtype.kind in "fiub":
+        return values.astype(np.float64, copy=False)
+    return pd.to_numeric(values, errors="coerce").astype(np.float64)
+
+
+def _datetime_array(values):
+    values = values.to_numpy() if isinstance(values, pd.Series) else np.asarray(values)
+    if values.dtype.kind != "M":
+        values = pd.to_datetime(values, errors="coerce").to_numpy()
+    return values.astype("datetime64[ns]", copy=False)
@@ -0,0 +1,205 @@
+"""
+Opt-in CPU and allocation profiles of single API requests or function calls.
+
+Request profiling is off unless ``LIBRORANK_PROFILE_TOKEN`` is set when the API starts.
+Then a request carrying that token in the ``X-LibroRank-Profile`` header runs its route
+under ``cProfile`` and ``tracemalloc``; the response names the artifact in
+``X-LibroRank-Profile-Id``, and ``GET /profiles/{id}`` (same header) downloads it. With
+the variable unset none of this is installed, so requests run exactly as before.
+
+``profile_call`` does the same for one call from code, e.g. of
+``ingest.pipeline.run_flexible_pipeline``, without any server setup.
+
+An artifact is a zip with ``profile.pstats`` (load with ``pstats`` or snakeviz),
+``profile.txt`` (top functions by cumulative time) and ``allocations.txt`` (top
+allocation sites still alive when the call returned).
+"""
+
+from __future__ import annotations
+
+import contextvars
+import cProfile
+import functools
+import hmac
+import inspect
+import io
+import os
+import pstats
+import re
+import threading
+import time
+import tracemalloc
+import uuid
+import zipfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable
+
+from fastapi.routing import APIRoute
+
+BASE_DIR = Path(__file__).resolve().parent
+PROFILE_TOKEN = os.environ.get("LIBRORANK_PROFILE_TOKEN") or None
+PROFILE_DIR = Path(os.environ.get("LIBRORANK_PROFILE_DIR", BASE_DIR / "data" / "profiles"))
+PROFILE_HEADER = "X-LibroRank-Profile"
+PROFILE_ID_HEADER = "X-LibroRank-Profile-Id"
+
+# Lines kept in the text reports.
+REPORT_LINES = 60
+# Stack depth recorded per allocation.
+TRACEMALLOC_FRAMES = 10
+
+_ARTIFACT_ID = re.compile(r"^[0-9a-f]{32}$")
+# cProfile hooks one thread and tracemalloc is process-wide, so captures take turns.
+_capture_lock = threading.Lock()
+_requested: contextvars.ContextVar[_Capture | None] = contextvars.ContextVar("librorank_profile", default=None)
+
+
+def enabled() -> bool:
+    return PROFILE_TOKEN is not None
+
+
+class _Capture:
+    """One profiled call: where its artifact goes, and whether it got written."""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.id = uuid.uuid4().hex
+        self.path: Path | None = None
+
+    @contextmanager
+    def running(self):
+        if not _capture_lock.acquire(blocking=False):
+            # Another capture is running; this call goes unprofiled rather than waiting.
+            yield
+            return
+        tracing = tracemalloc.is_tracing()
+        if not tracing:
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+        profiler = cProfile.Profile()
+        start = time.perf_counter()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            elapsed = time.perf_counter() - start
+            snapshot = tracemalloc.take_snapshot()
+            if not tracing:
+                tracemalloc.stop()
+            _capture_lock.release()
+            self.path = _write_artifact(self, profiler, snapshot, elapsed)
+
+
+def _write_artifact(capture: _Capture, profiler: cProfile.Profile, snapshot: tracemalloc.Snapshot, elapsed: float) -> Path:
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    report = io.StringIO()
+    report.write(f"{capture.name}: {elapsed:.3f}s wall\n\n")
+    pstats.Stats(profiler, stream=report).sort_stats("cumulative").print_stats(REPORT_LINES)
+    snapshot = snapshot.filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+    stats = snapshot.statistics("lineno")
+    allocations = [f"{capture.name}: {sum(s.size for s in stats) / 1024:.1f} KiB live in {len(stats)} sites\n"]
+    allocations += [f"{stat}\n" for stat in stats[:REPORT_LINES]]
+
+    path = PROFILE_DIR / f"{capture.id}.zip"
+    tmp_path = path.with_suffix(".tmp")
+    pstats_path = PROFILE_DIR / f"{capture.id}.pstats"
+    profiler.dump_stats(pstats_path)
+    try:
+        with zipfile.ZipFile(tmp_path, "w", zipfile.ZIP_DEFLATED) as archive:
+            archive.write(pstats_path, "profile.pstats")
+            archive.writestr("profile.txt", report.getvalue())
+            archive.writestr("allocations.txt", "".join(allocations))
+    finally:
+        pstats_path.unlink()
+    os.replace(tmp_path, path)
+    return path
+
+
+def profile_call(func: Callable[..., Any], *args: Any, **kwargs: Any) -> tuple[Any, Path | None]:
+    """
+    Call ``func(*args, **kwargs)`` under the profiler; returns its result and the
+    artifact path (None if another capture was already running).
+    """
+    capture = _Capture(getattr(func, "__qualname__", repr(func)))
+    with capture.running():
+        result = func(*args, **kwargs)
+    return result, capture.path
+
+
+def artifact_path(artifact_id: str) -> Path | None:
+    if not _ARTIFACT_ID.match(artifact_id):
+        return None
+    path = PROFILE_DIR / f"{artifact_id}.zip"
+    return path if path.exists() else None
+
+
+class ProfiledRoute(APIRoute):
+    """
+    Route that runs its endpoint under the profiler when ``ProfileMiddleware`` asked for
+    it. Wrapping the endpoint rather than the ASGI call puts the profiler on the thread
+    that actually runs a sync endpoint.
+    """
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any) -> None:
+        super().__init__(path, _profiled(endpoint), **kwargs)
+
+
+def _profiled(endpoint: Callable[..., Any]) -> Callable[..., Any]:
+    if inspect.iscoroutinefunction(endpoint):
+
+        @functools.wraps(endpoint)
+        async def run_async(*args: Any, **kwargs: Any) -> Any:
+            capture = _requested.get()
+            if capture is None:
+                return await endpoint(*args, **kwargs)
+            with capture.running():
+                return await endpoint(*args, **kwargs)
+
+        return run_async
+
+    @functools.wraps(endpoint)
+    def run(*args: Any, **kwargs: Any) -> Any:
+        capture = _requested.get()
+        if capture is None:
+            return endpoint(*args, **kwargs)
+        with capture.running():
+            return endpoint(*args, **kwargs)
+
+    return run
+
+
+class ProfileMiddleware:
+    """ASGI middleware that turns a matching ``X-LibroRank-Profile`` header into a capture."""
+
+    def __init__(self, app) -> None:
+        self.app = app
+        self.header = PROFILE_HEADER.lower().encode()
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or not self._requested(scope):
+            await self.app(scope, receive, send)
+            return
+        capture = _Capture(f'{scope["method"]} {scope["path"]}')
+
+        async def send_with_id(message) -> None:
+            if message["type"] == "http.response.start" and capture.path is not None:
+                headers = [*message.get("headers", ()), (PROFILE_ID_HEADER.lower().encode(), capture.id.encode())]
+                message = {**message, "headers": headers}
+            await send(message)
+
+        token = _requested.set(capture)
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            _requested.reset(token)
+
+    def _requested(self, scope) -> bool:
+        for key, value in scope["headers"]:
+            if key == self.header:
+                return authorized(value.decode("latin-1"))
+        return False
+
+
+def authorized(value: str | None) -> bool:
+    """Whether a ``X-LibroRank-Profile`` header value unlocks profiling."""
+    return PROFILE_TOKEN is not None and value is not None and hmac.compare_digest(value, PROFILE_TOKEN)
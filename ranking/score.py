@@ -1,4 +1,7 @@
+import heapq
+
 import numpy as np
+import pandas as pd
 
 def _resolve_column(df, candidates):
     for col in candidates:
@@ -7,12 +10,28 @@ def _resolve_column(df, candidates):
     return None
 
 
+def _codes(series):
+    # Integer code per row (-1 for missing) and the distinct values they index. The
+    # library store interns authors and statuses as categoricals, which already are
+    # this; other frames are factorized once here.
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.cat.codes.to_numpy(), series.cat.categories
+    return pd.factorize(series)
+
+
+def _status_mask(series, *statuses):
+    # Statuses are cleaned once per distinct value, then rows are matched by code.
+    codes, values = _codes(series)
+    matching = np.flatnonzero(values.astype(str).str.strip().str.lower().isin(statuses))
+    return np.isin(codes, matching)
+
+
 def score_read_books(df, rating_weight=0.7, recency_weight=0.3):
     status_col = _resolve_column(df, ["read_status", "Read Status"])
     if status_col is None:
         return df.iloc[0:0].copy()
 
-    read_df = df[df[status_col].astype(str).str.strip().str.lower() == "read"].copy()
+    read_df = df[_status_mask(df[status_col], "read")].copy()
     if "rating_norm" not in read_df.columns:
         read_df["rating_norm"] = 0.5
     if "recency_norm" not in read_df.columns:
@@ -32,7 +51,7 @@ def score_read_books(df, rating_weight=0.7, recency_weight=0.3):
 
     return read_df
 
-def score_tbr_books(df, randomness_strength=0.05, diverse_authors=True):
+def score_tbr_books(df, randomness_strength=0.05, diverse_authors=True, author_scores=None, global_score=0.5, k=None, rng=None, content_scores=None, content_weight=0.2):
     status_col = _resolve_column(df, ["read_status", "Read Status"])
     author_col = _resolve_column(df, ["author", "Authors"])
     title_col = _resolve_column(df, ["title", "Title"])
@@ -46,18 +65,29 @@ def score_tbr_books(df, randomness_strength=0.05, diverse_authors=True):
         title_col = "title"
         df = df.copy()
         df[title_col] = ""
-    if "rating_norm" not in df.columns:
+    if "rating_norm" not in df.columns and author_scores is None:
         df = df.copy()
         df["rating_norm"] = 0.5
 
-    status_series = df[status_col].astype(str).str.strip().str.lower()
-    read_df = df[status_series == "read"].copy()
-    tbr_df = df[status_series == "to-read"].copy()
+    read_df = df[_status_mask(df[status_col], "read")].copy()
+    tbr_df = df[_status_mask(df[status_col], "to-read")].copy()
 
-    # Remove duplicate books
-    tbr_df = tbr_df.drop_duplicates(
-        subset=[title_col, author_col]
-    )
+    # Remove duplicate books (with k, while selecting instead)
+    if k is None:
+        tbr_df = tbr_df.drop_duplicates(
+            subset=[title_col, author_col]
+        )
+
+    # Content similarity to the reader's favourites (row label -> [0, 1], e.g. from
+    # ranking.similarity.ContentIndex), so books by unread authors are not all tied.
+    if content_scores is not None:
+        tbr_df["content_score"] = tbr_df.index.map(content_scores).fillna(0.0)
+
+    # Precomputed author preferences (e.g. book_data.author_scores()); df then only
+    # needs the to-read rows.
+    if author_scores is not None:
+        tbr_df["author_score"] = tbr_df[author_col].map(author_scores).astype(float).fillna(global_score)
+        return _rank_tbr(tbr_df, author_col, title_col, randomness_strength, diverse_authors, k, rng, content_weight)
 
     author_pref = (
         read_df
@@ -84,17 +114,29 @@ def score_tbr_books(df, randomness_strength=0.05, diverse_authors=True):
         .fillna(global_avg)
     )
 
-    noise = np.random.uniform(
+    return _rank_tbr(tbr_df, author_col, title_col, randomness_strength, diverse_authors, k, rng, content_weight)
+
+
+def _rank_tbr(tbr_df, author_col, title_col, randomness_strength, diverse_authors, k, rng, content_weight):
+    noise = (rng or np.random).uniform(
         -randomness_strength,
         randomness_strength,
         len(tbr_df)
     )
 
-    tbr_df["score"] = tbr_df["author_score"] + noise
+    score = tbr_df["author_score"]
+    if "content_score" in tbr_df.columns:
+        # A weighted average rather than a bonus, so content still separates books whose
+        # author score is already at the top of the range.
+        score = (1 - content_weight) * score + content_weight * tbr_df["content_score"]
+    tbr_df["score"] = score + noise
 
     # Keep score in clean range
     tbr_df["score"] = tbr_df["score"].clip(0, 1)
 
+    if k is not None:
+        return tbr_df.iloc[_top_k(tbr_df, author_col, title_col, k, diverse_authors)]
+
     tbr_df = tbr_df.sort_values(
         by="score",
         ascending=False
@@ -108,13 +150,148 @@ def score_tbr_books(df, randomness_strength=0.05, diverse_authors=True):
 
     return tbr_df
 
-def recommend_one(tbr_ranked):
+def _top_k(tbr_df, author_col, title_col, k, diverse_authors):
+    # Positions of the k best rows, best first, skipping repeated books (and, with
+    # diverse_authors, repeated authors). Partitions out a few more than k candidates and
+    # only sorts those; widens the candidate set when repeats use it up.
+    scores = tbr_df["score"].to_numpy()
+    authors = _codes(tbr_df[author_col])[0]
+    titles = None if diverse_authors else _codes(tbr_df[title_col])[0]
+    size = min(2 * k, len(scores))
+    while True:
+        if size < len(scores):
+            candidates = np.argpartition(-scores, size - 1)[:size]
+        else:
+            candidates = np.arange(len(scores))
+        candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+        picked, seen = [], set()
+        for pos in candidates:
+            key = authors[pos] if diverse_authors else (titles[pos], authors[pos])
+            if key in seen:
+                continue
+            seen.add(key)
+            picked.append(pos)
+            if len(picked) == k:
+                return picked
+        if size == len(scores):
+            return picked
+        size = min(2 * size, len(scores))
+
+
+def score_tbr_books_batch(df, library_col="library", k=5, randomness_strength=0.05, diverse_authors=True, rng=None):
+    # Many libraries at once, concatenated with a library_col key. Per library this is
+    # normalize_rating over the whole library, then score_tbr_books(k=k), all in
+    # grouped passes over the whole frame. Returns the top k of each library, best first,
+    # libraries in the order they first appear.
+    status_col = _resolve_column(df, ["read_status", "Read Status"])
+    author_col = _resolve_column(df, ["author", "Authors"])
+    title_col = _resolve_column(df, ["title", "Title"])
+    rating_col = _resolve_column(df, ["rating", "Star Rating"])
+    if status_col is None:
+        return df.iloc[0:0].copy()
+    if author_col is None:
+        author_col = "author"
+        df = df.assign(**{author_col: "unknown"})
+    if title_col is None:
+        title_col = "title"
+        df = df.assign(**{title_col: ""})
+
+    df = df.copy()
+    libraries = df[library_col]
+
+    if "rating_norm" not in df.columns:
+        if rating_col is None:
+            df["rating_norm"] = 0.5
+        else:
+            # Every rated book sets the scale, whatever its shelf (rated DNF books too).
+            ratings = pd.to_numeric(df[rating_col], errors="coerce")
+            by_library = ratings.groupby(libraries, sort=False)
+            low, high = by_library.transform("min"), by_library.transform("max")
+            ratings = ratings.fillna(by_library.transform("mean"))
+            spread = (high - low).where(high != low)
+            # Same neutral values as normalize_rating: 1.0 when all ratings are equal,
+            # 0.5 when a library has none.
+            df["rating_norm"] = ((ratings - low) / spread).where(high != low, 1.0).where(low.notna(), 0.5)
+
+    df = df[_status_mask(df[status_col], "read", "to-read")]
+
+    read = _status_mask(df[status_col], "read")
+    read_df = df.loc[read, [library_col, author_col, "rating_norm"]]
+    tbr_df = df[~read].drop_duplicates(subset=[library_col, title_col, author_col])
+
+    author_pref = read_df.groupby([library_col, author_col], sort=False)["rating_norm"].mean().rename("author_score")
+    global_avg = read_df.groupby(library_col, sort=False)["rating_norm"].mean()
+    tbr_df = tbr_df.join(author_pref, on=[library_col, author_col])
+    tbr_df["author_score"] = tbr_df["author_score"].fillna(tbr_df[library_col].map(global_avg)).fillna(0.5)
+
+    noise = (rng or np.random).uniform(
+        -randomness_strength,
+        randomness_strength,
+        len(tbr_df)
+    )
+    tbr_df["score"] = (tbr_df["author_score"] + noise).clip(0, 1)
+
+    # Libraries keep their first-seen order; within each, best score first.
+    order = pd.Series(pd.factorize(tbr_df[library_col])[0], index=tbr_df.index, name="_library_order")
+    tbr_df = tbr_df.assign(_library_order=order).sort_values(["_library_order", "score"], ascending=[True, False])
+    if diverse_authors:
+        tbr_df = tbr_df.drop_duplicates(subset=[library_col, author_col])
+    return tbr_df.groupby(library_col, sort=False).head(k).drop(columns="_library_order")
+
+
+class TopK:
+    # The k best rows offered so far, at most one per key (the better one wins), for
+    # ranking data that arrives in chunks. A min-heap on score finds the row to evict;
+    # entries replaced by a better row for the same key are skipped when they surface.
+
+    def __init__(self, k):
+        self.k = k
+        self._best = {}
+        self._heap = []
+        self._seq = 0
+
+    def offer(self, ranked, keys=None):
+        # keys: one per row of ranked (default: every row is distinct).
+        scores = ranked["score"].tolist()
+        keys = keys if keys is not None else [None] * len(scores)
+        for score, key, record in zip(scores, keys, ranked.to_dict(orient="records")):
+            self._seq += 1
+            key = self._seq if key is None else key
+            current = self._best.get(key)
+            if current is not None:
+                if score <= current[0]:
+                    continue
+            elif len(self._best) == self.k:
+                self._drop_stale()
+                if score <= self._heap[0][0]:
+                    continue
+                del self._best[heapq.heappop(self._heap)[2]]
+            self._best[key] = (score, self._seq, record)
+            heapq.heappush(self._heap, (score, self._seq, key))
+        if len(self._heap) > 2 * self.k + 64:
+            self._heap = [(score, seq, key) for key, (score, seq, _) in self._best.items()]
+            heapq.heapify(self._heap)
+
+    def _drop_stale(self):
+        while self._heap:
+            score, seq, key = self._heap[0]
+            current = self._best.get(key)
+            if current is not None and current[1] == seq:
+                return
+            heapq.heappop(self._heap)
+
+    def result(self):
+        best = sorted(self._best.values(), key=lambda entry: (-entry[0], entry[1]))
+        return pd.DataFrame([record for _, _, record in best])
+
+
+def recommend_one(tbr_ranked, rng=None):
 
     if len(tbr_ranked) == 0:
         return None
 
     # Pick randomly from top 5
     top_slice = tbr_ranked.head(5)
-    recommendation = top_slice.sample(1)
+    recommendation = top_slice.sample(1, random_state=rng)
 
     return recommendation
\ No newline at end of file
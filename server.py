@@ -0,0 +1,110 @@
+"""
+ASGI entry point for deployments that start processes on demand: ``uvicorn server:app``.
+
+Importing the full API (FastAPI, pandas, numpy) and loading the library takes a second
+or more. This module uses the standard library only, so the server is up almost at
+once. On startup it imports ``api`` and loads the library on a background thread, and
+hands every request to it once that is done. Until then it answers the common first
+request, an unfiltered ``GET /books``, itself: with a 304 when the client's ETag is
+still the library version, or with the response body a warm process cached on disk for
+that version (see ``library_files``). Every other request waits for the full app.
+
+``uvicorn api:app`` still works and loads everything before serving.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+
+from library_files import disk_version, read_books_cache, storage_location
+
+
+class ColdStartApp:
+    def __init__(self) -> None:
+        self._app = None
+        self._error: BaseException | None = None
+        self._ready = threading.Event()
+        self._loader: threading.Thread | None = None
+
+    def start(self) -> None:
+        if self._loader is None:
+            self._loader = threading.Thread(target=self._load, name="librorank-warm-up", daemon=True)
+            self._loader.start()
+
+    def _load(self) -> None:
+        try:
+            import api
+            import book_data
+
+            book_data.load_data(readonly=True)
+            self._app = api.app
+        except BaseException as exc:
+            self._error = exc
+        finally:
+            self._ready.set()
+
+    async def _full_app(self):
+        self.start()
+        if not self._ready.is_set():
+            await asyncio.get_running_loop().run_in_executor(None, self._ready.wait)
+        if self._error is not None:
+            raise RuntimeError("LibroRank API failed to load") from self._error
+        return self._app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if self._app is not None:
+            await self._app(scope, receive, send)
+            return
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] == "http" and await self._answer_cold(scope, send):
+            return
+        app = await self._full_app()
+        await app(scope, receive, send)
+
+    async def _lifespan(self, receive, send) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                self.start()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _answer_cold(self, scope, send) -> bool:
+        if scope["method"] != "GET" or scope["path"] != "/books" or scope["query_string"]:
+            return False
+        if_none_match = next((value for key, value in scope["headers"] if key == b"if-none-match"), None)
+        kind, path = storage_location()
+        loop = asyncio.get_running_loop()
+        if if_none_match is not None:
+            version = await loop.run_in_executor(None, disk_version, kind, path)
+            if version is not None and _etag_matches(if_none_match.decode("latin-1"), version):
+                await _respond(send, 304, version, b"")
+                return True
+        cached = await loop.run_in_executor(None, read_books_cache, kind, path)
+        if cached is None:
+            return False
+        version, body = cached
+        await _respond(send, 200, version, body)
+        return True
+
+
+def _etag_matches(if_none_match: str, version: int) -> bool:
+    # Same weak comparison as api._etag_matches.
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or f'"{version}"' in tags
+
+
+async def _respond(send, status: int, version: int, body: bytes) -> None:
+    headers = [(b"etag", f'"{version}"'.encode()), (b"cache-control", b"no-cache")]
+    if status == 200:
+        headers += [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+    await send({"type": "http.response.start", "status": status, "headers": headers})
+    await send({"type": "http.response.body", "body": body})
+
+
+app = ColdStartApp()
@@ -1,16 +1,25 @@
+import asyncio
+import tempfile
+import threading
 import unittest
+from pathlib import Path
 from unittest.mock import patch
 
 import numpy as np
 import pandas as pd
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
 from fastapi.testclient import TestClient
 
 import api
+from book_data import BOOKS_COLUMNS, CsvBackend, LibraryStore, append_rows
+from preprocess.book_ids import book_ids
 
 
 class ApiTests(unittest.TestCase):
     def setUp(self):
         self.client = TestClient(api.app)
+        self.addCleanup(api._recommendations.clear)
 
     @patch("api.save_data")
     @patch("api.load_data")
@@ -46,21 +55,24 @@ class ApiTests(unittest.TestCase):
         self.assertEqual(saved_df.iloc[-1]["Title"], "New Book")
         self.assertEqual(saved_df.iloc[-1]["Authors"], "New Author")
         self.assertEqual(saved_df.iloc[-1]["Read Status"], "to-read")
+        self.assertEqual(saved_df.iloc[-1]["ISBN/UID"], book_ids(["new book"], ["NEW AUTHOR"])[0])
 
+    @patch("api.content_scores", return_value={})
+    @patch("api.library_version", return_value=1)
     @patch("api.clean_for_json")
     @patch("api.recommend_one")
     @patch("api.score_tbr_books")
-    @patch("api.compute_recency")
-    @patch("api.normalize_rating")
+    @patch("api.author_scores")
     @patch("api.load_data")
     def test_recommend_returns_list_payload(
         self,
         mock_load_data,
-        mock_normalize_rating,
-        mock_compute_recency,
+        mock_author_scores,
         mock_score_tbr_books,
         mock_recommend_one,
         mock_clean_for_json,
+        mock_library_version,
+        mock_content_scores,
     ):
         raw_df = pd.DataFrame(
             [
@@ -78,8 +90,7 @@ class ApiTests(unittest.TestCase):
         )
 
         mock_load_data.return_value = raw_df
-        mock_normalize_rating.return_value = raw_df
-        mock_compute_recency.return_value = raw_df
+        mock_author_scores.return_value = ({"Frank Herbert": 1.0}, 1.0)
         mock_score_tbr_books.return_value = raw_df
         mock_recommend_one.return_value = rec_df
         mock_clean_for_json.return_value = rec_df
@@ -92,25 +103,26 @@ class ApiTests(unittest.TestCase):
         self.assertEqual(payload[0]["Title"], "Snow Crash")
         self.assertEqual(payload[0]["Authors"], "Neal Stephenson")
 
+    @patch("api.content_scores", return_value={})
+    @patch("api.library_version", return_value=1)
     @patch("api.clean_for_json")
     @patch("api.recommend_one")
     @patch("api.score_tbr_books")
-    @patch("api.compute_recency")
-    @patch("api.normalize_rating")
+    @patch("api.author_scores")
     @patch("api.load_data")
     def test_recommend_returns_empty_when_no_pick(
         self,
         mock_load_data,
-        mock_normalize_rating,
-        mock_compute_recency,
+        mock_author_scores,
         mock_score_tbr_books,
         mock_recommend_one,
         mock_clean_for_json,
+        mock_library_version,
+        mock_content_scores,
     ):
         empty = pd.DataFrame()
         mock_load_data.return_value = empty
-        mock_normalize_rating.return_value = empty
-        mock_compute_recency.return_value = empty
+        mock_author_scores.return_value = ({}, 0.5)
         mock_score_tbr_books.return_value = empty
         mock_recommend_one.return_value = None
 
@@ -119,6 +131,100 @@ class ApiTests(unittest.TestCase):
         self.assertEqual(response.json(), [])
         mock_clean_for_json.assert_not_called()
 
+    @patch("api.content_scores", return_value={})
+    @patch("api.library_version", return_value=1)
+    @patch("api.author_scores")
+    @patch("api.load_data")
+    def test_recommend_k_returns_best_books_one_per_author(self, mock_load_data, mock_author_scores, mock_library_version, mock_content_scores):
+        mock_load_data.return_value = pd.DataFrame(
+            [
+                {"Title": "Emma", "Authors": "Austen", "Read Status": "to-read"},
+                {"Title": "Persuasion", "Authors": "Austen", "Read Status": "to-read"},
+                {"Title": "Ubik", "Authors": "Dick", "Read Status": "to-read"},
+                {"Title": "Solaris", "Authors": "Lem", "Read Status": "to-read"},
+                {"Title": "Beloved", "Authors": "Morrison", "Read Status": "to-read"},
+            ]
+        )
+        mock_author_scores.return_value = ({"Austen": 0.9, "Dick": 0.1, "Lem": 0.6}, 0.3)
+
+        response = self.client.get("/recommend?k=3")
+        self.assertEqual(response.status_code, 200)
+        payload = response.json()
+        self.assertEqual([book["Authors"] for book in payload], ["Austen", "Lem", "Morrison"])
+        self.assertEqual(self.client.get("/recommend?k=0").status_code, 422)
+
+    @patch("api.content_scores", return_value={})
+    @patch("api.library_version", return_value=4)
+    @patch("api.author_scores", return_value=({"Austen": 0.9}, 0.5))
+    @patch("api.load_data")
+    def test_recommend_ranks_once_per_library_version(self, mock_load_data, mock_author_scores, mock_library_version, mock_content_scores):
+        df = pd.DataFrame(
+            [
+                {"Title": "Emma", "Authors": "Austen", "Read Status": "to-read"},
+                {"Title": "Ubik", "Authors": "Dick", "Read Status": "to-read"},
+            ]
+        )
+        df.attrs["library_version"] = 4
+        mock_load_data.return_value = df
+
+        picks = {self.client.get("/recommend").json()[0]["Title"] for _ in range(20)}
+        self.assertEqual(picks, {"Emma", "Ubik"})
+        first = self.client.get("/recommend?k=2")
+        self.assertEqual(first.headers["etag"], '"4"')
+        self.assertEqual(self.client.get("/recommend?k=2").json(), first.json())
+        self.assertEqual(mock_load_data.call_count, 2)
+        self.assertEqual(self.client.get("/recommend?k=2", headers={"If-None-Match": '"4"'}).status_code, 304)
+
+        mock_library_version.return_value = 5
+        df.attrs["library_version"] = 5
+        self.client.get("/recommend")
+        self.assertEqual(mock_load_data.call_count, 3)
+        self.assertEqual(list(api._recommendations), [(5, None)])
+
+    @patch("api.load_data")
+    def test_recommend_batch_scores_each_library_separately(self, mock_load_data):
+        response = self.client.post(
+            "/recommend/batch",
+            json={
+                "k": 2,
+                "libraries": {
+                    "ann": [
+                        {"title": "Emma", "author": "Austen", "status": "read", "rating": 5},
+                        {"title": "Ubik", "author": "Dick", "status": "read", "rating": 1},
+                        {"title": "Persuasion", "author": "Austen"},
+                        {"title": "Sanditon", "author": "Austen"},
+                        {"title": "Valis", "author": "Dick"},
+                        {"title": "Solaris", "author": "Lem", "status": "dnf"},
+                    ],
+                    "bob": [
+                        {"title": "Emma", "author": "Austen", "status": "read", "rating": 1},
+                        {"title": "Ubik", "author": "Dick", "status": "read", "rating": 5},
+                        {"title": "Persuasion", "author": "Austen"},
+                        {"title": "Valis", "author": "Dick"},
+                    ],
+                    "cy": [],
+                },
+            },
+        )
+        self.assertEqual(response.status_code, 200)
+        recommendations = response.json()["recommendations"]
+        self.assertEqual([book["Authors"] for book in recommendations["ann"]], ["Austen", "Dick"])
+        self.assertEqual([book["Title"] for book in recommendations["bob"]], ["Valis", "Persuasion"])
+        self.assertEqual(recommendations["cy"], [])
+        self.assertNotIn("library", recommendations["ann"][0])
+        mock_load_data.assert_not_called()
+
+    def test_recommend_batch_scales_ratings_by_every_rated_book(self):
+        books = [
+            {"title": "Emma", "author": "Ann", "status": "read", "rating": 5},
+            {"title": "Ubik", "author": "Bob", "status": "read", "rating": 3},
+            {"title": "Solaris", "author": "Cy", "status": "dnf", "rating": 1},
+            {"title": "Valis", "author": "Bob"},
+        ]
+        response = self.client.post("/recommend/batch", json={"k": 1, "libraries": {"ann": books}})
+        # The DNF rating stretches the scale to 1-5, as normalize_rating over the library does.
+        self.assertEqual(response.json()["recommendations"]["ann"][0]["author_score"], 0.5)
+
     @patch("api.save_data")
     @patch("api.load_data")
     def test_delete_book_removes_row(self, mock_load_data, mock_save_data):
@@ -234,7 +340,7 @@ class ApiTests(unittest.TestCase):
             json={
                 "books": [
                     {"title": "Existing", "author": "X"},
-                    {"title": "New", "author": "Y"},
+                    {"title": "New", "author": "Y", "isbn": "0-441-01359-7"},
                 ]
             },
         )
@@ -242,6 +348,382 @@ class ApiTests(unittest.TestCase):
         self.assertEqual(response.json(), {"imported": 1, "skipped": 1})
         saved = mock_save_data.call_args.args[0]
         self.assertEqual(len(saved), 2)
+        self.assertEqual(saved.iloc[-1]["ISBN/UID"], "0441013597")
+
+    @patch("api.save_data")
+    @patch("api.load_data")
+    def test_titles_match_ignoring_case_and_spacing(self, mock_load_data, mock_save_data):
+        base_df = pd.DataFrame(
+            [
+                {
+                    "Title": "The Hobbit",
+                    "Authors": "A",
+                    "ISBN/UID": "1",
+                    "Read Status": "to-read",
+                    "Star Rating": np.nan,
+                    "Last Date Read": None,
+                    "Progress (%)": 0.0,
+                    "Pages Read": 0,
+                    "Total Pages": 200,
+                }
+            ]
+        )
+        mock_load_data.return_value = base_df
+
+        response = self.client.patch("/books/progress", json={"title": "the  hobbit", "pages_read": 50})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"progress": 25.0})
+
+        response = self.client.post(
+            "/books/import",
+            json={"books": [{"title": "THE HOBBIT"}, {"title": "Dune"}, {"title": "dune "}]},
+        )
+        self.assertEqual(response.json(), {"imported": 1, "skipped": 2})
+
+    @patch("api.save_data")
+    @patch("api.load_data")
+    def test_bulk_import_appends_accepted_rows_once(self, mock_load_data, mock_save_data):
+        base_df = pd.DataFrame(
+            [
+                {
+                    "Title": "Book 0",
+                    "Authors": "A",
+                    "ISBN/UID": "1",
+                    "Read Status": "read",
+                    "Star Rating": 4.0,
+                    "Last Date Read": None,
+                    "Progress (%)": 100.0,
+                    "Pages Read": 10,
+                    "Total Pages": 10,
+                }
+            ]
+        )
+        mock_load_data.return_value = base_df
+        books = [{"title": f"Book {i % 500}", "author": " ", "total_pages": i} for i in range(1000)]
+        books.append({"title": "   "})
+
+        response = self.client.post("/books/import", json={"books": books})
+
+        self.assertEqual(response.json(), {"imported": 499, "skipped": 502})
+        self.assertEqual(mock_save_data.call_count, 1)
+        saved = mock_save_data.call_args.args[0]
+        self.assertEqual(len(saved), 500)
+        added = saved.iloc[1:]
+        self.assertEqual(added["Title"].tolist(), [f"Book {i}" for i in range(1, 500)])
+        self.assertEqual(added["Total Pages"].tolist(), list(range(1, 500)))
+        self.assertTrue((added["Authors"] == "Unknown").all())
+        self.assertTrue(added["ISBN/UID"].is_unique)
+
+    @patch("api.library_version", return_value=7)
+    @patch("api.load_data")
+    def test_get_books_pages_through_filtered_sorted_projection(self, mock_load_data, mock_library_version):
+        ratings = [3.0, np.nan, 5.0, 3.0, 4.0, np.nan, 1.0]
+        mock_load_data.return_value = pd.DataFrame(
+            [
+                {
+                    "Title": f"Book {i}",
+                    "Authors": "A",
+                    "ISBN/UID": str(i),
+                    "Read Status": "read" if i < 6 else "dnf",
+                    "Star Rating": rating,
+                    "Last Date Read": None,
+                    "Progress (%)": 100.0,
+                    "Pages Read": 0,
+                    "Total Pages": 100,
+                }
+                for i, rating in enumerate(ratings)
+            ]
+        )
+
+        pages = []
+        params = {"shelf": "read", "fields": "title,rating", "sort": "-rating", "limit": 2}
+        while True:
+            body = self.client.get("/books", params=params).json()
+            pages.append(body["books"])
+            if body["next_cursor"] is None:
+                break
+            params["cursor"] = body["next_cursor"]
+
+        self.assertEqual([len(page) for page in pages], [2, 2, 2])
+        books = [book for page in pages for book in page]
+        self.assertEqual(list(books[0]), ["Title", "Star Rating"])
+        self.assertEqual(
+            [book["Title"] for book in books],
+            ["Book 2", "Book 4", "Book 0", "Book 3", "Book 1", "Book 5"],
+        )
+
+        unpaged = self.client.get("/books", params={"shelf": "dnf", "fields": "title"}).json()
+        self.assertEqual(unpaged, [{"Title": "Book 6"}])
+        self.assertEqual(self.client.get("/books", params={"sort": "colour"}).status_code, 400)
+        # Well-formed JSON of the wrong shape, or a value of the wrong type for the sort.
+        for sort, position in (
+            (None, [1]),
+            (None, {"sort": None}),
+            (None, "x"),
+            ("-rating", {"sort": "-rating", "id": 1}),
+            ("-rating", {"sort": "-rating", "id": 1, "value": "x"}),
+        ):
+            params = {"limit": 2, "cursor": api._encode_cursor(position), **({"sort": sort} if sort else {})}
+            response = self.client.get("/books", params=params)
+            self.assertEqual(response.status_code, 400, position)
+            self.assertEqual(response.json(), {"detail": "Invalid cursor"})
+
+    @patch("api.library_version", return_value=3)
+    @patch("api.load_data")
+    def test_get_books_revalidates_against_library_version(self, mock_load_data, mock_library_version):
+        mock_load_data.return_value = pd.DataFrame(
+            [{"Title": "T", "Authors": "A", "Read Status": "to-read", "Progress (%)": 0.0}]
+        )
+
+        first = self.client.get("/books")
+        self.assertEqual(first.headers["etag"], '"3"')
+
+        cached = self.client.get("/books", headers={"If-None-Match": '"3"'})
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached.content, b"")
+        self.assertEqual(mock_load_data.call_count, 1)
+
+        mock_library_version.return_value = 4
+        changed = self.client.get("/books", headers={"If-None-Match": '"3"'})
+        self.assertEqual(changed.status_code, 200)
+        self.assertEqual(changed.headers["etag"], '"4"')
+
+    @patch("api.library_changes")
+    def test_book_changes_returns_delta_or_resync(self, mock_library_changes):
+        change = {
+            "v": 5,
+            "update": [[0, {"Last Date Read": pd.Timestamp("2024-02-03"), "Star Rating": 4.0}]],
+            "delete": [2],
+            "append": [],
+        }
+        mock_library_changes.return_value = (5, [change])
+
+        response = self.client.get("/books/changes", params={"since": 4})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json(),
+            {
+                "version": 5,
+                "resync": False,
+                "changes": [
+                    {
+                        "v": 5,
+                        "update": [[0, {"Last Date Read": "2024-02-03T00:00:00", "Star Rating": 4.0}]],
+                        "delete": [2],
+                        "append": [],
+                    }
+                ],
+            },
+        )
+        mock_library_changes.assert_called_once_with(4)
+
+        mock_library_changes.return_value = (5, None)
+        self.assertEqual(self.client.get("/books/changes", params={"since": 1}).json(), {"version": 5, "resync": True})
+        self.assertEqual(self.client.get("/books/changes").status_code, 422)
+
+    @patch("api.cache_books_response")
+    @patch("api.library_version", return_value=5)
+    @patch("api.load_data")
+    def test_unfiltered_books_response_is_cached_for_cold_starts(self, mock_load_data, mock_library_version, mock_cache):
+        df = pd.DataFrame([{"Title": "T", "Authors": "A"}])
+        df.attrs["library_version"] = 5
+        mock_load_data.return_value = df
+
+        body = self.client.get("/books").content
+        mock_cache.assert_called_once_with(5, body)
+        self.client.get("/books", params={"fields": "title"})
+        self.assertEqual(mock_cache.call_count, 1)
+
+    @patch("api.remove_library_listener")
+    @patch("api.add_library_listener")
+    @patch("api.library_changes")
+    def test_book_stream_pushes_commits_as_events(self, mock_library_changes, mock_add, mock_remove):
+        change = {"v": 8, "update": [[1, {"Pages Read": 30}]], "delete": [], "append": []}
+        committed = {"version": 7}
+
+        def changes_since(since):
+            version = committed["version"]
+            if version == since:
+                return version, []
+            return version, [change] if version == 8 else None
+
+        mock_library_changes.side_effect = changes_since
+
+        def commit(version):
+            committed["version"] = version
+            mock_add.call_args.args[0](version)
+
+        async def read_events():
+            events = api._book_events(7)
+            received = [await anext(events)]
+            for version in (8, 9):
+                # A commit on a worker thread wakes the stream without waiting for the next poll.
+                threading.Thread(target=commit, args=(version,)).start()
+                received.append(await asyncio.wait_for(anext(events), 1))
+            await events.aclose()
+            return received
+
+        with patch("api.STREAM_POLL_SECONDS", 60):
+            events = asyncio.run(read_events())
+
+        self.assertEqual(events[0], 'id: 7\nevent: ready\ndata: {"version":7}\n\n')
+        self.assertEqual(
+            events[1],
+            'id: 8\nevent: change\ndata: {"v":8,"update":[[1,{"Pages Read":30}]],"delete":[],"append":[]}\n\n',
+        )
+        self.assertEqual(events[2], 'id: 9\nevent: resync\ndata: {"version":9}\n\n')
+        mock_remove.assert_called_once_with(mock_add.call_args.args[0])
+
+    @patch("api.save_data")
+    @patch("api.load_data")
+    def test_batch_applies_operations_in_order_and_saves_once(self, mock_load_data, mock_save_data):
+        mock_load_data.return_value = pd.DataFrame(
+            [
+                {
+                    "Title": f"Book {i}",
+                    "Authors": "A",
+                    "ISBN/UID": str(i),
+                    "Read Status": "to-read",
+                    "Star Rating": np.nan,
+                    "Last Date Read": None,
+                    "Progress (%)": 0.0,
+                    "Pages Read": 0,
+                    "Total Pages": 100.0,
+                }
+                for i in range(3)
+            ]
+        )
+
+        response = self.client.post(
+            "/books/batch",
+            json={
+                "operations": [
+                    {"op": "add", "body": {"title": "New", "author": "B", "total_pages": 50}},
+                    {"op": "progress", "body": {"title": "new", "pages_read": 10}},
+                    {"op": "patch", "body": {"title": "Book 0", "new_title": "Book Zero"}},
+                    {"op": "finish", "body": {"title": "book zero", "rating": 5}},
+                    {"op": "dnf", "body": {"title": "Book 1"}},
+                    {"op": "remove", "body": {"title": "Book 2"}},
+                ]
+            },
+        )
+
+        self.assertEqual(response.status_code, 200)
+        results = response.json()["results"]
+        self.assertEqual([r["op"] for r in results], ["add", "progress", "patch", "finish", "dnf", "remove"])
+        self.assertEqual(results[1]["result"], {"progress": 20.0})
+        self.assertEqual(mock_save_data.call_count, 1)
+        saved = mock_save_data.call_args.args[0]
+        self.assertEqual(saved["Title"].tolist(), ["Book Zero", "Book 1", "New"])
+        self.assertEqual(saved["Read Status"].tolist(), ["read", "dnf", "to-read"])
+        self.assertEqual(saved["Pages Read"].tolist(), [0, 0, 10])
+
+    @patch("api.save_data")
+    @patch("api.load_data")
+    def test_batch_with_failing_operation_saves_nothing(self, mock_load_data, mock_save_data):
+        mock_load_data.return_value = pd.DataFrame(
+            [{"Title": "T", "Authors": "A", "Read Status": "to-read", "Star Rating": np.nan, "Total Pages": 10.0}]
+        )
+
+        response = self.client.post(
+            "/books/batch",
+            json={
+                "operations": [
+                    {"op": "dnf", "body": {"title": "T"}},
+                    {"op": "finish", "body": {"title": "Missing", "rating": 4}},
+                    {"op": "remove", "body": {"title": "T"}},
+                ]
+            },
+        )
+
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(
+            response.json()["results"],
+            [
+                {"op": "dnf", "status": 200, "result": {"message": "Book marked as DNF"}},
+                {"op": "finish", "status": 404, "detail": "Book not found"},
+            ],
+        )
+        mock_save_data.assert_not_called()
+
+        response = self.client.post("/books/batch", json={"operations": [{"op": "finish", "body": {"title": "T"}}]})
+        self.assertEqual(response.status_code, 422)
+
+    @patch("api.library_version", return_value=1)
+    @patch("api.load_data")
+    def test_metrics_reports_requests_by_route_template(self, mock_load_data, mock_library_version):
+        mock_load_data.return_value = pd.DataFrame([{"Title": "T", "Authors": "A"}])
+        self.client.get("/books")
+        self.client.get("/no-such-page")
+
+        response = self.client.get("/metrics")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.headers["content-type"].startswith("text/plain"))
+        self.assertIn('librorank_request_duration_seconds_count{method="GET",route="/books",status="200"}', response.text)
+        self.assertIn('route="unmatched",status="404"', response.text)
+        self.assertNotIn("no-such-page", response.text)
+        self.assertIn('librorank_stage_duration_seconds_count{stage="json_encode"}', response.text)
+
+    def test_encode_records_matches_generic_json_path(self):
+        df = pd.DataFrame(
+            {
+                "Title": ["Dune", 'Ünïcode "q" \\ \n\t\x01', None],
+                "ISBN/UID": ["1", 3, 4.5],
+                "Star Rating": [4.0, np.nan, 0.1 + 0.2],
+                "Last Date Read": [pd.Timestamp("2024-01-02"), pd.NaT, pd.Timestamp("2024-01-02 03:04:05.123456")],
+                "Whole Seconds": [pd.Timestamp("1999-12-31 23:59:59"), pd.NaT, pd.Timestamp("2024-01-02")],
+                "Pages Read": [1, 2, 3],
+                "Total Pages": pd.array([300, None, 120], dtype="Int64"),
+                "Progress (%)": pd.array([12.5, None, 100.0], dtype="Float64"),
+                "Mixed": pd.Series([np.int64(3), pd.Timestamp("2020-01-01"), True], dtype=object),
+            }
+        )
+        for frame in (df, df.iloc[:0], df[["Title"]]):
+            expected = JSONResponse(jsonable_encoder(api.clean_for_json(frame).to_dict(orient="records"))).body
+            self.assertEqual(api.encode_records(frame), expected)
+
+
+class TitleLoadedEditTests(unittest.TestCase):
+    """Single-book edits against a real store, with another request committing in between."""
+
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        path = Path(temp_dir.name) / "books.csv"
+        row = dict.fromkeys(BOOKS_COLUMNS, np.nan)
+        pd.DataFrame([{**row, "Title": "Old", "Read Status": "to-read"}], columns=BOOKS_COLUMNS).to_csv(path, index=False)
+        self.store = LibraryStore(CsvBackend(path))
+        for patcher in (patch("api.save_data", self.store.save), patch("api.title_index", self.store.title_index)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.client = TestClient(api.app)
+
+    def _added_after_loading(self, title):
+        # The edit's frame is loaded before ``title`` exists; another request then adds it.
+        def load_data(**kwargs):
+            df = self.store.load(**kwargs)
+            self.store.save(append_rows(self.store.load(), [{"Title": title, "Read Status": "to-read"}]))
+            return df
+
+        return patch("api.load_data", side_effect=load_data)
+
+    def test_book_added_after_the_frame_was_loaded_is_a_conflict(self):
+        with self._added_after_loading("New"):
+            finished = self.client.patch("/books/finish", json={"title": "New", "rating": 5})
+        self.assertEqual(finished.status_code, 409)
+        with self._added_after_loading("Newer"):
+            removed = self.client.request("DELETE", "/books", params={"title": "Newer"})
+        self.assertEqual(removed.status_code, 409)
+
+        library = self.store.load(readonly=True)
+        self.assertEqual(library["Title"].tolist(), ["Old", "New", "Newer"])
+        self.assertEqual(library["Read Status"].tolist(), ["to-read"] * 3)
+
+    def test_rename_onto_a_book_added_after_the_frame_was_loaded_is_refused(self):
+        with self._added_after_loading("New"):
+            response = self.client.patch("/books", json={"title": "Old", "new_title": "New"})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.store.load(readonly=True)["Title"].tolist(), ["Old", "New"])
 
 
 if __name__ == "__main__":
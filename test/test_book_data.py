@@ -0,0 +1,666 @@
+import importlib.util
+import json
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+
+import book_data
+from book_data import (
+    BOOKS_COLUMNS,
+    ArrowBackend,
+    CsvBackend,
+    LibraryConflictError,
+    LibraryStore,
+    SqliteBackend,
+    append_rows,
+    migrate_csv_to_arrow,
+    migrate_csv_to_sqlite,
+    normalize_title,
+)
+from library_files import disk_version
+from preprocess.book_ids import book_ids
+from preprocess.normalize import normalize_rating
+from ranking.similarity import LibraryContent
+
+
+def _row(title, **overrides):
+    row = {
+        "Title": title,
+        "Authors": "Author",
+        "ISBN/UID": "1",
+        "Read Status": "to-read",
+        "Star Rating": np.nan,
+        "Last Date Read": None,
+        "Progress (%)": 0,
+        "Pages Read": 0,
+        "Total Pages": 100,
+    }
+    row.update(overrides)
+    return row
+
+
+class LibraryStoreTests(unittest.TestCase):
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.path = Path(temp_dir.name) / "books.csv"
+        pd.DataFrame([_row("A"), _row("B"), _row("C")], columns=BOOKS_COLUMNS).to_csv(self.path, index=False)
+
+    def _journal_entries(self, store):
+        lines = store.backend.journal_path.read_text(encoding="utf-8").splitlines()
+        return [json.loads(line) for line in lines[1:]]
+
+    def test_single_row_edit_is_journaled_without_rewriting_snapshot(self):
+        store = LibraryStore(CsvBackend(self.path))
+        snapshot_before = self.path.read_bytes()
+
+        df = store.load()
+        df.loc[df["Title"] == "B", "Read Status"] = "read"
+        df.loc[df["Title"] == "B", "Star Rating"] = 4.0
+        store.save(df)
+
+        self.assertEqual(self.path.read_bytes(), snapshot_before)
+        entries = self._journal_entries(store)
+        self.assertEqual(len(entries), 1)
+        self.assertEqual(entries[0]["update"], [[1, {"Read Status": "read", "Star Rating": 4.0}]])
+        self.assertEqual(store.version, 1)
+
+    def test_fresh_store_replays_journal(self):
+        store = LibraryStore(CsvBackend(self.path))
+        df = store.load()
+        df = df[df["Title"] != "A"].copy()
+        store.save(df)
+        df = store.load()
+        df = pd.concat([df, pd.DataFrame([_row("D", **{"Last Date Read": pd.Timestamp("2024-02-03")})])], ignore_index=True)
+        store.save(df)
+        df = store.load()
+        df.loc[df["Title"] == "C", "Authors"] = "Someone Else"
+        store.save(df)
+
+        replayed = LibraryStore(CsvBackend(self.path)).load()
+        self.assertEqual(replayed["Title"].tolist(), ["B", "C", "D"])
+        self.assertEqual(replayed.loc[1, "Authors"], "Someone Else")
+        self.assertEqual(replayed.loc[2, "Last Date Read"], pd.Timestamp("2024-02-03"))
+        self.assertEqual(LibraryStore(CsvBackend(self.path)).version, 3)
+
+    def test_journaled_dates_survive_a_restart_next_to_snapshot_dates(self):
+        rows = [_row("A", **{"Read Status": "read", "Last Date Read": "2024-01-01"}), _row("B"), _row("C")]
+        pd.DataFrame(rows, columns=BOOKS_COLUMNS).to_csv(self.path, index=False)
+        store = LibraryStore(CsvBackend(self.path))
+        df = store.load()
+        df.loc[1, "Read Status"] = "read"
+        df.loc[1, "Last Date Read"] = pd.Timestamp("2024-03-05")
+        store.save(df)
+        store.save(append_rows(store.load(), [_row("D", **{"Last Date Read": pd.Timestamp("2024-04-01 10:30")})]))
+
+        expected = [pd.Timestamp("2024-01-01"), pd.Timestamp("2024-03-05"), pd.NaT, pd.Timestamp("2024-04-01 10:30")]
+        replayed = LibraryStore(CsvBackend(self.path)).load()
+        self.assertEqual(replayed["Last Date Read"].tolist(), expected)
+
+    def test_journal_is_compacted_into_snapshot(self):
+        store = LibraryStore(CsvBackend(self.path, compact_threshold=2))
+        for pages in (10, 20):
+            df = store.load()
+            df.loc[0, "Pages Read"] = pages
+            store.save(df)
+
+        self.assertEqual(self._journal_entries(store), [])
+        on_disk = pd.read_csv(self.path)
+        self.assertEqual(on_disk.loc[0, "Pages Read"], 20)
+        self.assertEqual(LibraryStore(CsvBackend(self.path)).load().loc[0, "Pages Read"], 20)
+
+    def test_stale_journal_is_ignored_after_snapshot_rewrite(self):
+        store = LibraryStore(CsvBackend(self.path))
+        df = store.load()
+        df.loc[0, "Pages Read"] = 50
+        store.save(df)
+        stale_journal = store.backend.journal_path.read_bytes()
+        store.compact()
+        # Simulate a crash between the snapshot replace and the journal reset.
+        store.backend.journal_path.write_bytes(stale_journal)
+
+        reloaded = LibraryStore(CsvBackend(self.path))
+        self.assertEqual(reloaded.load()["Pages Read"].tolist(), [50, 0, 0])
+        # Indistinguishable from a hand-edited snapshot, so it counts as a new version.
+        self.assertEqual(reloaded.version, 2)
+
+    def test_hand_edited_snapshot_is_a_new_version(self):
+        store = LibraryStore(CsvBackend(self.path))
+        for edited in ("A", "B"):
+            version = store.version
+            df = pd.read_csv(self.path)
+            df.loc[0, "Title"] = f"Edited {edited}"
+            df.to_csv(self.path, index=False)
+            self.assertEqual(disk_version("csv", self.path), version + 1)
+            self.assertEqual(store.load()["Title"].tolist()[0], f"Edited {edited}")
+            self.assertEqual(store.version, version + 1)
+            self.assertEqual(disk_version("csv", self.path), version + 1)
+            self.assertEqual(LibraryStore(CsvBackend(self.path)).version, version + 1)
+
+    def test_concurrent_saves_from_same_version_are_merged(self):
+        store = LibraryStore(CsvBackend(self.path))
+        first = store.load()
+        second = store.load()
+
+        first.loc[first["Title"] == "C", "Pages Read"] = 30
+        store.save(first)
+        second.loc[second["Title"] == "C", "Authors"] = "Co-author"
+        second = second[second["Title"] != "A"].copy()
+        second = append_rows(second, [_row("D")])
+        store.save(second)
+
+        df = store.load()
+        self.assertEqual(df["Title"].tolist(), ["B", "C", "D"])
+        self.assertEqual(df["Pages Read"].tolist(), [0, 30, 0])
+        self.assertEqual(df["Authors"].tolist(), ["Author", "Co-author", "Author"])
+        self.assertEqual(LibraryStore(CsvBackend(self.path)).load()["Title"].tolist(), ["B", "C", "D"])
+
+    def test_threaded_appends_are_all_committed(self):
+        store = LibraryStore(CsvBackend(self.path))
+        barrier = threading.Barrier(8)
+
+        def add(title):
+            df = store.load()
+            barrier.wait()
+            store.save(append_rows(df, [_row(title)]))
+
+        threads = [threading.Thread(target=add, args=(f"T{i}",)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        titles = LibraryStore(CsvBackend(self.path)).load()["Title"].tolist()
+        self.assertEqual(sorted(titles[3:]), [f"T{i}" for i in range(8)])
+        self.assertEqual(store.version, 8)
+
+    def test_many_interleaved_writers_keep_each_others_edits(self):
+        writers = 40
+        pd.DataFrame([_row(f"T{i}") for i in range(writers)], columns=BOOKS_COLUMNS).to_csv(self.path, index=False)
+        store = LibraryStore(CsvBackend(self.path))
+        barrier = threading.Barrier(writers)
+
+        def edit(i):
+            df = store.load()
+            barrier.wait()
+            df.loc[i, "Authors"] = f"Author {i}"
+            store.save(df)
+            df = store.load()
+            df.loc[i, "Pages Read"] = i
+            store.save(df)
+
+        threads = [threading.Thread(target=edit, args=(i,)) for i in range(writers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        df = LibraryStore(CsvBackend(self.path)).load()
+        self.assertEqual(df["Authors"].tolist(), [f"Author {i}" for i in range(writers)])
+        self.assertEqual(df["Pages Read"].tolist(), list(range(writers)))
+
+    def test_frame_without_its_base_is_rejected(self):
+        store = LibraryStore(CsvBackend(self.path))
+        df = store.load()
+        del df.attrs["library_base"]
+        df.loc[0, "Pages Read"] = 5
+        with self.assertRaises(LibraryConflictError):
+            store.save(df)
+
+    def test_frame_loaded_by_title_commits_only_its_row(self):
+        store = LibraryStore(CsvBackend(self.path))
+        df = store.load(titles=(" b ",))
+        self.assertEqual(df["Title"].tolist(), ["B"])
+        other = store.load()
+        other.loc[2, "Authors"] = "Co-author"
+        store.save(other)
+        before = store.load(readonly=True)
+
+        titles = store.title_index(df)
+        self.assertEqual(titles.get("c"), 2)
+        df.loc[titles.get("B"), "Pages Read"] = 40
+        store.save(df)
+
+        after = store.load(readonly=True)
+        self.assertEqual(after["Pages Read"].tolist(), [0, 40, 0])
+        self.assertEqual(after["Authors"].tolist(), ["Author", "Author", "Co-author"])
+        # Columns the edit did not touch are shared with the previous version, not copied.
+        self.assertTrue(np.shares_memory(before["Total Pages"].to_numpy(), after["Total Pages"].to_numpy()))
+        self.assertEqual(self._journal_entries(store)[-1]["update"], [[1, {"Pages Read": 40}]])
+
+        df = store.load(titles=("A", "missing"))
+        store.save(df.drop(index=0))
+        self.assertEqual(store.load()["Title"].tolist(), ["B", "C"])
+
+    def test_ids_survive_a_csv_round_trip(self):
+        pd.DataFrame(
+            [_row("A", **{"ISBN/UID": "0441013597"}), _row("B", **{"ISBN/UID": "0012345678901234"})],
+            columns=BOOKS_COLUMNS,
+        ).to_csv(self.path, index=False)
+        store = LibraryStore(CsvBackend(self.path))
+        store.save(append_rows(store.load(), [_row("C", **{"ISBN/UID": book_ids(["C"], ["Author"])[0]})]))
+        store.compact()
+
+        ids = LibraryStore(CsvBackend(self.path)).load()["ISBN/UID"].tolist()
+        self.assertEqual(ids, ["0441013597", "0012345678901234", book_ids(["C"], ["Author"])[0]])
+        self.assertTrue(all(isinstance(value, str) for value in ids))
+
+    def test_read_only_load_shares_resident_columns(self):
+        store = LibraryStore(CsvBackend(self.path))
+        view = store.load(readonly=True)
+        self.assertTrue(np.shares_memory(view["Pages Read"].to_numpy(), store.load(readonly=True)["Pages Read"].to_numpy()))
+        self.assertFalse(np.shares_memory(view["Pages Read"].to_numpy(), store.load()["Pages Read"].to_numpy()))
+
+        df = store.load(titles=("B",))
+        df.at[1, "Pages Read"] = 40
+        store.save(df)
+        after = store.load(readonly=True)
+        # The edited column is a new array; the earlier view keeps the old values.
+        self.assertEqual(view["Pages Read"].tolist(), [0, 0, 0])
+        self.assertEqual(after["Pages Read"].tolist(), [0, 40, 0])
+        self.assertFalse(np.shares_memory(view["Pages Read"].to_numpy(), after["Pages Read"].to_numpy()))
+        self.assertTrue(np.shares_memory(view["Total Pages"].to_numpy(), after["Total Pages"].to_numpy()))
+
+    def test_authors_and_statuses_stay_interned_through_edits(self):
+        store = LibraryStore(CsvBackend(self.path))
+        df = store.load()
+        self.assertFalse(isinstance(df["Authors"].dtype, pd.CategoricalDtype))
+        df.at[0, "Authors"] = " New Author "
+        df.at[1, "Read Status"] = "Read"
+        store.save(append_rows(df, [_row("D", Authors="Another", **{"Read Status": " DNF"})]))
+
+        df = store.load(readonly=True)
+        for col in ("Authors", "Read Status"):
+            self.assertIsInstance(df[col].dtype, pd.CategoricalDtype)
+        self.assertEqual(df["Authors"].tolist(), ["New Author", "Author", "Author", "Another"])
+        self.assertEqual(df["Read Status"].tolist(), ["to-read", "read", "to-read", "dnf"])
+        self.assertEqual(LibraryStore(CsvBackend(self.path)).load(readonly=True)["Read Status"].tolist(), df["Read Status"].tolist())
+
+    def test_title_index_follows_changes(self):
+        store = LibraryStore(CsvBackend(self.path))
+        df = store.load()
+        self.assertEqual(store.title_index(df).get("  b "), 1)
+
+        df.at[1, "Title"] = "Dune   Messiah"
+        df = append_rows(df.drop(index=0), [_row("a"), _row("C")])
+        store.save(df)
+
+        titles = store.title_index(store.load())
+        self.assertIsNone(titles.get("B"))
+        self.assertEqual(titles.get("dune messiah"), 1)
+        self.assertEqual(titles.get("A"), 3)
+        # The first of two rows sharing a title wins, and the second takes over when it goes.
+        self.assertEqual(titles.get("c"), 2)
+        df = store.load()
+        store.save(df.drop(index=2))
+        self.assertEqual(store.title_index(store.load()).get("c"), 4)
+
+    def test_title_index_of_stale_frame_checks_the_frame(self):
+        store = LibraryStore(CsvBackend(self.path))
+        stale = store.load()
+        df = store.load()
+        df.at[0, "Title"] = "Renamed"
+        store.save(append_rows(df, [_row("D")]))
+
+        titles = store.title_index(stale)
+        self.assertEqual(titles.get("a"), 0)
+        self.assertIsNone(titles.get("renamed"))
+        self.assertIsNone(titles.get("D"))
+        self.assertEqual(normalize_title(" The\tHobbit "), "the hobbit")
+
+    def test_change_log_replays_onto_an_earlier_list(self):
+        store = LibraryStore(CsvBackend(self.path))
+        since = store.version
+        df = store.load()
+        df.at[2, "Last Date Read"] = pd.Timestamp("2024-02-03")
+        store.save(append_rows(df.drop(index=0), [_row("D")]))
+        df = store.load()
+        df.at[3, "Pages Read"] = 12
+        store.save(df)
+
+        version, changes = store.changes(since)
+        self.assertEqual(version, 2)
+        self.assertEqual([change["v"] for change in changes], [1, 2])
+        self.assertEqual(changes[0]["update"], [[2, {"Last Date Read": pd.Timestamp("2024-02-03")}]])
+        self.assertEqual(changes[0]["delete"], [0])
+        self.assertEqual([row["Title"] for row in changes[0]["append"]], ["D"])
+        self.assertEqual(changes[1]["update"], [[2, {"Pages Read": 12}]])
+        self.assertEqual(store.changes(1)[1], changes[1:])
+        self.assertEqual(store.changes(2), (2, []))
+        self.assertIsNone(store.changes(3)[1])
+
+    def test_change_log_is_dropped_when_library_is_replaced(self):
+        store = LibraryStore(CsvBackend(self.path))
+        df = store.load()
+        df.at[0, "Pages Read"] = 10
+        store.save(df)
+        # A frame that did not come from load() replaces the library wholesale.
+        store.save(pd.DataFrame([_row("X")], columns=BOOKS_COLUMNS))
+
+        version, changes = store.changes(0)
+        self.assertEqual(version, 2)
+        self.assertIsNone(changes)
+        self.assertEqual(store.changes(2), (2, []))
+
+    def test_listeners_hear_every_new_version(self):
+        store = LibraryStore(CsvBackend(self.path))
+        heard = []
+        store.add_listener(heard.append)
+        store.save(append_rows(store.load(), [_row("D")]))
+        store.save(pd.DataFrame([_row("X")], columns=BOOKS_COLUMNS))
+        store.remove_listener(heard.append)
+        store.save(append_rows(store.load(), [_row("E")]))
+        self.assertEqual(heard, [1, 2])
+
+    def test_failing_listener_does_not_fail_the_save(self):
+        store = LibraryStore(CsvBackend(self.path))
+
+        def broken(*args):
+            raise RuntimeError("event loop is closed")
+
+        heard = []
+        store.add_listener(broken)
+        store.add_listener(heard.append)
+        store.add_change_listener(broken)
+        with self.assertLogs("book_data", "ERROR"):
+            store.save(append_rows(store.load(), [_row("D")]))
+        self.assertEqual(heard, [1])
+        self.assertEqual(LibraryStore(CsvBackend(self.path)).load()["Title"].tolist(), ["A", "B", "C", "D"])
+
+    def test_author_scores_follow_changes(self):
+        def rebuilt(store):
+            # What score_tbr_books would aggregate from the freshly normalized library.
+            df = normalize_rating(store.load(readonly=True).copy())
+            read = df[df["Read Status"] == "read"]
+            return read.groupby("Authors")["rating_norm"].mean().to_dict(), read["rating_norm"].mean()
+
+        def check(store):
+            scores, global_score = store.author_scores()
+            expected, expected_global = rebuilt(store)
+            self.assertEqual(scores.keys(), expected.keys())
+            for author, score in expected.items():
+                self.assertAlmostEqual(scores[author], score)
+            self.assertAlmostEqual(global_score, expected_global)
+
+        pd.DataFrame(
+            [
+                _row("A", **{"Read Status": "read", "Star Rating": 4, "Authors": "Le Guin"}),
+                _row("B", **{"Read Status": "read", "Authors": "Le Guin"}),
+                _row("C", **{"Read Status": "read", "Star Rating": 2, "Authors": "Herbert"}),
+                _row("D", **{"Authors": "Herbert"}),
+                _row("E", **{"Read Status": "dnf", "Star Rating": 1, "Authors": "Banks"}),
+            ],
+            columns=BOOKS_COLUMNS,
+        ).to_csv(self.path, index=False)
+        store = LibraryStore(CsvBackend(self.path))
+        check(store)
+
+        df = store.load()
+        df.at[3, "Read Status"] = "read"
+        df.at[3, "Star Rating"] = 5
+        df.at[0, "Star Rating"] = 3
+        df = append_rows(df.drop(index=2), [_row("F", **{"Read Status": "read", "Star Rating": 1, "Authors": "Banks"})])
+        store.save(df)
+        check(store)
+
+        df = store.load()
+        store.save(df.drop(index=df.index[df["Read Status"] == "read"]))
+        self.assertEqual(store.author_scores(), ({}, 0.5))
+
+    def test_author_scores_are_scaled_by_every_rated_book(self):
+        pd.DataFrame(
+            [
+                _row("A", **{"Read Status": "read", "Star Rating": 5, "Authors": "Ann"}),
+                _row("B", **{"Read Status": "read", "Star Rating": 3, "Authors": "Bob"}),
+                _row("C", **{"Read Status": "dnf", "Star Rating": 1, "Authors": "Cy"}),
+            ],
+            columns=BOOKS_COLUMNS,
+        ).to_csv(self.path, index=False)
+        store = LibraryStore(CsvBackend(self.path))
+        # Ratings span 1-5 because the DNF book's rating counts, as in normalize_rating.
+        self.assertEqual(store.author_scores(), ({"Ann": 1.0, "Bob": 0.5}, 0.75))
+
+    def test_content_scores_follow_changes(self):
+        store = LibraryStore(CsvBackend(self.path))
+        content = LibraryContent()
+        store.add_change_listener(content)
+        self.assertTrue(content.scores().empty)
+        df = store.load()
+        df.at[0, "Title"] = "Dune"
+        df.at[0, "Read Status"] = "read"
+        df.at[0, "Star Rating"] = 5
+        store.save(df)
+        self.assertEqual(set(content.scores().index), {0, 1, 2})
+
+        df = store.load()
+        df.at[1, "Authors"] = "Someone Else"
+        df = append_rows(df.drop(index=2), [_row("Dune Messiah", Authors="Someone Else")])
+        store.save(df)
+        self.assertEqual(set(content.scores().index), {0, 3})
+
+        def by_title(store, content):
+            titles = store.load(readonly=True)["Title"]
+            return {titles[row_id]: score for row_id, score in content.scores().items()}
+
+        # A listener added to a loaded store starts from the whole library.
+        reopened, rebuilt = LibraryStore(CsvBackend(self.path)), LibraryContent()
+        reopened.load(readonly=True)
+        reopened.add_change_listener(rebuilt)
+        scores, rebuilt = by_title(store, content), by_title(reopened, rebuilt)
+        self.assertEqual(scores.keys(), rebuilt.keys())
+        for title, score in rebuilt.items():
+            self.assertAlmostEqual(scores[title], score)
+
+    def test_change_listeners_see_row_ids(self):
+        store = LibraryStore(CsvBackend(self.path))
+        seen = []
+        store.add_change_listener(lambda version, library, change: seen.append((version, len(library), change)))
+        df = store.load()
+        df.at[1, "Pages Read"] = 12
+        store.save(append_rows(df.drop(index=0), [_row("D")]))
+        self.assertEqual(
+            seen,
+            [(0, 3, None), (1, 3, {"update": [(1, {"Pages Read": 12})], "delete": [0], "append": [3]})],
+        )
+
+
+class BooksCacheTests(unittest.TestCase):
+    @patch.object(book_data, "_cached_books_at", None)
+    @patch.object(book_data, "_cached_books_version", None)
+    @patch("book_data.write_books_cache")
+    @patch("book_data.time.monotonic")
+    def test_cached_response_is_rewritten_at_most_once_per_interval(self, mock_monotonic, mock_write):
+        for now, version in ((100.0, 1), (110.0, 2), (120.0, 3), (161.0, 3), (170.0, 4)):
+            mock_monotonic.return_value = now
+            book_data.cache_books_response(version, f"body {version}".encode())
+        self.assertEqual([call.args[2:] for call in mock_write.call_args_list], [(1, b"body 1"), (3, b"body 3")])
+
+
+class CrossProcessTests(unittest.TestCase):
+    """Two stores on the same files stand in for two worker processes."""
+
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.path = Path(temp_dir.name) / "books.csv"
+        pd.DataFrame([_row("A"), _row("B"), _row("C")], columns=BOOKS_COLUMNS).to_csv(self.path, index=False)
+
+    def test_other_workers_commits_are_replayed_from_journal_tail(self):
+        first = LibraryStore(CsvBackend(self.path))
+        second = LibraryStore(CsvBackend(self.path))
+        stale = second.load()
+
+        df = first.load()
+        df.loc[df["Title"] == "B", "Pages Read"] = 40
+        first.save(append_rows(df[df["Title"] != "A"], [_row("D")]))
+
+        df = second.load()
+        self.assertEqual(df["Title"].tolist(), ["B", "C", "D"])
+        self.assertEqual(df["Pages Read"].tolist(), [40, 0, 0])
+        self.assertEqual(second.version, 1)
+        # Frames loaded before the replay still diff cleanly on top of it.
+        stale.loc[stale["Title"] == "C", "Authors"] = "Co-author"
+        second.save(stale)
+
+        df = first.load()
+        self.assertEqual(df["Title"].tolist(), ["B", "C", "D"])
+        self.assertEqual(df["Authors"].tolist(), ["Author", "Co-author", "Author"])
+        self.assertEqual(first.version, 2)
+        self.assertEqual([change["v"] for change in second.changes(0)[1]], [1, 2])
+
+    def test_compaction_by_other_worker_is_adopted_without_reload(self):
+        first = LibraryStore(CsvBackend(self.path))
+        second = LibraryStore(CsvBackend(self.path))
+        df = first.load()
+        df.loc[0, "Pages Read"] = 10
+        first.save(df)
+        stale = second.load()
+
+        first.compact()
+        stale.loc[stale["Title"] == "C", "Pages Read"] = 30
+        second.save(stale)
+
+        self.assertEqual(first.load()["Pages Read"].tolist(), [10, 0, 30])
+        self.assertEqual(LibraryStore(CsvBackend(self.path)).load()["Pages Read"].tolist(), [10, 0, 30])
+
+    def test_frames_from_before_a_reload_are_rejected(self):
+        first = LibraryStore(CsvBackend(self.path))
+        second = LibraryStore(CsvBackend(self.path))
+        stale = second.load()
+
+        df = first.load()
+        df.loc[0, "Pages Read"] = 10
+        first.save(df)
+        first.compact()
+
+        # second never saw version 1, so it has to re-read the compacted snapshot.
+        self.assertEqual(second.load()["Pages Read"].tolist(), [10, 0, 0])
+        stale.loc[0, "Pages Read"] = 99
+        with self.assertRaises(LibraryConflictError):
+            second.save(stale)
+        self.assertEqual(first.load()["Pages Read"].tolist(), [10, 0, 0])
+
+
+class SqliteBackendTests(unittest.TestCase):
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.csv_path = Path(temp_dir.name) / "books.csv"
+        self.db_path = Path(temp_dir.name) / "books.sqlite3"
+        pd.DataFrame([_row("A"), _row("B"), _row("C")], columns=BOOKS_COLUMNS).to_csv(self.csv_path, index=False)
+
+    def test_migrate_then_edit_round_trips(self):
+        self.assertEqual(migrate_csv_to_sqlite(self.csv_path, self.db_path), 3)
+        with self.assertRaises(ValueError):
+            migrate_csv_to_sqlite(self.csv_path, self.db_path)
+
+        store = LibraryStore(SqliteBackend(self.db_path))
+        df = store.load()
+        df.loc[df["Title"] == "B", "Read Status"] = "read"
+        df.loc[df["Title"] == "B", "Last Date Read"] = pd.Timestamp("2024-03-04")
+        df = df[df["Title"] != "A"].copy()
+        store.save(append_rows(df, [_row("D")]))
+
+        reloaded = LibraryStore(SqliteBackend(self.db_path))
+        df = reloaded.load()
+        self.assertEqual(df["Title"].tolist(), ["B", "C", "D"])
+        self.assertEqual(df["Read Status"].tolist(), ["read", "to-read", "to-read"])
+        self.assertEqual(df["Last Date Read"].iloc[0], pd.Timestamp("2024-03-04"))
+        self.assertEqual(reloaded.version, 1)
+        self.assertEqual(reloaded.load(statuses=("read",))["Title"].tolist(), ["B"])
+
+    def test_database_uses_wal_and_indexes(self):
+        backend = SqliteBackend(self.db_path)
+        self.assertEqual(backend.conn.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+        indexes = {row[1] for row in backend.conn.execute("PRAGMA index_list(books)")}
+        self.assertTrue({"books_title", "books_read_status"} <= indexes)
+
+    def test_other_connections_commits_are_seen(self):
+        migrate_csv_to_sqlite(self.csv_path, self.db_path)
+        first = LibraryStore(SqliteBackend(self.db_path))
+        second = LibraryStore(SqliteBackend(self.db_path))
+        stale = second.load()
+
+        first.save(append_rows(first.load(), [_row("D")]))
+        second.save(append_rows(stale, [_row("E")]))
+
+        self.assertEqual(first.load()["Title"].tolist(), ["A", "B", "C", "D", "E"])
+        self.assertEqual(second.version, 2)
+
+
+    def test_other_connections_commits_are_replayed_row_by_row(self):
+        migrate_csv_to_sqlite(self.csv_path, self.db_path)
+        first = LibraryStore(SqliteBackend(self.db_path))
+        second = LibraryStore(SqliteBackend(self.db_path))
+        second.load()
+
+        df = first.load()
+        df.at[1, "Last Date Read"] = pd.Timestamp("2024-03-04")
+        df.at[1, "Star Rating"] = 4
+        first.save(append_rows(df.drop(index=2), [_row("D")]))
+        df = first.load()
+        df.at[3, "Pages Read"] = 12
+        first.save(df)
+
+        with patch.object(second.backend, "read", side_effect=AssertionError("read the whole table")):
+            replayed = second.load()
+        pd.testing.assert_frame_equal(replayed, first.load())
+        fresh = LibraryStore(SqliteBackend(self.db_path)).load()
+        dates = "Last Date Read"
+        pd.testing.assert_frame_equal(replayed, fresh.astype({dates: replayed[dates].dtype}))
+        self.assertEqual(replayed.index.tolist(), [0, 1, 3])
+        self.assertEqual(second.version, 2)
+
+        # Once the commits are trimmed from the table, the whole library is read again.
+        first.backend.changes_kept = 1
+        for pages in (20, 30):
+            df = first.load()
+            df.at[3, "Pages Read"] = pages
+            first.save(df)
+        third = LibraryStore(SqliteBackend(self.db_path))
+        third.load()
+        first.save(append_rows(first.load(), [_row("E")]))
+        self.assertEqual(third.load()["Title"].tolist(), ["A", "B", "D", "E"])
+        self.assertEqual(second.load()["Pages Read"].tolist(), [0, 0, 30, 0])
+
+@unittest.skipUnless(importlib.util.find_spec("pyarrow"), "pyarrow is not installed")
+class ArrowBackendTests(unittest.TestCase):
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.csv_path = Path(temp_dir.name) / "books.csv"
+        self.arrow_path = Path(temp_dir.name) / "books.arrow"
+        rows = [_row("A", **{"Read Status": "read", "Last Date Read": "2024-01-02"}), _row("B")]
+        pd.DataFrame(rows, columns=BOOKS_COLUMNS).to_csv(self.csv_path, index=False)
+
+    def test_snapshot_is_typed(self):
+        import pyarrow as pa
+
+        migrate_csv_to_arrow(self.csv_path, self.arrow_path)
+        with pa.memory_map(str(self.arrow_path)) as source:
+            schema = pa.ipc.open_file(source).schema
+        self.assertEqual(schema.field("Last Date Read").type, pa.timestamp("us"))
+        self.assertTrue(pa.types.is_dictionary(schema.field("Read Status").type))
+
+    def test_journal_and_compaction_round_trip(self):
+        migrate_csv_to_arrow(self.csv_path, self.arrow_path)
+        store = LibraryStore(ArrowBackend(self.arrow_path, compact_threshold=2))
+        df = store.load()
+        df.loc[df["Title"] == "B", "Pages Read"] = 12
+        store.save(df)
+        self.assertEqual(LibraryStore(ArrowBackend(self.arrow_path)).load()["Pages Read"].tolist(), [0, 12])
+
+        store.save(append_rows(store.load(), [_row("C")]))
+        reloaded = LibraryStore(ArrowBackend(self.arrow_path)).load()
+        self.assertEqual(reloaded["Title"].tolist(), ["A", "B", "C"])
+        self.assertEqual(reloaded["Last Date Read"].iloc[0], pd.Timestamp("2024-01-02"))
+        self.assertEqual(self.arrow_path.with_name("books.arrow.journal").read_text().count("\n"), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
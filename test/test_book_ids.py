@@ -0,0 +1,45 @@
+import unittest
+
+import pandas as pd
+
+from preprocess.book_ids import book_ids
+from preprocess.clean_books import clean_books
+
+
+class BookIdTests(unittest.TestCase):
+    def test_ids_depend_only_on_normalized_title_and_author(self):
+        ids = book_ids(
+            pd.Series(["Dune", "  dune ", "Dune", "Emma"], index=[10, 11, 12, 13]),
+            ["Frank Herbert", "FRANK  HERBERT", "Brian Herbert", "Jane Austen"],
+        )
+        self.assertEqual(ids.index.tolist(), [10, 11, 12, 13])
+        self.assertEqual(ids[10], ids[11])
+        self.assertNotEqual(ids[10], ids[12])
+        self.assertRegex(ids[13], r"^[0-9a-f]{16}$")
+        self.assertEqual(book_ids(["Emma"], ["Jane Austen"])[0], ids[13])
+
+    def test_isbn_takes_precedence(self):
+        ids = book_ids(
+            ["A", "B", "C", "D", "E"],
+            ["X", "X", "X", "X", "X"],
+            ["978-0-441-01359-3", " 0 441 01359 x ", 9780441013593.0, "uid-7", "  "],
+        )
+        self.assertEqual(ids[:4].tolist(), ["9780441013593", "044101359X", "9780441013593", "uid-7"])
+        self.assertEqual(ids[4], book_ids(["E"], ["X"])[0])
+
+    def test_clean_books_gives_the_same_ids_on_every_run(self):
+        df = pd.DataFrame(
+            {
+                "title": ["Dune", "Emma", "Persuasion"],
+                "author": ["Frank Herbert", "Jane Austen", None],
+                "book_id": [None, "", "9780141439686"],
+            }
+        )
+        first, second = clean_books(df), clean_books(df)
+        self.assertEqual(first["book_id"].tolist(), second["book_id"].tolist())
+        self.assertEqual(first["book_id"].iloc[2], "9780141439686")
+        self.assertTrue(first["book_id"].is_unique)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -4,7 +4,7 @@ import unittest
 from pathlib import Path
 
 from ingest.load_csv import load_csv
-from ingest.pipeline import run_flexible_pipeline, validate_uploaded_csv
+from ingest.pipeline import run_flexible_pipeline, run_streaming_pipeline, validate_uploaded_csv
 
 
 class FlexiblePipelineTests(unittest.TestCase):
@@ -129,6 +129,37 @@ class FlexiblePipelineTests(unittest.TestCase):
         self.assertIn("score", result["tbr_ranked"].columns)
         self.assertGreaterEqual(len(result["read_ranked"]), 1)
 
+    def test_streaming_pipeline_matches_in_memory_ranking(self):
+        statuses = ["read", "to-read", "dnf", "to-read"]
+        rows = [
+            {
+                "Title": f"Book {i}",
+                "Authors": f"Author {i % 7}",
+                "Read Status": statuses[i % 4],
+                "Star Rating": str(i % 5 + 1) if i % 3 else "",
+                "Last Date Read": f"2024-0{i % 9 + 1}-15" if i % 4 == 0 else "",
+            }
+            for i in range(60)
+        ]
+        temp_dir, csv_path = self._write_csv(rows)
+        self.addCleanup(temp_dir.cleanup)
+
+        full = run_flexible_pipeline(csv_path)
+        streamed = run_streaming_pipeline(csv_path, k=4, chunksize=9)
+
+        self.assertEqual(streamed["validation"]["status"], "accept")
+        self.assertEqual(
+            streamed["read_ranked"]["score"].round(9).tolist(),
+            full["read_ranked"]["score"].head(4).round(9).tolist(),
+        )
+        tbr = streamed["tbr_ranked"]
+        self.assertEqual(len(tbr), 4)
+        self.assertTrue(tbr["author"].is_unique)
+        self.assertTrue(tbr["score"].is_monotonic_decreasing)
+        author_scores = full["tbr_ranked"].set_index("author")["author_score"]
+        for author, score in zip(tbr["author"], tbr["author_score"]):
+            self.assertAlmostEqual(score, author_scores[author])
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,36 @@
+import unittest
+
+from metrics import LATENCY_BUCKETS, REQUEST_SECONDS, STAGE_SECONDS, WRITE_BYTES, Registry
+
+
+class RegistryTests(unittest.TestCase):
+    def test_histograms_render_cumulative_buckets(self):
+        registry = Registry()
+        registry.observe(STAGE_SECONDS, 0.002, stage="scoring")
+        registry.observe(STAGE_SECONDS, 0.3, stage="scoring")
+        registry.observe(STAGE_SECONDS, 30.0, stage="scoring")
+
+        lines = registry.render().splitlines()
+        self.assertIn("# TYPE librorank_stage_duration_seconds histogram", lines)
+        buckets = [line for line in lines if line.startswith("librorank_stage_duration_seconds_bucket")]
+        self.assertEqual(len(buckets), len(LATENCY_BUCKETS) + 1)
+        self.assertIn('librorank_stage_duration_seconds_bucket{stage="scoring",le="0.001"} 0', buckets)
+        self.assertIn('librorank_stage_duration_seconds_bucket{stage="scoring",le="0.0025"} 1', buckets)
+        self.assertIn('librorank_stage_duration_seconds_bucket{stage="scoring",le="0.5"} 2', buckets)
+        self.assertIn('librorank_stage_duration_seconds_bucket{stage="scoring",le="+Inf"} 3', buckets)
+        self.assertIn('librorank_stage_duration_seconds_count{stage="scoring"} 3', lines)
+        self.assertIn('librorank_stage_duration_seconds_sum{stage="scoring"} 30.302', lines)
+
+    def test_counters_add_up_and_labels_are_escaped(self):
+        registry = Registry()
+        registry.inc(WRITE_BYTES, 100, file="journal")
+        registry.inc(WRITE_BYTES, 50, file="journal")
+        registry.observe(REQUEST_SECONDS, 0.01, method="GET", route='/odd"path', status="200")
+
+        text = registry.render()
+        self.assertIn('librorank_write_bytes_total{file="journal"} 150\n', text)
+        self.assertIn('route="/odd\\"path"', text)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from preprocess.normalize import (
+    FEATURE_COLUMNS,
+    add_features,
+    build_features,
+    compute_recency,
+    compute_score,
+    normalize_rating,
+)
+
+
+class FeatureBuilderTests(unittest.TestCase):
+    def setUp(self):
+        self.today = pd.Timestamp("2026-01-01")
+        self.df = pd.DataFrame(
+            {
+                "Star Rating": ["5", "", "2", "4", "not rated"],
+                "Last Date Read": ["2025-12-31 18:00", "", "2024-01-01", "2025-06-01", "bad date"],
+            }
+        )
+
+    def _chain(self, df, **kwargs):
+        df = normalize_rating(df.copy(), rating_range=kwargs.get("rating_range"))
+        df = compute_recency(df, days_range=kwargs.get("days_range"), today=self.today)
+        return compute_score(df, rating_weight=0.6, recency_weight=0.4)
+
+    def test_matches_the_separate_stages(self):
+        for kwargs in ({}, {"rating_range": (1, 5), "days_range": (0, 1000)}):
+            expected = self._chain(self.df, **kwargs)
+            fused = add_features(self.df.copy(), rating_weight=0.6, recency_weight=0.4, today=self.today, **kwargs)
+            for name in FEATURE_COLUMNS:
+                np.testing.assert_allclose(fused[name].to_numpy(), expected[name].to_numpy(dtype=float))
+            self.assertEqual(fused["days_since_read"].dtype, expected["days_since_read"].dtype)
+
+    def test_missing_or_constant_columns_use_neutral_values(self):
+        fused = add_features(pd.DataFrame({"Star Rating": [4, 4]}), today=self.today)
+        self.assertEqual(fused["rating_norm"].tolist(), [1.0, 1.0])
+        self.assertEqual(fused["recency_norm"].tolist(), [0.5, 0.5])
+        self.assertEqual(fused["days_since_read"].tolist(), [0, 0])
+        fused = add_features(pd.DataFrame({"Title": ["Dune"]}))
+        self.assertEqual(fused["score"].tolist(), [0.5])
+
+    def test_writes_into_the_out_buffer(self):
+        ratings = np.array([1.0, 3.0, 5.0])
+        dates = np.array(["2025-12-22", "2025-12-31", "2026-01-01"], dtype="datetime64[ns]")
+        out = np.full((len(FEATURE_COLUMNS), 3), -1.0)
+        result = build_features(ratings, dates, today=self.today, out=out)
+        self.assertIs(result, out)
+        np.testing.assert_allclose(out[0], [0.0, 0.5, 1.0])
+        np.testing.assert_allclose(out[1], [10, 1, 0])
+        np.testing.assert_allclose(out[2], [0.0, 0.9, 1.0])
+        np.testing.assert_allclose(out[3], 0.7 * out[0] + 0.3 * out[2])
+        with self.assertRaises(ValueError):
+            build_features(ratings, dates, out=np.empty((4, 2)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import tempfile
+import unittest
+import zipfile
+from pathlib import Path
+from unittest.mock import patch
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import profiling
+
+
+def _busy_work(n):
+    return sum(i * i for i in range(n))
+
+
+class ProfilingTests(unittest.TestCase):
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.profile_dir = Path(temp_dir.name)
+        for name, value in (("PROFILE_DIR", self.profile_dir), ("PROFILE_TOKEN", "secret")):
+            patcher = patch.object(profiling, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _app(self):
+        app = FastAPI()
+        app.router.route_class = profiling.ProfiledRoute
+        app.add_middleware(profiling.ProfileMiddleware)
+
+        @app.get("/work")
+        def work(n: int = 1000):
+            return {"total": _busy_work(n)}
+
+        return app
+
+    def test_request_with_token_gets_a_profile_artifact(self):
+        client = TestClient(self._app())
+
+        plain = client.get("/work", params={"n": 10})
+        self.assertEqual(plain.json(), {"total": 285})
+        self.assertNotIn(profiling.PROFILE_ID_HEADER, plain.headers)
+        wrong = client.get("/work", headers={profiling.PROFILE_HEADER: "guess"})
+        self.assertNotIn(profiling.PROFILE_ID_HEADER, wrong.headers)
+        self.assertEqual(list(self.profile_dir.iterdir()), [])
+
+        response = client.get("/work", params={"n": 10}, headers={profiling.PROFILE_HEADER: "secret"})
+        self.assertEqual(response.json(), {"total": 285})
+        artifact = profiling.artifact_path(response.headers[profiling.PROFILE_ID_HEADER])
+        with zipfile.ZipFile(artifact) as archive:
+            self.assertEqual(sorted(archive.namelist()), ["allocations.txt", "profile.pstats", "profile.txt"])
+            # The sync endpoint ran on a worker thread; its calls must still be in the profile.
+            self.assertIn("_busy_work", archive.read("profile.txt").decode())
+
+    def test_profile_call_wraps_a_single_call(self):
+        result, artifact = profiling.profile_call(_busy_work, 100)
+        self.assertEqual(result, 328350)
+        self.assertEqual(artifact.parent, self.profile_dir)
+        self.assertIsNone(profiling.artifact_path("../" + artifact.stem))
+
+
+if __name__ == "__main__":
+    unittest.main()
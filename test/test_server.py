@@ -0,0 +1,74 @@
+import asyncio
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+
+import server
+from book_data import BOOKS_COLUMNS, CsvBackend, LibraryStore, append_rows
+from library_files import disk_version, read_books_cache, write_books_cache
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def _get(app, path, headers=()):
+    scope = {"type": "http", "method": "GET", "path": path, "query_string": b"", "headers": list(headers)}
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    answered = asyncio.run(app._answer_cold(scope, send))
+    return answered, messages
+
+
+class ColdStartTests(unittest.TestCase):
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.path = Path(temp_dir.name) / "books.csv"
+        row = dict.fromkeys(BOOKS_COLUMNS, np.nan)
+        pd.DataFrame([{**row, "Title": "A", "Read Status": "to-read"}], columns=BOOKS_COLUMNS).to_csv(self.path, index=False)
+        self.store = LibraryStore(CsvBackend(self.path))
+        patcher = patch.object(server, "storage_location", return_value=("csv", self.path))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_importing_the_entry_point_does_not_import_pandas(self):
+        code = "import sys, server; sys.exit('pandas' in sys.modules or 'api' in sys.modules)"
+        self.assertEqual(subprocess.run([sys.executable, "-c", code], cwd=ROOT).returncode, 0)
+
+    def test_books_are_served_from_cache_until_the_library_changes(self):
+        self.store.save(append_rows(self.store.load(), [{"Title": "B", "Read Status": "read"}]))
+        self.assertEqual(disk_version("csv", self.path), self.store.version)
+        self.assertEqual(_get(server.app, "/books"), (False, []))
+
+        write_books_cache("csv", self.path, 1, b'[{"Title":"A"},{"Title":"B"}]')
+        answered, messages = _get(server.app, "/books")
+        self.assertTrue(answered)
+        self.assertEqual(messages[0]["status"], 200)
+        self.assertIn((b"etag", b'"1"'), messages[0]["headers"])
+        self.assertEqual(messages[1]["body"], b'[{"Title":"A"},{"Title":"B"}]')
+        self.assertFalse(_get(server.app, "/books/changes")[0])
+
+        df = self.store.load()
+        df.loc[0, "Title"] = "Renamed"
+        self.store.save(df)
+        self.assertIsNone(read_books_cache("csv", self.path))
+        self.assertEqual(_get(server.app, "/books"), (False, []))
+
+    def test_current_etag_is_answered_with_304(self):
+        self.store.save(append_rows(self.store.load(), [{"Title": "B"}]))
+        answered, messages = _get(server.app, "/books", [(b"if-none-match", b'W/"1"')])
+        self.assertTrue(answered)
+        self.assertEqual(messages[0]["status"], 304)
+        self.assertEqual(_get(server.app, "/books", [(b"if-none-match", b'"0"')]), (False, []))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+
+import pandas as pd
+
+from ranking.score import score_tbr_books
+from ranking.similarity import ContentIndex, book_terms
+
+
+class ContentIndexTests(unittest.TestCase):
+    def setUp(self):
+        self.books = pd.DataFrame(
+            {
+                "title": ["The Left Hand of Darkness", "The Dispossessed", "Dune Messiah", "Emma", "Darkness Visible"],
+                "author": ["Ursula K. Le Guin", "Ursula K. Le Guin", "Frank Herbert", "Jane Austen", "William Styron"],
+                "genre": ["science fiction", "science fiction", "science fiction", "romance", "memoir"],
+                "liked": [True, False, False, False, False],
+            }
+        )
+
+    def test_book_terms_keep_fields_apart(self):
+        terms = book_terms("The Tombs of Atuan", "Ursula K. Le Guin, Someone Else", "Fantasy")
+        self.assertEqual(
+            set(terms),
+            {"tombs", "atuan", "author:ursula k. le guin", "author:someone else", "genre:fantasy"},
+        )
+        self.assertEqual(book_terms("Unknown", "unknown", None), {"unknown": 1})
+
+    def test_books_like_the_favourites_score_higher(self):
+        index = ContentIndex.from_frame(self.books, "title", "author", "genre", liked=self.books["liked"])
+        scores = index.scores()
+        self.assertAlmostEqual(scores[0], 1.0)
+        self.assertGreater(scores[1], scores[2])
+        self.assertGreater(scores[2], 0)
+        self.assertGreater(scores[4], 0)
+        self.assertNotIn(3, scores)
+
+    def test_incremental_updates_match_a_rebuild(self):
+        index = ContentIndex.from_frame(self.books, "title", "author", "genre", liked=self.books["liked"])
+        index.scores()
+        index.remove(1)
+        index.add(3, book_terms("Persuasion", "Jane Austen", "romance"), liked=True)
+        index.add(5, book_terms("Mansfield Park", "Jane Austen", "romance"))
+
+        books = self.books.drop(index=1)
+        books.loc[3] = ["Persuasion", "Jane Austen", "romance", True]
+        books.loc[5] = ["Mansfield Park", "Jane Austen", "romance", False]
+        rebuilt = ContentIndex.from_frame(books, "title", "author", "genre", liked=books["liked"]).scores()
+        scores = index.scores()
+        self.assertEqual(set(scores.index), set(rebuilt.index))
+        for key, score in rebuilt.items():
+            self.assertAlmostEqual(scores[key], score)
+        self.assertEqual(len(index), 5)
+
+    def test_no_liked_books_scores_nothing(self):
+        index = ContentIndex.from_frame(self.books, "title", "author", "genre")
+        self.assertTrue(index.scores().empty)
+
+    def test_content_separates_books_by_top_scored_authors(self):
+        books = pd.DataFrame({"Title": ["A", "B", "C"], "Authors": ["Ann", "Ann", "Bob"], "Read Status": "to-read"})
+        ranked = score_tbr_books(
+            books,
+            diverse_authors=False,
+            author_scores={"Ann": 1.0, "Bob": 0.5},
+            content_scores={1: 0.8},
+            randomness_strength=0,
+        )
+        self.assertEqual(ranked["Title"].tolist(), ["B", "A", "C"])
+        for score, expected in zip(ranked["score"], [0.96, 0.8, 0.4]):
+            self.assertAlmostEqual(score, expected)
+
+
+if __name__ == "__main__":
+    unittest.main()